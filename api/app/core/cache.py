@@ -0,0 +1,138 @@
+# api/app/core/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Every cache created in this worker, by name, so their counters can be reported together.
+CACHE_REGISTRY: Dict[str, "LRUCache"] = {}
+
+
+class _InflightLoad:
+    """A load shared by every concurrent miss of one key, and the invalidations it must still apply."""
+
+    def __init__(self):
+        self.task: "Optional[asyncio.Task[Any]]" = None
+        self.invalidated_by: List[Callable[[Any], bool]] = []
+
+
+class LRUCache:
+    """
+    Small bounded in-process cache with least-recently-used eviction and an optional TTL.
+
+    Entries live only in the current API worker. Callers are responsible for
+    invalidating keys on the write paths that make a cached value stale.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (expires_at on the monotonic clock or None, value)
+        self._data: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "_InflightLoad"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        CACHE_REGISTRY[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async get_or_compute with single-flight loading: concurrent misses for the same key
+        wait for one `load()` instead of each running their own. The load runs as its own task,
+        so a caller that is cancelled while waiting does not cancel it for the others.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._inflight[key] = _InflightLoad()
+            inflight.task = asyncio.get_running_loop().create_task(self._load(key, load, inflight))
+            # Retrieved here so loads nobody waits for any more do not log "exception was never retrieved".
+            inflight.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(inflight.task)
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]], inflight: "_InflightLoad") -> Any:
+        try:
+            value = await load()
+        except BaseException:
+            if self._inflight.get(key) is inflight:
+                del self._inflight[key]
+            raise
+        # A key invalidated while loading may have been loaded from stale data; hand it out but don't keep it.
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+            if not any(predicate(value) for predicate in inflight.invalidated_by):
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drops every entry whose value matches; values still loading are not cached if they match."""
+        stale_keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in stale_keys:
+            del self._data[key]
+        for inflight in self._inflight.values():
+            inflight.invalidated_by.append(predicate)
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits / total) if total else None,
+        }
+
+
+def all_cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in CACHE_REGISTRY.values()]
+
+
+_MISSING = object()
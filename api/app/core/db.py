@@ -1,6 +1,6 @@
 import asyncio
 from pymongo import AsyncMongoClient
-from .settings import MONGO_DATABASE_URL, DATABASE_NAME, MONGO_DB
+from .settings import MONGO_DATABASE_URL, MONGO_CLIENT_OPTIONS, DATABASE_NAME, MONGO_DB
 
 
 async def connect_to_mongo():
@@ -22,7 +22,7 @@ async def connect_to_mongo():
         # For now, let's assume we overwrite.
         pass # await close_mongo_connection() # Be careful with this
 
-    client = AsyncMongoClient(MONGO_DATABASE_URL) # This will bind to current_loop
+    client = AsyncMongoClient(MONGO_DATABASE_URL, **MONGO_CLIENT_OPTIONS) # This will bind to current_loop
     MONGO_DB.client = client
     # MONGO_DB.client.get_io_loop = asyncio.get_running_loop # Deprecated way to set loop
     
@@ -84,3 +84,18 @@ def get_student_answer_collection():
     if MONGO_DB.db is None:
         raise Exception("Database not initialized. Call connect_to_mongo first.")
     return MONGO_DB.db["student_answers"]
+
+def get_rescore_job_collection():
+    if MONGO_DB.db is None:
+        raise Exception("Database not initialized. Call connect_to_mongo first.")
+    return MONGO_DB.db["rescore_jobs"]
+
+def get_survey_snapshot_collection():
+    if MONGO_DB.db is None:
+        raise Exception("Database not initialized. Call connect_to_mongo first.")
+    return MONGO_DB.db["survey_snapshots"]
+
+def get_rate_limit_collection():
+    if MONGO_DB.db is None:
+        raise Exception("Database not initialized. Call connect_to_mongo first.")
+    return MONGO_DB.db["rate_limits"]
@@ -0,0 +1,60 @@
+# api/app/core/fieldsets.py
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+# Sparse fieldsets: `?fields=id,title` on a read endpoint projects only those fields in MongoDB and
+# serialises a trimmed copy of the endpoint's *Out model, so dashboards don't pay for rules and feedback.
+FIELDS_QUERY_DESCRIPTION = "Comma-separated response fields to return, e.g. 'id,title'. The id is always included."
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in model.model_fields]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field(s) in fields: {', '.join(unknown) or '(none given)'}. Available: {', '.join(model.model_fields)}."
+        )
+    if "id" in model.model_fields and "id" not in names:
+        names = ("id",) + names
+    return names
+
+
+def fields_projection(names: Optional[Tuple[str, ...]], required: Iterable[str] = ()) -> Optional[Dict[str, int]]:
+    """
+    MongoDB projection for the requested fields plus `required` document keys the endpoint itself
+    reads (sort keys, lookup ids). Response fields that are computed rather than stored are harmless here.
+    """
+    if names is None:
+        return None
+    projection = {("_id" if name == "id" else name): 1 for name in names}
+    projection.update({key: 1 for key in required})
+    return projection
+
+
+@lru_cache(maxsize=256)
+def trimmed_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    """Copy of `model` with only `names`, built once per field set."""
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True, populate_by_name=True, arbitrary_types_allowed=True),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in names},
+    )
+
+
+@lru_cache(maxsize=256)
+def _trimmed_list_adapter(model: Type[BaseModel], names: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[trimmed_model(model, names)])
+
+
+def fieldset_response(response: Response, model: Type[BaseModel], names: Tuple[str, ...], items: List[Any]) -> JSONResponse:
+    """Serialises `items` through the trimmed model, keeping headers already set on the injected response."""
+    adapter = _trimmed_list_adapter(model, names)
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return JSONResponse(content=adapter.dump_python(adapter.validate_python(items), mode="json"), headers=headers)
@@ -0,0 +1,145 @@
+# api/app/core/indexes.py
+"""
+Declarative registry of the MongoDB indexes the API relies on.
+
+`ensure_indexes()` runs in the app lifespan and only creates what is missing. Run
+`python -m app.core.indexes --check` to report missing, unexpected and unused indexes
+without changing anything (exit code 1 when an index is missing).
+"""
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from .db import MONGO_DB, connect_to_mongo, close_mongo_connection
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    partial_filter: Optional[Dict[str, Any]] = field(default=None, hash=False)
+    name: Optional[str] = None
+    expire_after_seconds: Optional[int] = None
+    reason: str = ""
+
+    @property
+    def index_name(self) -> str:
+        # Same naming as the server/pymongo default, so indexes created by hand are recognised.
+        return self.name or "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def to_index_model(self) -> IndexModel:
+        options: Dict[str, Any] = {"name": self.index_name}
+        if self.unique:
+            options["unique"] = True
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+
+INDEXES: List[IndexSpec] = [
+    IndexSpec("users", (("username", 1),), unique=True, reason="login and signup lookups; usernames are unique"),
+    IndexSpec("courses", (("code", 1),), unique=True, reason="course codes are unique"),
+    IndexSpec(
+        "question_course_associations", (("question_id", 1), ("course_id", 1)), unique=True,
+        reason="a question is associated with a course at most once",
+    ),
+    IndexSpec("question_course_associations", (("course_id", 1), ("_id", 1)), reason="QCAs of a survey's courses, paged by _id"),
+    IndexSpec("question_course_associations", (("question_id", 1), ("_id", 1)), reason="QCAs of a question, paged by _id"),
+    IndexSpec("surveys", (("course_ids", 1),), reason="max-score maintenance and course deletion checks"),
+    IndexSpec("surveys", (("created_at", -1), ("_id", -1)), reason="teacher survey listing"),
+    IndexSpec("surveys", (("is_published", 1), ("created_at", -1), ("_id", -1)), reason="published survey listing"),
+    IndexSpec(
+        "survey_attempts", (("student_id", 1), ("survey_id", 1)), unique=True, partial_filter={"is_submitted": False},
+        name="one_open_attempt_per_student_and_survey",
+        reason="start_survey_attempt relies on DuplicateKeyError for concurrent starts",
+    ),
+    IndexSpec("survey_attempts", (("student_id", 1), ("started_at", -1), ("_id", -1)), reason="a student's attempts, newest first"),
+    IndexSpec(
+        "survey_attempts", (("survey_id", 1), ("is_submitted", 1), ("submitted_at", -1), ("_id", -1)),
+        reason="a survey's submitted attempts, newest first",
+    ),
+    IndexSpec(
+        "student_answers", (("survey_attempt_id", 1), ("qca_id", 1), ("student_id", 1)), unique=True,
+        reason="one answer per QCA per attempt; matches the save upsert filter so the server retries racing upserts",
+    ),
+    IndexSpec("student_answers", (("question_id", 1),), reason="rescoring every answer to a question"),
+    IndexSpec("survey_snapshots", (("survey_id", 1), ("version", 1)), unique=True, reason="one snapshot per published version"),
+    IndexSpec("rate_limits", (("expires_at", 1),), expire_after_seconds=0, reason="drops idle shared rate-limit buckets"),
+]
+
+
+def _specs_by_collection() -> Dict[str, List[IndexSpec]]:
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in INDEXES:
+        by_collection.setdefault(spec.collection, []).append(spec)
+    return by_collection
+
+
+async def ensure_indexes(db=None) -> List[str]:
+    """Creates the registry's missing indexes and returns the names of those that could not be built."""
+    db = db if db is not None else MONGO_DB.db
+    failed: List[str] = []
+    for collection_name, specs in _specs_by_collection().items():
+        collection = db[collection_name]
+        existing = set(await collection.index_information())
+        for spec in specs:
+            if spec.index_name in existing:
+                continue
+            try:
+                await collection.create_indexes([spec.to_index_model()])
+            except OperationFailure as e:
+                # e.g. duplicates in existing data blocking a unique index; the API still runs without it.
+                print(f"WARNING: Could not create index {collection_name}.{spec.index_name}: {e}")
+                failed.append(f"{collection_name}.{spec.index_name}")
+    return failed
+
+
+async def check_indexes(db=None) -> Dict[str, List[str]]:
+    """
+    Compares the database with the registry. `unused` lists registered indexes with no recorded
+    accesses since the server last started (per $indexStats), which only means something on a warm server.
+    """
+    db = db if db is not None else MONGO_DB.db
+    report: Dict[str, List[str]] = {"missing": [], "unexpected": [], "unused": []}
+    existing_collections = set(await db.list_collection_names())
+    for collection_name, specs in _specs_by_collection().items():
+        expected = {spec.index_name for spec in specs}
+        if collection_name not in existing_collections:
+            report["missing"].extend(f"{collection_name}.{name}" for name in sorted(expected))
+            continue
+        collection = db[collection_name]
+        existing = set(await collection.index_information()) - {"_id_"}
+        report["missing"].extend(f"{collection_name}.{name}" for name in sorted(expected - existing))
+        report["unexpected"].extend(f"{collection_name}.{name}" for name in sorted(existing - expected))
+        async for stats in await collection.aggregate([{"$indexStats": {}}]):
+            if stats["name"] in expected and stats.get("accesses", {}).get("ops", 0) == 0:
+                report["unused"].append(f"{collection_name}.{stats['name']}")
+    return report
+
+
+async def _main(check: bool) -> int:
+    await connect_to_mongo()
+    try:
+        if not check:
+            failed = await ensure_indexes()
+            print(f"Indexes applied ({len(INDEXES) - len(failed)}/{len(INDEXES)}).")
+        report = await check_indexes()
+    finally:
+        await close_mongo_connection()
+    for kind, names in report.items():
+        print(f"{kind}: {', '.join(names) if names else '-'}")
+    return 1 if report["missing"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or verify the API's MongoDB indexes.")
+    parser.add_argument("--check", action="store_true", help="Only report missing, unexpected and unused indexes.")
+    sys.exit(asyncio.run(_main(parser.parse_args().check)))
@@ -0,0 +1,113 @@
+# api/app/core/loaders.py
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .db import (
+    get_qca_collection, get_question_collection, get_survey_collection, get_user_collection
+)
+
+
+class DocumentLoader:
+    """
+    By-_id loader for one collection, scoped to a request. Loads requested in the same event-loop
+    tick are sent as a single `$in` query, and every result (including "not found") is memoised for
+    the rest of the request. Returned documents are shared between callers: treat them as read-only.
+    """
+
+    def __init__(self, collection, projection: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.projection = projection
+        self._results: Dict[Any, "asyncio.Future[Optional[dict]]"] = {}
+        self._pending: List[Any] = []
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self.queries = 0
+
+    async def load(self, doc_id: Any) -> Optional[dict]:
+        future = self._results.get(doc_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._results[doc_id] = future
+            if not self._pending:
+                # Runs after everything already scheduled in this tick has queued its ids.
+                self._dispatch_task = asyncio.get_running_loop().create_task(self._dispatch())
+            self._pending.append(doc_id)
+        return await asyncio.shield(future)
+
+    async def load_many(self, doc_ids: Iterable[Any]) -> Dict[Any, dict]:
+        """Documents by id for the given ids; ids with no document are left out."""
+        unique_ids = list(dict.fromkeys(doc_ids))
+        docs = await asyncio.gather(*(self.load(doc_id) for doc_id in unique_ids))
+        return {doc_id: doc for doc_id, doc in zip(unique_ids, docs) if doc is not None}
+
+    def prime(self, doc: dict) -> None:
+        """Memoises a document the request already holds, so later loads of its id need no query."""
+        future = self._results.get(doc["_id"])
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._results[doc["_id"]] = future
+        if not future.done():
+            future.set_result(doc)
+
+    async def _dispatch(self) -> None:
+        ids, self._pending = self._pending, []
+        futures = {doc_id: self._results[doc_id] for doc_id in ids if doc_id in self._results}
+        try:
+            self.queries += 1
+            docs = {doc["_id"]: doc async for doc in self.collection.find({"_id": {"$in": ids}}, self.projection)}
+        except Exception as e:
+            for doc_id, future in futures.items():
+                # Not memoised, so a later load in the same request retries
+                if self._results.get(doc_id) is future:
+                    del self._results[doc_id]
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Retrieved here so unawaited failures do not log "exception was never retrieved".
+            return
+        for doc_id, future in futures.items():
+            if not future.done():
+                future.set_result(docs.get(doc_id))
+
+
+# Survey fields shown next to attempts and needed to authorize teachers; the full document is only read to score legacy attempts.
+SURVEY_SUMMARY_PROJECTION = {
+    "created_by": 1, "title": 1, "description": 1, "max_scores_per_course": 1, "max_overall_survey_score": 1
+}
+
+
+class RequestLoaders:
+    """One DocumentLoader per collection (and projection), created on first use within the request."""
+
+    def __init__(self):
+        self._loaders: Dict[str, DocumentLoader] = {}
+
+    def _loader(self, name: str, get_collection: Callable[[], Any], projection: Optional[Dict[str, Any]] = None) -> DocumentLoader:
+        loader = self._loaders.get(name)
+        if loader is None:
+            loader = self._loaders[name] = DocumentLoader(get_collection(), projection)
+        return loader
+
+    @property
+    def surveys(self) -> DocumentLoader:
+        return self._loader("surveys", get_survey_collection)
+
+    @property
+    def survey_summaries(self) -> DocumentLoader:
+        return self._loader("survey_summaries", get_survey_collection, SURVEY_SUMMARY_PROJECTION)
+
+    @property
+    def qcas(self) -> DocumentLoader:
+        return self._loader("qcas", get_qca_collection)
+
+    @property
+    def questions(self) -> DocumentLoader:
+        return self._loader("questions", get_question_collection)
+
+    @property
+    def users(self) -> DocumentLoader:
+        # Only ever used for display names next to attempts
+        return self._loader("users", get_user_collection, {"display_name": 1})
+
+
+def get_loaders() -> RequestLoaders:
+    """FastAPI dependency; FastAPI caches it per request, so every dependant of a request shares the loaders."""
+    return RequestLoaders()
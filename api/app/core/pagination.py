@@ -0,0 +1,62 @@
+# api/app/core/pagination.py
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException, Response, status
+
+# List endpoints page with keyset cursors: the opaque token holds the (sort value, _id) of the last row
+# served, and the next page is a range query from there, so every page costs the same as the first one.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CURSOR_QUERY_DESCRIPTION = f"Opaque token from the previous page's {NEXT_CURSOR_HEADER} header. Takes precedence over skip."
+
+# Types a cursor's sort value may decode to, per sort field. The token is client-supplied, so anything
+# else (a document such as {"$ne": null} in particular) is rejected before it reaches a query.
+CURSOR_VALUE_TYPES: Dict[str, Tuple[type, ...]] = {
+    "_id": (ObjectId,),
+    "created_at": (datetime, type(None)),
+    "started_at": (datetime, type(None)),
+    "submitted_at": (datetime, type(None)),
+}
+
+
+def encode_cursor(sort_value: Any, doc_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps([sort_value, doc_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, value_types: Tuple[type, ...]) -> Tuple[Any, ObjectId]:
+    try:
+        sort_value, doc_id = json_util.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    if not isinstance(doc_id, ObjectId) or not isinstance(sort_value, value_types):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    return sort_value, doc_id
+
+
+def keyset_query(query: Dict[str, Any], sort_field: str, direction: int, cursor: Optional[str]) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """
+    Adds the range condition for the page after `cursor` to `query` and returns it with the sort to use.
+    Ties on `sort_field` are broken by `_id`, which is also what makes the order total.
+    """
+    sort = [("_id", direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    if cursor is None:
+        return query, sort
+    sort_value, last_id = decode_cursor(cursor, CURSOR_VALUE_TYPES[sort_field])
+    after = "$gt" if direction == 1 else "$lt"
+    query = dict(query)
+    if sort_field == "_id":
+        query["_id"] = {after: last_id}
+    else:
+        query["$or"] = [{sort_field: {after: sort_value}}, {sort_field: {"$eq": sort_value}, "_id": {after: last_id}}]
+    return query, sort
+
+
+def set_next_cursor(response: Response, docs: List[Dict[str, Any]], limit: int, sort_field: str) -> None:
+    """A full page may have more rows after it; a short page is the last one and gets no cursor."""
+    if limit > 0 and len(docs) >= limit:
+        last = docs[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.get(sort_field), last["_id"])
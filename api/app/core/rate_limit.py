@@ -0,0 +1,178 @@
+# api/app/core/rate_limit.py
+"""
+Token-bucket admission control for expensive routes (bcrypt on login, answer autosave).
+
+Each route group has a budget per client IP and, where the caller is known, per user: a bucket
+holds up to `burst` tokens and refills at `per_minute`. A request takes one token from each of its
+buckets only if every one of them has a token; otherwise nothing is taken and it is answered with
+429 and a Retry-After header. RATE_LIMIT_BACKEND selects where the
+buckets live: "memory" (per API worker), "mongo" (shared by every worker through the rate_limits
+collection) or "off".
+
+The client IP is the peer address as uvicorn reports it. Behind a reverse proxy, uvicorn only
+replaces it with X-Forwarded-For when started with --proxy-headers and the proxy's address is in
+FORWARDED_ALLOW_IPS; otherwise every request appears to come from the proxy.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from .db import get_rate_limit_collection
+from .settings import (
+    RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS,
+    LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_PER_USERNAME,
+    ANSWER_RATE_LIMIT_PER_IP, ANSWER_RATE_LIMIT_PER_USER,
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    burst: int
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """From a "<burst>/<per_minute>" setting, e.g. "20/10"."""
+        burst, per_minute = value.split("/")
+        return cls(int(burst), float(per_minute))
+
+
+# Per group: (limit per client IP, limit per user). Classrooms share one IP behind NAT, so IP
+# budgets are sized for a whole cohort and the per-user budgets do the fine-grained work.
+RATE_LIMITS: Dict[str, Tuple[RateLimit, RateLimit]] = {
+    "login": (RateLimit.parse(LOGIN_RATE_LIMIT_PER_IP), RateLimit.parse(LOGIN_RATE_LIMIT_PER_USERNAME)),
+    "answers": (RateLimit.parse(ANSWER_RATE_LIMIT_PER_IP), RateLimit.parse(ANSWER_RATE_LIMIT_PER_USER)),
+}
+
+
+def _retry_after(tokens: float, limit: RateLimit) -> float:
+    return (1 - tokens) / limit.per_second if limit.per_second > 0 else 60.0
+
+
+class MemoryTokenBuckets:
+    """Buckets of this worker only, least recently used dropped beyond `max_keys`."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(limit.burst), now))
+        tokens = min(float(limit.burst), tokens + (now - updated_at) * limit.per_second)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if allowed else _retry_after(tokens, limit)
+
+    async def refund(self, key: str, limit: RateLimit) -> None:
+        """Gives back a token taken by `take`."""
+        if key in self._buckets:
+            tokens, updated_at = self._buckets[key]
+            self._buckets[key] = (min(float(limit.burst), tokens + 1), updated_at)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class MongoTokenBuckets:
+    """
+    Buckets shared by all workers: one document per key, refilled and debited atomically by a
+    single pipeline update. Idle buckets are removed by the TTL index on `expires_at`.
+    """
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = datetime.now(UTC)
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [limit.burst, {"$add": [{"$ifNull": ["$tokens", limit.burst]}, {"$multiply": [elapsed_seconds, limit.per_second]}]}]}
+        # Time for an empty bucket to refill completely, after which the document carries no state
+        idle_seconds = math.ceil(limit.burst / limit.per_second) if limit.per_second > 0 else 3600
+        pipeline = [
+            {"$set": {"tokens": refilled, "updated_at": now}},
+            {"$set": {
+                "allowed": {"$gte": ["$tokens", 1]},
+                "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "expires_at": {"$dateAdd": {"startDate": now, "unit": "second", "amount": idle_seconds}},
+            }},
+        ]
+        collection = get_rate_limit_collection()
+        try:
+            bucket = await collection.find_one_and_update(
+                {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Two first requests for a key raced on the upsert; the document exists now
+            bucket = await collection.find_one_and_update({"_id": key}, pipeline, return_document=ReturnDocument.AFTER)
+        return 0.0 if bucket["allowed"] else _retry_after(bucket["tokens"], limit)
+
+    async def refund(self, key: str, limit: RateLimit) -> None:
+        await get_rate_limit_collection().update_one(
+            {"_id": key}, [{"$set": {"tokens": {"$min": [limit.burst, {"$add": ["$tokens", 1]}]}}}]
+        )
+
+
+_BACKENDS = {"memory": MemoryTokenBuckets(RATE_LIMIT_MAX_KEYS), "mongo": MongoTokenBuckets()}
+
+
+def reset_rate_limits() -> None:
+    """Empties this worker's in-memory buckets."""
+    _BACKENDS["memory"].clear()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(group: str, request: Request, user_key: Optional[str] = None) -> None:
+    """
+    Takes a token from the group's user bucket (if `user_key` is given) and its IP bucket; raises 429
+    when either is empty. A denied request leaves the other bucket as it was, so one student hitting
+    their own limit does not use up the budget of everyone behind the same address.
+    """
+    backend = _BACKENDS.get(RATE_LIMIT_BACKEND)
+    if backend is None:
+        return
+    ip_limit, user_limit = RATE_LIMITS[group]
+    # Narrowest bucket first: it is the one most likely to deny
+    buckets = [(f"{group}:ip:{client_ip(request)}", ip_limit)]
+    if user_key is not None:
+        buckets.insert(0, (f"{group}:user:{user_key}", user_limit))
+
+    taken: List[Tuple[str, RateLimit]] = []
+    for key, limit in buckets:
+        try:
+            retry_after = await backend.take(key, limit)
+        except PyMongoError as e:
+            # Admission control must not take logins down with it; fail open.
+            print(f"WARNING: Rate limit backend unavailable for {key}: {e}")
+            continue
+        if retry_after > 0:
+            await _refund(backend, taken)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please retry later.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+        taken.append((key, limit))
+
+
+async def _refund(backend, taken: List[Tuple[str, RateLimit]]) -> None:
+    for key, limit in taken:
+        try:
+            await backend.refund(key, limit)
+        except PyMongoError as e:
+            print(f"WARNING: Rate limit backend unavailable for {key}: {e}")
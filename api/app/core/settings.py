@@ -14,6 +14,27 @@ MONGO_DB = DataBase()
 DATABASE_NAME = os.getenv("DATABASE_NAME", "survey_db_default") # Default if not set by env
 MONGO_DATABASE_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017") 
 
+# --- MongoDB Client ---
+# Driver options for connect_to_mongo. Unset variables keep the driver default (noted alongside).
+def _optional_int_env(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else None
+
+MONGO_CLIENT_OPTIONS = {
+    key: value for key, value in {
+        "maxPoolSize": _optional_int_env("MONGO_MAX_POOL_SIZE"),  # 100 connections per server
+        "minPoolSize": _optional_int_env("MONGO_MIN_POOL_SIZE"),  # 0, i.e. no warm connections
+        "maxIdleTimeMS": _optional_int_env("MONGO_MAX_IDLE_TIME_MS"),  # never closed for idling
+        "waitQueueTimeoutMS": _optional_int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS"),  # wait for a free connection indefinitely
+        "serverSelectionTimeoutMS": _optional_int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS"),  # 30000
+        "socketTimeoutMS": _optional_int_env("MONGO_SOCKET_TIMEOUT_MS"),  # no timeout
+        # Comma-separated, in order of preference: zstd (needs zstandard), snappy (needs python-snappy), zlib.
+        # Compressors whose module is missing are skipped by the driver with a warning.
+        "compressors": os.getenv("MONGO_COMPRESSORS") or None,
+        "appname": os.getenv("MONGO_APPNAME", "survey-api"),
+    }.items() if value is not None
+}
+
 # --- Session Management ---
 SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "a_very_default_and_insecure_secret_key_CHANGE_ME")
 
@@ -65,3 +86,50 @@ print(f"INFO: Backend CORS Allowed Origins: {ALLOWED_ORIGINS}")
 
 STANDARD_QUESTION_MAX_SCORE: float = 10.0
 
+# --- Bulk Rescoring ---
+# Answers scored and written per bulk_write when a question's scoring rules change.
+RESCORE_ANSWER_CHUNK_SIZE = int(os.getenv("RESCORE_ANSWER_CHUNK_SIZE", "2000"))
+# Submitted attempts whose aggregates are recomputed per batch after their answers were rescored.
+RESCORE_ATTEMPT_CHUNK_SIZE = int(os.getenv("RESCORE_ATTEMPT_CHUNK_SIZE", "200"))
+
+# --- Scoring Plan Cache ---
+# Compiled scoring rules per question. Writes invalidate them in the worker that made them; the TTL bounds
+# how long other workers keep scoring with rules that were edited elsewhere.
+SCORING_PLAN_CACHE_TTL_SECONDS = float(os.getenv("SCORING_PLAN_CACHE_TTL_SECONDS", "300"))
+
+# --- Feedback Table Cache ---
+# Compiled question and QCA feedback tables, and threshold tables of surveys saved before thresholds were
+# compiled on write. Same trade-off as the scoring plan cache.
+FEEDBACK_TABLE_CACHE_TTL_SECONDS = float(os.getenv("FEEDBACK_TABLE_CACHE_TTL_SECONDS", "300"))
+
+# --- Survey Question Set Cache ---
+# Resolved question lists per survey, shared by every student opening the same survey.
+SURVEY_QUESTION_CACHE_SIZE = int(os.getenv("SURVEY_QUESTION_CACHE_SIZE", "512"))
+SURVEY_QUESTION_CACHE_TTL_SECONDS = float(os.getenv("SURVEY_QUESTION_CACHE_TTL_SECONDS", "300"))
+
+# --- Streaming Listings ---
+# Attempts fetched per cursor batch, and enriched and written out together, in NDJSON listing mode.
+ATTEMPT_STREAM_BATCH_SIZE = int(os.getenv("ATTEMPT_STREAM_BATCH_SIZE", "500"))
+
+# --- Password Hashing ---
+# bcrypt hashes computed at once on the password hashing thread pool; logins beyond this wait in its queue.
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+
+# --- Session User Cache ---
+# Users resolved from session cookies, so authenticated requests don't each read the users collection.
+SESSION_USER_CACHE_SIZE = int(os.getenv("SESSION_USER_CACHE_SIZE", "4096"))
+SESSION_USER_CACHE_TTL_SECONDS = float(os.getenv("SESSION_USER_CACHE_TTL_SECONDS", "60"))
+
+# --- Session Claims ---
+# How long identity and role claims in a session cookie are trusted before the user's token version is re-checked.
+SESSION_CLAIMS_REVALIDATE_SECONDS = float(os.getenv("SESSION_CLAIMS_REVALIDATE_SECONDS", "60"))
+
+# --- Rate Limiting ---
+# "memory" keeps token buckets per API worker, "mongo" shares them between workers, "off" disables limiting.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Budgets as "<burst>/<per_minute>". Per-IP budgets cover a whole classroom behind one address.
+LOGIN_RATE_LIMIT_PER_IP = os.getenv("LOGIN_RATE_LIMIT_PER_IP", "1000/600")
+LOGIN_RATE_LIMIT_PER_USERNAME = os.getenv("LOGIN_RATE_LIMIT_PER_USERNAME", "10/5")
+ANSWER_RATE_LIMIT_PER_IP = os.getenv("ANSWER_RATE_LIMIT_PER_IP", "5000/6000")
+ANSWER_RATE_LIMIT_PER_USER = os.getenv("ANSWER_RATE_LIMIT_PER_USER", "30/60")
@@ -26,6 +26,8 @@ class CourseUpdate(BaseModel):
 
 class CourseInDBBase(CourseBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    # Number of QCAs linking questions to this course, maintained by the QCA and question write paths.
+    question_count: int = 0
 
 class CourseInDB(CourseInDBBase):
     pass
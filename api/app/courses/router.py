@@ -1,18 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from bson import ObjectId # For validating ObjectId strings from path
 
 from app.core.db import get_course_collection, get_qca_collection, get_survey_collection
+from app.core.pagination import CURSOR_QUERY_DESCRIPTION, keyset_query, set_next_cursor
+from app.core.fieldsets import FIELDS_QUERY_DESCRIPTION, fields_projection, fieldset_response, parse_fields
 from app.users.auth import get_current_active_user, require_teacher_role 
-from app.users.data_types import UserInDB # For type hinting current_user
+from app.users.data_types import SessionUser # For type hinting current_user
 from .data_types import CourseCreate, CourseOut, CourseUpdate, CourseInDB, PyObjectId
+from app.surveys.question_cache import invalidate_survey_questions_for_courses
 
 CourseRouter = APIRouter()
 
 @CourseRouter.post("/", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
 async def create_course(
     course_in: CourseCreate,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     course_collection = get_course_collection()
     existing_course = await course_collection.find_one({"code": course_in.code})
@@ -38,7 +41,7 @@ async def create_course(
 @CourseRouter.get("/{course_id}", response_model=CourseOut)
 async def get_course(
     course_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: SessionUser = Depends(get_current_active_user)
 ):
     if not ObjectId.is_valid(course_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID format.")
@@ -56,20 +59,33 @@ async def get_course(
 
 @CourseRouter.get("/", response_model=List[CourseOut])
 async def list_courses(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: UserInDB = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    current_user: SessionUser = Depends(get_current_active_user)
 ):
     course_collection = get_course_collection()
-    courses_cursor = course_collection.find().skip(skip).limit(limit)
+    field_names = parse_fields(fields, CourseOut)
+    query, sort = keyset_query({}, "_id", 1, cursor)
+    courses_cursor = course_collection.find(query, fields_projection(field_names)).sort(sort).limit(limit)
+    if cursor is None:
+        courses_cursor = courses_cursor.skip(skip)
     courses_list_from_db = await courses_cursor.to_list(length=limit) 
+    set_next_cursor(response, courses_list_from_db, limit, "_id")
     
     processed_courses_out = []
     for course_dict_item in courses_list_from_db:
         if "_id" in course_dict_item:
             course_dict_item["id"] = str(course_dict_item.pop("_id"))
-        processed_courses_out.append(CourseOut.model_validate(course_dict_item)) 
+        if field_names is None:
+            processed_courses_out.append(CourseOut.model_validate(course_dict_item)) 
+        else:
+            processed_courses_out.append(course_dict_item)
     
+    if field_names is not None:
+        return fieldset_response(response, CourseOut, field_names, processed_courses_out)
     return processed_courses_out
 
 
@@ -77,7 +93,7 @@ async def list_courses(
 async def update_course(
     course_id: str,
     course_update: CourseUpdate,
-    teacher_user: UserInDB = Depends(require_teacher_role) 
+    teacher_user: SessionUser = Depends(require_teacher_role) 
 ):
     if not ObjectId.is_valid(course_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID format.")
@@ -120,7 +136,7 @@ async def update_course(
 @CourseRouter.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_course(
     course_id: str,
-    teacher_user: UserInDB = Depends(require_teacher_role) 
+    teacher_user: SessionUser = Depends(require_teacher_role) 
 ):
     if not ObjectId.is_valid(course_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID format.")
@@ -140,6 +156,7 @@ async def delete_course(
     # Delete associated QuestionCourseAssociations
     qca_collection = get_qca_collection()
     await qca_collection.delete_many({"course_id": course_obj_id})
+    invalidate_survey_questions_for_courses([course_obj_id])
     
     # Delete the course itself
     delete_result = await course_collection.delete_one({"_id": course_obj_id})
@@ -7,6 +7,8 @@ from starlette.middleware.sessions import SessionMiddleware
 from http import HTTPStatus
 
 from .core.db import connect_to_mongo, close_mongo_connection
+from .core.indexes import ensure_indexes
+from .core.pagination import NEXT_CURSOR_HEADER
 from .core.settings import ALLOWED_ORIGINS, MONGO_DB, SESSION_SECRET_KEY
 
 from .users.router import UserRouter
@@ -15,6 +17,7 @@ from .questions.router import QuestionRouter
 from .qca.router import QcaRouter
 from .surveys.router import SurveyRouter 
 from .survey_attempts.router import SurveyAttemptRouter
+from .metrics.router import MetricsRouter
 
 
 
@@ -23,6 +26,7 @@ async def lifespan(app: FastAPI):
     print("Application startup: Connecting to MongoDB...")
     try:
         await connect_to_mongo()
+        await ensure_indexes()
         app.state.mongo_client = MONGO_DB.client
     except Exception as e:
         print(f"Failed to connect to MongoDB: {e}")
@@ -41,7 +45,8 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["ETag", NEXT_CURSOR_HEADER]
 )
 
 app.add_middleware(
@@ -57,6 +62,7 @@ api_root.include_router(QuestionRouter, prefix="/questions", tags=["Questions"])
 api_root.include_router(QcaRouter, prefix="/question-course-associations", tags=["Question-Course Associations"])
 api_root.include_router(SurveyRouter, prefix="/surveys", tags=["Surveys"]) 
 api_root.include_router(SurveyAttemptRouter, prefix="/survey-attempts", tags=["Survey Attempts"])
+api_root.include_router(MetricsRouter, prefix="/metrics", tags=["Metrics"])
 
 app.include_router(api_root)
 
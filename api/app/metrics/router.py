@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from typing import Any, Dict, List
+
+from app.core.cache import all_cache_stats
+from app.users.auth import require_teacher_role
+from app.users.data_types import SessionUser
+from app.users.password_hashing import PASSWORD_HASH_POOL
+
+MetricsRouter = APIRouter()
+
+@MetricsRouter.get("/caches", response_model=List[Dict[str, Any]])
+async def get_cache_metrics(teacher_user: SessionUser = Depends(require_teacher_role)):
+    """Size and hit/miss counters of this worker's in-process caches."""
+    return all_cache_stats()
+
+@MetricsRouter.get("/password-hashing", response_model=Dict[str, Any])
+async def get_password_hashing_metrics(teacher_user: SessionUser = Depends(require_teacher_role)):
+    """Concurrency and queue depth of this worker's password hashing pool."""
+    return PASSWORD_HASH_POOL.stats()
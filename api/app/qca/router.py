@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from bson import ObjectId
 
 from app.core.db import get_qca_collection, get_question_collection, get_course_collection
+from app.core.pagination import CURSOR_QUERY_DESCRIPTION, keyset_query, set_next_cursor
+from app.core.fieldsets import FIELDS_QUERY_DESCRIPTION, fields_projection, fieldset_response, parse_fields
 from app.users.auth import require_teacher_role
-from app.users.data_types import UserInDB, PyObjectId as UserPyObjectId # Alias to avoid conflict if needed
+from app.users.data_types import SessionUser, PyObjectId as UserPyObjectId # Alias to avoid conflict if needed
 from .data_types import QcaCreate, QcaUpdate, QcaOut, QcaInDB
+from app.survey_attempts.thresholds import invalidate_feedback_table
+from app.surveys.question_cache import invalidate_survey_questions_for_courses
+from app.surveys.max_scores import apply_qca_created, apply_qca_deleted
 # Assuming PyObjectId from app.users.data_types is the one used everywhere
 from app.users.data_types import PyObjectId
 
@@ -14,7 +19,7 @@ QcaRouter = APIRouter()
 @QcaRouter.post("/", response_model=QcaOut, status_code=status.HTTP_201_CREATED)
 async def create_qca(
     qca_in: QcaCreate,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     qca_collection = get_qca_collection()
     question_collection = get_question_collection()
@@ -38,6 +43,8 @@ async def create_qca(
 
     qca_db_obj = QcaInDB(**qca_in.model_dump())
     result = await qca_collection.insert_one(qca_db_obj.model_dump(by_alias=True))
+    await apply_qca_created(qca_in.question_id, qca_in.course_id)
+    invalidate_survey_questions_for_courses([qca_in.course_id])
     
     created_qca_dict = await qca_collection.find_one({"_id": result.inserted_id})
     if not created_qca_dict:
@@ -50,13 +57,17 @@ async def create_qca(
 
 @QcaRouter.get("/", response_model=List[QcaOut])
 async def list_qcas(
+    response: Response,
     question_id: Optional[str] = Query(None, description="Filter by Question ID"),
     course_id: Optional[str] = Query(None, description="Filter by Course ID"),
     skip: int = 0,
     limit: int = 100,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     qca_collection = get_qca_collection()
+    field_names = parse_fields(fields, QcaOut)
     query_filter = {}
     if question_id:
         if not ObjectId.is_valid(question_id):
@@ -67,20 +78,26 @@ async def list_qcas(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course_id format.")
         query_filter["course_id"] = PyObjectId(course_id)
 
-    qcas_cursor = qca_collection.find(query_filter).skip(skip).limit(limit)
+    query_filter, sort = keyset_query(query_filter, "_id", 1, cursor)
+    qcas_cursor = qca_collection.find(query_filter, fields_projection(field_names)).sort(sort).limit(limit)
+    if cursor is None:
+        qcas_cursor = qcas_cursor.skip(skip)
     qcas_list_from_db = await qcas_cursor.to_list(length=limit)
+    set_next_cursor(response, qcas_list_from_db, limit, "_id")
     
     processed_qcas = []
     for qca_dict in qcas_list_from_db:
         if "_id" in qca_dict:
             qca_dict["id"] = str(qca_dict.pop("_id"))
-        processed_qcas.append(QcaOut.model_validate(qca_dict))
+        processed_qcas.append(QcaOut.model_validate(qca_dict) if field_names is None else qca_dict)
+    if field_names is not None:
+        return fieldset_response(response, QcaOut, field_names, processed_qcas)
     return processed_qcas
 
 @QcaRouter.get("/{qca_id}", response_model=QcaOut)
 async def get_qca(
     qca_id: str,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(qca_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid QCA ID format.")
@@ -98,7 +115,7 @@ async def get_qca(
 async def update_qca(
     qca_id: str,
     qca_update: QcaUpdate,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(qca_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid QCA ID format.")
@@ -116,6 +133,8 @@ async def update_qca(
         {"_id": PyObjectId(qca_id)},
         {"$set": update_data}
     )
+    invalidate_feedback_table("qca", PyObjectId(qca_id))
+    invalidate_survey_questions_for_courses([existing_qca["course_id"]])
     
     final_qca_dict = await qca_collection.find_one({"_id": PyObjectId(qca_id)})
     if not final_qca_dict: 
@@ -128,13 +147,16 @@ async def update_qca(
 @QcaRouter.delete("/{qca_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_qca(
     qca_id: str,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(qca_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid QCA ID format.")
     # TODO: Consider if deleting a QCA has implications for ongoing surveys or results.
     qca_collection = get_qca_collection()
-    delete_result = await qca_collection.delete_one({"_id": PyObjectId(qca_id)})
-    if delete_result.deleted_count == 0:
+    deleted_qca = await qca_collection.find_one_and_delete({"_id": PyObjectId(qca_id)}, projection={"question_id": 1, "course_id": 1})
+    invalidate_feedback_table("qca", PyObjectId(qca_id))
+    if deleted_qca is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="QCA not found.")
+    await apply_qca_deleted(deleted_qca["question_id"], deleted_qca["course_id"])
+    invalidate_survey_questions_for_courses([deleted_qca["course_id"]])
     return None
\ No newline at end of file
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pydantic import BaseModel, Field, ConfigDict, model_validator, ValidationInfo
 from typing import Optional, Annotated, List, Dict, Any
 from bson import ObjectId
+from datetime import datetime, UTC
 from enum import Enum
 
 from app.users.data_types import PyObjectId 
@@ -118,6 +119,8 @@ class QuestionUpdate(BaseModel):
 
 class QuestionInDB(QuestionBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    # QCAs linking this question to each course (by course id), maintained by the QCA and question write paths.
+    course_link_counts: Dict[str, int] = Field(default_factory=dict)
 
 class QuestionOut(QuestionBase): 
     id: str 
@@ -126,3 +129,32 @@ class QuestionOut(QuestionBase):
         populate_by_name=True,
         arbitrary_types_allowed=True
     )
+
+
+class RescoreJobStatusEnum(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class RescoreJobInDB(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    question_id: PyObjectId
+    created_by: PyObjectId
+    status: RescoreJobStatusEnum = RescoreJobStatusEnum.pending
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    total_answers: int = 0
+    processed_answers: int = 0
+    updated_answers: int = 0
+    affected_attempts: int = 0
+    processed_attempts: int = 0
+    error: Optional[str] = None
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+class RescoreJobOut(RescoreJobInDB):
+    id: str
+    question_id: str
+    created_by: str
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Query, Response
+from typing import List, Optional
 from bson import ObjectId
 
-from app.core.db import get_question_collection, get_qca_collection # MODIFIED: Added get_qca_collection
+from app.core.db import get_question_collection, get_qca_collection, get_rescore_job_collection # MODIFIED: Added get_qca_collection
+from app.core.pagination import CURSOR_QUERY_DESCRIPTION, keyset_query, set_next_cursor
+from app.core.fieldsets import FIELDS_QUERY_DESCRIPTION, fields_projection, fieldset_response, parse_fields
 from app.users.auth import require_teacher_role
-from app.users.data_types import UserInDB
-from .data_types import QuestionCreate, QuestionUpdate, QuestionOut, QuestionInDB, PyObjectId
+from app.users.data_types import SessionUser
+from .data_types import QuestionCreate, QuestionUpdate, QuestionOut, QuestionInDB, PyObjectId, RescoreJobInDB, RescoreJobOut
+from app.survey_attempts.scoring import invalidate_scoring_plan, refresh_scoring_plan
+from app.survey_attempts.thresholds import invalidate_feedback_table
+from app.surveys.question_cache import invalidate_survey_questions_for_question
+from app.surveys.max_scores import apply_question_deleted
+from app.survey_attempts.rescoring import run_rescore_job
 
 QuestionRouter = APIRouter()
 
@@ -14,7 +21,7 @@ QuestionRouter = APIRouter()
 @QuestionRouter.post("/", response_model=QuestionOut, status_code=status.HTTP_201_CREATED)
 async def create_question(
     question_in: QuestionCreate,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     question_collection = get_question_collection()
     
@@ -24,6 +31,7 @@ async def create_question(
     created_question_dict = await question_collection.find_one({"_id": result.inserted_id})
     if not created_question_dict:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create question.")
+    refresh_scoring_plan(created_question_dict)
     
     if "_id" in created_question_dict:
         created_question_dict["id"] = str(created_question_dict.pop("_id"))
@@ -34,7 +42,7 @@ async def create_question(
 # async def list_questions(
 #     skip: int = 0,
 #     limit: int = 100,
-#     teacher_user: UserInDB = Depends(require_teacher_role) 
+#     teacher_user: SessionUser = Depends(require_teacher_role) 
 # ):
 #     question_collection = get_question_collection()
 #     questions_cursor = question_collection.find().skip(skip).limit(limit)
@@ -49,14 +57,28 @@ async def create_question(
 
 @QuestionRouter.get("/", response_model=List[QuestionOut])
 async def list_questions(
+    response: Response,
     skip: int = 0,
     limit: int = 10, # Reduce limit for easier debugging
-    teacher_user: UserInDB = Depends(require_teacher_role) 
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    teacher_user: SessionUser = Depends(require_teacher_role) 
 ):
     question_collection = get_question_collection()
-    questions_cursor = question_collection.find().skip(skip).limit(limit)
+    field_names = parse_fields(fields, QuestionOut)
+    query, sort = keyset_query({}, "_id", 1, cursor)
+    questions_cursor = question_collection.find(query, fields_projection(field_names)).sort(sort).limit(limit)
+    if cursor is None:
+        questions_cursor = questions_cursor.skip(skip)
     questions_list_from_db = await questions_cursor.to_list(length=limit)
+    set_next_cursor(response, questions_list_from_db, limit, "_id")
     
+    if field_names is not None:
+        # Trimmed rows skip QuestionOut's cross-field checks, which need the full scoring rules.
+        for q_dict in questions_list_from_db:
+            q_dict["id"] = str(q_dict.pop("_id"))
+        return fieldset_response(response, QuestionOut, field_names, questions_list_from_db)
+
     print(f"DEBUG: Fetched {len(questions_list_from_db)} raw documents from DB.")
     
     processed_questions = []
@@ -87,7 +109,7 @@ async def list_questions(
 @QuestionRouter.get("/{question_id}", response_model=QuestionOut)
 async def get_question(
     question_id: str,
-    teacher_user: UserInDB = Depends(require_teacher_role) 
+    teacher_user: SessionUser = Depends(require_teacher_role) 
 ):
     if not ObjectId.is_valid(question_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid question ID format.")
@@ -105,7 +127,7 @@ async def get_question(
 async def update_question(
     question_id: str,
     question_update: QuestionUpdate,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(question_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid question ID format.")
@@ -127,11 +149,15 @@ async def update_question(
 
     if updated_result.matched_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found during update operation (unexpected).")
+    invalidate_scoring_plan(PyObjectId(question_id))
+    invalidate_feedback_table("question", PyObjectId(question_id))
+    invalidate_survey_questions_for_question(PyObjectId(question_id))
     
     final_question_dict = await question_collection.find_one({"_id": PyObjectId(question_id)})
     
     if not final_question_dict: 
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve question after update.")
+    refresh_scoring_plan(final_question_dict)
     
     if "_id" in final_question_dict: 
         final_question_dict["id"] = str(final_question_dict.pop("_id"))
@@ -141,7 +167,7 @@ async def update_question(
 @QuestionRouter.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question(
     question_id: str,
-    teacher_user: UserInDB = Depends(require_teacher_role)
+    teacher_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(question_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid question ID format.")
@@ -158,11 +184,65 @@ async def delete_question(
         # Potentially add more complex checks here if needed, e.g., if any of these QCAs are in submitted survey attempts.
         # For now, simple cascade to QCAs.
         await qca_collection.delete_many({"question_id": question_obj_id})
+        await apply_question_deleted([qca["course_id"] for qca in associated_qcas])
         # print(f"Deleted QCAs associated with question {question_id}")
 
     delete_result = await question_collection.delete_one({"_id": question_obj_id})
+    invalidate_scoring_plan(question_obj_id)
+    invalidate_feedback_table("question", question_obj_id)
+    invalidate_survey_questions_for_question(question_obj_id)
+    for qca in associated_qcas:
+        invalidate_feedback_table("qca", qca["_id"])
 
     if delete_result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found.")
     return None
-    
\ No newline at end of file
+
+
+def _prepare_rescore_job_dict_for_out(job_dict_from_db: dict) -> dict:
+    if "_id" in job_dict_from_db:
+        job_dict_from_db["id"] = str(job_dict_from_db.pop("_id"))
+    for field in ["question_id", "created_by"]:
+        if field in job_dict_from_db and isinstance(job_dict_from_db[field], ObjectId):
+            job_dict_from_db[field] = str(job_dict_from_db[field])
+    return job_dict_from_db
+
+@QuestionRouter.post("/{question_id}/rescore", response_model=RescoreJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def rescore_question_answers(
+    question_id: str,
+    background_tasks: BackgroundTasks,
+    teacher_user: SessionUser = Depends(require_teacher_role)
+):
+    """
+    Starts a job that re-applies the question's current scoring rules to all submitted answers
+    and refreshes the affected attempts' scores, feedback and outcomes. Poll the job for progress.
+    """
+    if not ObjectId.is_valid(question_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid question ID format.")
+
+    question_collection = get_question_collection()
+    if not await question_collection.find_one({"_id": PyObjectId(question_id)}, {"_id": 1}):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found.")
+
+    job_collection = get_rescore_job_collection()
+    job_db_obj = RescoreJobInDB(question_id=PyObjectId(question_id), created_by=teacher_user.id)
+    job_doc = job_db_obj.model_dump(by_alias=True)
+    await job_collection.insert_one(job_doc)
+    background_tasks.add_task(run_rescore_job, job_db_obj.id)
+
+    return RescoreJobOut.model_validate(_prepare_rescore_job_dict_for_out(job_doc.copy()))
+
+@QuestionRouter.get("/rescore-jobs/{job_id}", response_model=RescoreJobOut)
+async def get_rescore_job(
+    job_id: str,
+    teacher_user: SessionUser = Depends(require_teacher_role)
+):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid job ID format.")
+
+    job_collection = get_rescore_job_collection()
+    job_dict = await job_collection.find_one({"_id": PyObjectId(job_id)})
+    if not job_dict:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rescore job not found.")
+    return RescoreJobOut.model_validate(_prepare_rescore_job_dict_for_out(job_dict))
+
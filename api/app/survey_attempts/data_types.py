@@ -28,6 +28,8 @@ class StudentAnswerOut(StudentAnswerInDB):
 class SurveyAttemptBase(BaseModel):
     student_id: PyObjectId
     survey_id: PyObjectId
+    snapshot_version: Optional[int] = Field(None, description="Published survey version this attempt is answered and scored against.")
+    shuffle_seed: Optional[int] = Field(None, description="Seed of this attempt's question order, so resuming shows the same order.")
     is_submitted: bool = Field(False)
     started_at: datetime = Field(default_factory=lambda: datetime.now(UTC)) 
     submitted_at: Optional[datetime] = None
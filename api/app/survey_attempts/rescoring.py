@@ -0,0 +1,168 @@
+# api/app/survey_attempts/rescoring.py
+import asyncio
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.db import (
+    get_question_collection,
+    get_qca_collection,
+    get_survey_collection,
+    get_survey_attempt_collection,
+    get_student_answer_collection,
+    get_rescore_job_collection
+)
+from app.core.settings import RESCORE_ANSWER_CHUNK_SIZE, RESCORE_ATTEMPT_CHUNK_SIZE
+from app.questions.data_types import RescoreJobStatusEnum
+from app.users.data_types import PyObjectId
+from .scoring import compile_scoring_plan, invalidate_scoring_plan, score_answers_batch, ScoringPlan
+from app.surveys.snapshots import get_survey_snapshot
+from .router import build_submission_results, build_snapshot_submission_results
+
+_ANSWER_AGGREGATE_PROJECTION = {"survey_attempt_id": 1, "qca_id": 1, "question_id": 1, "score_achieved": 1}
+
+
+async def _fetch_missing_by_id(collection, ids: Set[PyObjectId], known: Dict[PyObjectId, Dict]) -> None:
+    missing = [doc_id for doc_id in ids if doc_id not in known]
+    if missing:
+        async for doc in collection.find({"_id": {"$in": missing}}):
+            known[doc["_id"]] = doc
+
+
+async def _rescore_answer_chunk(answer_collection, plan: ScoringPlan, chunk: List[Dict]) -> Tuple[int, Set[PyObjectId]]:
+    scores = score_answers_batch([plan] * len(chunk), [ans.get("answer_value") for ans in chunk])
+    ops = []
+    changed_attempt_ids: Set[PyObjectId] = set()
+    for ans, score in zip(chunk, scores):
+        if ans.get("score_achieved") == score:
+            continue
+        ops.append(UpdateOne({"_id": ans["_id"]}, {"$set": {"score_achieved": score}}))
+        changed_attempt_ids.add(ans["survey_attempt_id"])
+    if ops:
+        await answer_collection.bulk_write(ops, ordered=False)
+    return len(ops), changed_attempt_ids
+
+
+async def _recompute_attempt_aggregates(
+    attempt_ids: List[PyObjectId],
+    qca_by_id: Dict[PyObjectId, Dict],
+    question_by_id: Dict[PyObjectId, Dict],
+    survey_by_id: Dict[PyObjectId, Dict]
+) -> int:
+    attempt_collection = get_survey_attempt_collection()
+    answer_collection = get_student_answer_collection()
+
+    attempts = await attempt_collection.find({"_id": {"$in": attempt_ids}, "is_submitted": True}).to_list(length=None)
+    if not attempts:
+        return 0
+    answers_by_attempt: Dict[PyObjectId, List[Dict]] = {attempt["_id"]: [] for attempt in attempts}
+    async for ans in answer_collection.find({"survey_attempt_id": {"$in": list(answers_by_attempt)}}, _ANSWER_AGGREGATE_PROJECTION):
+        answers_by_attempt[ans["survey_attempt_id"]].append(ans)
+
+    await _fetch_missing_by_id(get_qca_collection(), {ans["qca_id"] for answers in answers_by_attempt.values() for ans in answers}, qca_by_id)
+    await _fetch_missing_by_id(get_question_collection(), {ans["question_id"] for answers in answers_by_attempt.values() for ans in answers}, question_by_id)
+    missing_survey_ids = list({
+        attempt["survey_id"] for attempt in attempts
+        if attempt.get("snapshot_version") is None and attempt["survey_id"] not in survey_by_id
+    })
+    if missing_survey_ids:
+        async for survey_doc in get_survey_collection().find({"_id": {"$in": missing_survey_ids}}):
+            survey_by_id[survey_doc["_id"]] = survey_doc
+
+    ops = []
+    for attempt in attempts:
+        # Attempts started on a published snapshot keep its QCAs, feedback and thresholds; only answer scores change.
+        snapshot = None
+        if attempt.get("snapshot_version") is not None:
+            snapshot = await get_survey_snapshot(attempt["survey_id"], attempt["snapshot_version"])
+        survey_doc = survey_by_id.get(attempt["survey_id"])
+        if snapshot is None and survey_doc is None:
+            continue
+        attempt_qcas = snapshot.qca_by_id if snapshot is not None else qca_by_id
+        attempt_questions = snapshot.question_by_id if snapshot is not None else question_by_id
+        scored_answers = []
+        for ans in sorted(answers_by_attempt[attempt["_id"]], key=lambda a: a["_id"]):
+            qca = attempt_qcas.get(ans["qca_id"])
+            if ans.get("score_achieved") is None or not qca or ans["question_id"] not in attempt_questions:
+                continue
+            scored_answers.append((ans, qca))
+        if snapshot is not None:
+            results = build_snapshot_submission_results(attempt, snapshot, scored_answers)
+        else:
+            results = build_submission_results(attempt, survey_doc, scored_answers, qca_by_id, question_by_id)
+        ops.append(UpdateOne({"_id": attempt["_id"]}, {"$set": results}))
+    if ops:
+        await attempt_collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def _rescore_question(job: Dict[str, Any]) -> None:
+    job_collection = get_rescore_job_collection()
+    answer_collection = get_student_answer_collection()
+    job_id = job["_id"]
+
+    question = await get_question_collection().find_one({"_id": job["question_id"]})
+    if not question:
+        raise ValueError("Question no longer exists.")
+    invalidate_scoring_plan(question["_id"])
+    plan = compile_scoring_plan(question)
+
+    # Only answers of submitted attempts carry a score; unsubmitted ones are scored on submit.
+    answer_filter = {"question_id": question["_id"], "score_achieved": {"$ne": None}}
+    total_answers = await answer_collection.count_documents(answer_filter)
+    await job_collection.update_one({"_id": job_id}, {"$set": {
+        "status": RescoreJobStatusEnum.running.value, "started_at": datetime.now(UTC), "total_answers": total_answers
+    }})
+
+    qca_by_id: Dict[PyObjectId, Dict] = {}
+    question_by_id: Dict[PyObjectId, Dict] = {question["_id"]: question}
+    survey_by_id: Dict[PyObjectId, Dict] = {}
+    progress = {"processed_answers": 0, "updated_answers": 0, "affected_attempts": 0, "processed_attempts": 0}
+
+    async def process_chunk(chunk: List[Dict]) -> None:
+        updated, changed_attempt_ids = await _rescore_answer_chunk(answer_collection, plan, chunk)
+        progress["processed_answers"] += len(chunk)
+        progress["updated_answers"] += updated
+        progress["affected_attempts"] += len(changed_attempt_ids)
+        attempt_ids = list(changed_attempt_ids)
+        for i in range(0, len(attempt_ids), RESCORE_ATTEMPT_CHUNK_SIZE):
+            progress["processed_attempts"] += await _recompute_attempt_aggregates(
+                attempt_ids[i:i + RESCORE_ATTEMPT_CHUNK_SIZE], qca_by_id, question_by_id, survey_by_id
+            )
+            # Scoring is synchronous CPU work; yield so in-flight requests are not starved.
+            await asyncio.sleep(0)
+        await job_collection.update_one({"_id": job_id}, {"$set": progress})
+
+    chunk: List[Dict] = []
+    answers_cursor = answer_collection.find(
+        answer_filter, {"answer_value": 1, "score_achieved": 1, "survey_attempt_id": 1}, batch_size=RESCORE_ANSWER_CHUNK_SIZE
+    )
+    async for ans in answers_cursor:
+        chunk.append(ans)
+        if len(chunk) >= RESCORE_ANSWER_CHUNK_SIZE:
+            await process_chunk(chunk)
+            chunk = []
+    if chunk:
+        await process_chunk(chunk)
+
+    await job_collection.update_one({"_id": job_id}, {"$set": {
+        **progress, "status": RescoreJobStatusEnum.completed.value, "finished_at": datetime.now(UTC)
+    }})
+
+
+async def run_rescore_job(job_id: PyObjectId) -> None:
+    """
+    Rescores every submitted answer to the job's question with its current scoring rules, then
+    recomputes the scores, feedback and outcomes of the attempts whose answers changed.
+    """
+    job_collection = get_rescore_job_collection()
+    job = await job_collection.find_one({"_id": job_id})
+    if not job:
+        return
+    try:
+        await _rescore_question(job)
+    except Exception as e:
+        await job_collection.update_one({"_id": job_id}, {"$set": {
+            "status": RescoreJobStatusEnum.failed.value, "error": str(e), "finished_at": datetime.now(UTC)
+        }})
@@ -1,35 +1,41 @@
 # api/app/survey_attempts/router.py
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional, Dict, Any, Tuple, Union 
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict, Any, Mapping, Tuple, Union 
 from bson import ObjectId
 from datetime import datetime, UTC 
+import asyncio
+import hashlib
+import random
+import secrets
+from pydantic import TypeAdapter
+from pymongo import ReplaceOne, UpdateOne
 from pymongo.errors import DuplicateKeyError
 
 from app.core.db import (
     get_survey_collection, 
     get_survey_attempt_collection, 
-    get_student_answer_collection,
-    get_question_collection,
-    get_qca_collection,
-    get_user_collection
+    get_student_answer_collection
 )
+from app.core.settings import ATTEMPT_STREAM_BATCH_SIZE
+from app.core.pagination import CURSOR_QUERY_DESCRIPTION, keyset_query, set_next_cursor
+from app.core.fieldsets import FIELDS_QUERY_DESCRIPTION, fields_projection, fieldset_response, parse_fields, trimmed_model
+from app.core.rate_limit import enforce_rate_limit
+from app.core.loaders import RequestLoaders, get_loaders
 from app.users.auth import get_current_active_user, require_teacher_role 
-from app.users.data_types import UserInDB, PyObjectId, RoleEnum
-from app.surveys.data_types import ( 
-    SurveyInDB, 
-    ScoreFeedbackItem as SurveyScoreFeedbackItem, 
-    OutcomeThresholdItem, 
-    OutcomeCategoryEnum  
-)
+from app.users.data_types import SessionUser, PyObjectId, RoleEnum
+from app.surveys.data_types import SurveyInDB, SurveyQuestionDetail, OutcomeCategoryEnum
 from app.surveys.router import _get_survey_question_details 
-from app.questions.data_types import ScoreFeedbackItem as QuestionScoreFeedbackItem, FeedbackComparisonEnum, AnswerTypeEnum 
+from app.surveys.snapshots import CompiledSurveySnapshot, get_published_survey_snapshot, get_snapshot_max_scores, get_survey_snapshot
+from app.questions.data_types import AnswerTypeEnum 
 from app.qca.data_types import AnswerAssociationTypeEnum
 from .data_types import (
     SurveyAttemptCreateRequest, SurveyAttemptStartOut, SurveyAttemptOut, 
     StudentAnswerPayload, StudentAnswerInDB, StudentAnswerOut,
     SubmitAnswersRequest, SurveyAttemptInDB, SurveyAttemptResultOut
 )
-from app.core.settings import STANDARD_QUESTION_MAX_SCORE 
+from .scoring import get_scoring_plan, score_answers_batch
+from .thresholds import CourseThresholdTables, IntervalTable, get_survey_threshold_tables, get_qca_feedback_table, get_question_feedback_table
 
 SurveyAttemptRouter = APIRouter()
 
@@ -42,6 +48,21 @@ def _prepare_student_answer_dict_for_out(answer_dict_from_db: dict) -> dict:
             answer_dict_from_db[field] = str(answer_dict_from_db[field])
     return answer_dict_from_db
 
+_ANSWER_OUT_PROJECTION = {
+    "qca_id": 1, "question_id": 1, "answer_value": 1, "survey_attempt_id": 1, "student_id": 1, "answered_at": 1, "score_achieved": 1
+}
+_STUDENT_ANSWER_LIST_ADAPTER = TypeAdapter(List[StudentAnswerOut])
+
+async def _load_answers_by_attempt(answer_collection_ref, attempt_ids: List[PyObjectId]) -> Dict[str, List[StudentAnswerOut]]:
+    """Answers for a page of attempts in one query, validated in one pass and keyed by attempt id."""
+    answers_by_attempt: Dict[str, List[StudentAnswerOut]] = {str(attempt_id): [] for attempt_id in attempt_ids}
+    if not attempt_ids:
+        return answers_by_attempt
+    answers_raw = await answer_collection_ref.find({"survey_attempt_id": {"$in": attempt_ids}}, _ANSWER_OUT_PROJECTION).to_list(length=None)
+    for answer in _STUDENT_ANSWER_LIST_ADAPTER.validate_python([_prepare_student_answer_dict_for_out(a) for a in answers_raw]):
+        answers_by_attempt[answer.survey_attempt_id].append(answer)
+    return answers_by_attempt
+
 def _prepare_survey_attempt_dict_for_out(attempt_dict_from_db: dict) -> dict: 
     if "_id" in attempt_dict_from_db:
         attempt_dict_from_db["id"] = str(attempt_dict_from_db.pop("_id"))
@@ -66,198 +87,204 @@ def _prepare_survey_attempt_dict_for_out(attempt_dict_from_db: dict) -> dict:
     return attempt_dict_from_db
 
 async def calculate_score_for_answer(question_dict: Dict, student_answer_value: Any) -> float:
-    q_type_str = question_dict.get("answer_type")
-    rules = question_dict.get("scoring_rules", {})
-    options = question_dict.get("answer_options", {})
-    raw_score = 0.0
-
-    if student_answer_value is None: 
-        raw_score = float(rules.get("score_if_unanswered", 0.0))
-        return max(0.0, min(raw_score, STANDARD_QUESTION_MAX_SCORE))
-
-    try:
-        q_type = AnswerTypeEnum(q_type_str)
-    except ValueError:
-        return 0.0
-
-    if q_type == AnswerTypeEnum.multiple_choice:
-        correct_key = rules.get("correct_option_key")
-        option_scores = rules.get("option_scores")
-        score_if_correct = rules.get("score_if_correct", STANDARD_QUESTION_MAX_SCORE)
-        score_if_incorrect = rules.get("score_if_incorrect", 0.0)
-
-        if option_scores and isinstance(option_scores, dict) and student_answer_value in option_scores:
-            raw_score = float(option_scores[student_answer_value])
-        elif correct_key is not None:
-            raw_score = float(score_if_correct) if correct_key == student_answer_value else float(score_if_incorrect)
-    
-    elif q_type == AnswerTypeEnum.multiple_select:
-        if not isinstance(student_answer_value, list): return 0.0
-        option_scores = rules.get("option_scores")
-        correct_option_keys = set(rules.get("correct_option_keys", []))
-        selected_keys = set(student_answer_value)
-        current_raw_score = 0.0
-        if option_scores and isinstance(option_scores, dict):
-            for sel_key in selected_keys:
-                if sel_key in option_scores:
-                    current_raw_score += float(option_scores[sel_key])
-        elif correct_option_keys:
-            num_correct_defined = len(correct_option_keys)
-            score_val = float(rules.get("score_per_correct", STANDARD_QUESTION_MAX_SCORE / num_correct_defined if num_correct_defined > 0 else 0.0))
-            penalty_val = float(rules.get("penalty_per_incorrect", 0.0))
-            for key in selected_keys:
-                if key in correct_option_keys: current_raw_score += score_val
-                elif key in options: current_raw_score += penalty_val 
-        raw_score = current_raw_score
-    
-    elif q_type == AnswerTypeEnum.input:
-        expected_answers = rules.get("expected_answers", [])
-        raw_score = float(rules.get("default_incorrect_score", 0.0))
-        if isinstance(student_answer_value, str):
-            for expected in expected_answers:
-                expected_text = expected.get("text", "")
-                case_sensitive = expected.get("case_sensitive", False)
-                match_score = float(expected.get("score", 0.0))
-                is_match = (student_answer_value == expected_text) if case_sensitive else (student_answer_value.lower() == expected_text.lower())
-                if is_match:
-                    raw_score = match_score; break 
-    
-    elif q_type == AnswerTypeEnum.range:
-        try:
-            val = float(student_answer_value)
-            min_opt_val = float(options.get("min", 0)); max_opt_val = float(options.get("max", 10))
-            target_val = float(rules.get("target_value", (min_opt_val + max_opt_val) / 2 ))
-            score_at_target = float(rules.get("score_at_target", STANDARD_QUESTION_MAX_SCORE)) 
-            score_per_dev_unit = float(rules.get("score_per_deviation_unit", -1.0))
-            deviation = abs(val - target_val)
-            raw_score = score_at_target + (deviation * score_per_dev_unit)
-        except (ValueError, TypeError): raw_score = 0.0
-            
-    final_score = max(0.0, min(raw_score, STANDARD_QUESTION_MAX_SCORE))
-    return round(final_score, 2)
-
-def _evaluate_feedback_rules(
-    score: float, 
-    feedback_rules_input: Optional[List[Any]] 
-) -> Optional[str]:
-    if not feedback_rules_input: return None
-    feedback_rules_validated: List[Union[QuestionScoreFeedbackItem, SurveyScoreFeedbackItem]] = []
-    for rule_input_untyped in feedback_rules_input:
-        rule_input: Any = rule_input_untyped 
-        if isinstance(rule_input, (QuestionScoreFeedbackItem, SurveyScoreFeedbackItem)):
-            feedback_rules_validated.append(rule_input)
-        elif isinstance(rule_input, dict):
-            try: 
-                feedback_rules_validated.append(QuestionScoreFeedbackItem.model_validate(rule_input))
-            except Exception:
-                try: 
-                    feedback_rules_validated.append(SurveyScoreFeedbackItem.model_validate(rule_input))
-                except Exception: continue
-        else: continue
-            
-    for rule in feedback_rules_validated: 
-        match = False
-        rule_score_value = float(rule.score_value)
-        if rule.comparison == FeedbackComparisonEnum.lt: match = score < rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.lte: match = score <= rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.gt: match = score > rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.gte: match = score >= rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.eq: match = score == rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.neq: match = score != rule_score_value
-        if match: return rule.feedback
-    return None
-
-def _evaluate_outcome_rules(
-    score: float,
-    outcome_rules_input: Optional[List[Any]] 
-) -> OutcomeCategoryEnum:
-    if not outcome_rules_input: return OutcomeCategoryEnum.UNDEFINED
-    outcome_rules_validated: List[OutcomeThresholdItem] = []
-    for rule_input_untyped in outcome_rules_input:
-        rule_input: Any = rule_input_untyped
-        if isinstance(rule_input, OutcomeThresholdItem):
-            outcome_rules_validated.append(rule_input)
-        elif isinstance(rule_input, dict):
-            try: outcome_rules_validated.append(OutcomeThresholdItem.model_validate(rule_input))
-            except Exception: continue
-        else: continue
-    outcome_rules_validated.sort(key=lambda r: (r.score_value, r.comparison.value))
-    for rule in outcome_rules_validated:
-        match = False
-        rule_score_value = float(rule.score_value)
-        if rule.comparison == FeedbackComparisonEnum.lt: match = score < rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.lte: match = score <= rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.gt: match = score > rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.gte: match = score >= rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.eq: match = score == rule_score_value
-        elif rule.comparison == FeedbackComparisonEnum.neq: match = score != rule_score_value
-        if match: return rule.outcome
-    return OutcomeCategoryEnum.UNDEFINED
-
-async def generate_all_feedback_and_outcomes_for_attempt(
-    attempt_dict: Dict, survey_obj: SurveyInDB, student_answers_list_with_scores: List[Dict],
-    qca_collection, question_collection
+    return get_scoring_plan(question_dict).score(student_answer_value)
+
+def generate_all_feedback_and_outcomes_for_attempt(
+    attempt_dict: Dict, course_ids: List[PyObjectId], threshold_tables: Dict[str, CourseThresholdTables],
+    student_answers_list_with_scores: List[Dict],
+    qca_by_id: Mapping[PyObjectId, Dict], question_by_id: Mapping[PyObjectId, Dict],
+    qca_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]],
+    question_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]]
 ) -> Tuple[Dict[str, str], Dict[str, List[str]], Optional[str], Dict[str, OutcomeCategoryEnum]]:
     course_scores = attempt_dict.get("course_scores", {}) 
     final_overall_course_feedback: Dict[str, str] = {} 
-    detailed_feedback_per_course: Dict[str, List[str]] = {str(cid_obj): [] for cid_obj in survey_obj.course_ids}
+    detailed_feedback_per_course: Dict[str, List[str]] = {str(cid_obj): [] for cid_obj in course_ids}
     final_course_outcome_categories: Dict[str, OutcomeCategoryEnum] = {}
 
     for ans_with_score_dict in student_answers_list_with_scores:
-        qca = await qca_collection.find_one({"_id": ans_with_score_dict["qca_id"]})
-        question = await question_collection.find_one({"_id": ans_with_score_dict["question_id"]})
+        qca = qca_by_id.get(ans_with_score_dict["qca_id"])
+        question = question_by_id.get(ans_with_score_dict["question_id"])
         if not qca or not question: continue
         ans_score = ans_with_score_dict.get("score_achieved", 0.0)
         course_id_str = str(qca["course_id"]) 
         if course_id_str not in detailed_feedback_per_course: 
             detailed_feedback_per_course[course_id_str] = []
-        feedback_msg = _evaluate_feedback_rules(ans_score, qca.get("feedbacks_based_on_score")) or \
-                       _evaluate_feedback_rules(ans_score, question.get("default_feedbacks_on_score"))
+        qca_table = qca_feedback_tables.get(qca["_id"])
+        question_table = question_feedback_tables.get(question["_id"])
+        feedback_msg = (qca_table.lookup(ans_score) if qca_table else None) or \
+                       (question_table.lookup(ans_score) if question_table else None)
         if feedback_msg:
             detailed_feedback_per_course[course_id_str].append(f"Q: {question['title']}: {feedback_msg}")
 
-    for course_id_pyobj in survey_obj.course_ids:
+    no_thresholds = CourseThresholdTables()
+    for course_id_pyobj in course_ids:
         course_id_str = str(course_id_pyobj)
         total_score_for_course = course_scores.get(course_id_str, 0.0)
-        
-        course_feedback_rules_list = (survey_obj.course_skill_total_score_thresholds or {}).get(course_id_str)
-        if course_feedback_rules_list:
-            overall_fb_for_course = _evaluate_feedback_rules(total_score_for_course, course_feedback_rules_list)
-            if overall_fb_for_course:
-                final_overall_course_feedback[course_id_str] = overall_fb_for_course
+        course_tables = threshold_tables.get(course_id_str, no_thresholds)
+
+        overall_fb_for_course = course_tables.feedback_for(total_score_for_course)
+        if overall_fb_for_course:
+            final_overall_course_feedback[course_id_str] = overall_fb_for_course
         if course_id_str not in final_overall_course_feedback:
              final_overall_course_feedback[course_id_str] = "Please review your performance for this course section."
 
-        course_outcome_rules_list = (survey_obj.course_outcome_thresholds or {}).get(course_id_str)
-        category = _evaluate_outcome_rules(total_score_for_course, course_outcome_rules_list)
-        final_course_outcome_categories[course_id_str] = category
+        final_course_outcome_categories[course_id_str] = course_tables.outcome_for(total_score_for_course)
 
     overall_survey_feedback_str = "Thank you for completing the survey. Your results are summarized above." 
     return final_overall_course_feedback, detailed_feedback_per_course, overall_survey_feedback_str, final_course_outcome_categories
 
-async def _populate_attempt_response_data(attempt_dict: dict, survey_collection_ref, user_collection_ref, include_survey_details: bool = False) -> None:
-    survey_doc = await survey_collection_ref.find_one({"_id": attempt_dict["survey_id"]})
-    if survey_doc:
-        attempt_dict["max_scores_per_course"] = survey_doc.get("max_scores_per_course", {})
-        attempt_dict["max_overall_survey_score"] = survey_doc.get("max_overall_survey_score")
-        if include_survey_details:
-            attempt_dict["survey_title"] = survey_doc.get("title")
-            attempt_dict["survey_description"] = survey_doc.get("description")
-    else:
-        attempt_dict["max_scores_per_course"] = {}
-        attempt_dict["max_overall_survey_score"] = None
+def calculate_attempt_scores(
+    course_ids: List[PyObjectId], scored_answers: List[Tuple[Dict, Dict]]
+) -> Tuple[Dict[str, float], float]:
+    """
+    Aggregates already-scored answers into per-course totals and the overall survey score.
+
+    `scored_answers` holds (answer with score_achieved, its QCA) pairs in processing order.
+    """
+    course_scores: Dict[str, float] = {str(cid): 0.0 for cid in course_ids}
+    # For calculating actual_overall_survey_score based on unique questions
+    unique_question_scores_for_overall: Dict[PyObjectId, float] = {}
+    for ans, qca in scored_answers:
+        score = ans["score_achieved"]
+        # Accumulate course scores
+        course_id_str = str(qca["course_id"])
+        score_contrib = score * -1 if qca.get("answer_association_type") == AnswerAssociationTypeEnum.negative.value else score
+        if course_id_str in course_scores: course_scores[course_id_str] += score_contrib
+
+        # Store score for unique question ID for overall calculation
+        # If a question is somehow answered multiple times (e.g. bad data, or complex survey logic not yet implemented),
+        # this takes the latest processed score for that question.
+        unique_question_scores_for_overall[qca["question_id"]] = score # qca["question_id"] is PyObjectId
+    return course_scores, sum(unique_question_scores_for_overall.values())
+
+def _submission_results(
+    attempt_dict: Dict, course_ids: List[PyObjectId], threshold_tables: Dict[str, CourseThresholdTables],
+    scored_answers: List[Tuple[Dict, Dict]],
+    qca_by_id: Mapping[PyObjectId, Dict], question_by_id: Mapping[PyObjectId, Dict],
+    qca_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]],
+    question_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]]
+) -> Dict[str, Any]:
+    course_scores, actual_overall_survey_score = calculate_attempt_scores(course_ids, scored_answers)
+    attempt_for_feedback = attempt_dict.copy(); attempt_for_feedback["course_scores"] = course_scores
+    course_fb, detailed_fb, overall_fb, outcomes = generate_all_feedback_and_outcomes_for_attempt(
+        attempt_for_feedback, course_ids, threshold_tables, [ans for ans, _ in scored_answers],
+        qca_by_id, question_by_id, qca_feedback_tables, question_feedback_tables
+    )
+    return {
+        "course_scores": course_scores, 
+        "actual_overall_survey_score": actual_overall_survey_score,
+        "course_feedback": course_fb, 
+        "detailed_feedback": detailed_fb, 
+        "overall_survey_feedback": overall_fb, 
+        "course_outcome_categorization": outcomes
+    }
+
+def build_submission_results(
+    attempt_dict: Dict, survey_doc: Dict, scored_answers: List[Tuple[Dict, Dict]],
+    qca_by_id: Dict[PyObjectId, Dict], question_by_id: Dict[PyObjectId, Dict]
+) -> Dict[str, Any]:
+    """Computes the score, feedback and outcome fields stored on a submitted attempt from the live survey, QCAs and questions."""
+    return _submission_results(
+        attempt_dict, survey_doc.get("course_ids") or [], get_survey_threshold_tables(survey_doc), scored_answers,
+        qca_by_id, question_by_id,
+        {qca_id: get_qca_feedback_table(qca) for qca_id, qca in qca_by_id.items()},
+        {question_id: get_question_feedback_table(question) for question_id, question in question_by_id.items()}
+    )
+
+def build_snapshot_submission_results(
+    attempt_dict: Dict, snapshot: CompiledSurveySnapshot, scored_answers: List[Tuple[Dict, Dict]]
+) -> Dict[str, Any]:
+    """Same as build_submission_results, but everything comes from the survey version the attempt was started on."""
+    return _submission_results(
+        attempt_dict, snapshot.course_ids, snapshot.threshold_tables, scored_answers,
+        snapshot.qca_by_id, snapshot.question_by_id, snapshot.qca_feedback_tables, snapshot.question_feedback_tables
+    )
+
+def _questions_etag(attempt_dict: Dict) -> str:
+    fingerprint = "|".join(str(attempt_dict.get(field)) for field in (
+        "_id", "survey_id", "student_id", "started_at", "snapshot_version", "shuffle_seed"
+    ))
+    return '"' + hashlib.sha256(fingerprint.encode()).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in candidates)
+
+async def _get_attempt_snapshot(attempt_dict: Dict) -> Optional[CompiledSurveySnapshot]:
+    version = attempt_dict.get("snapshot_version")
+    if version is None:
+        return None
+    return await get_survey_snapshot(attempt_dict["survey_id"], version)
+
+async def _attempt_questions(
+    attempt_dict: Dict, survey_doc: Optional[Dict] = None, snapshot: Optional[CompiledSurveySnapshot] = None
+) -> Tuple[List[SurveyQuestionDetail], Optional[str]]:
+    """
+    The attempt's questions and, when their order is stable, an ETag for them. An attempt keeps the
+    questions of the version it was started on, even if the survey was republished since.
+    `survey_doc` is only read for attempts started before published surveys were snapshotted.
+    """
+    version = attempt_dict.get("snapshot_version")
+    if version is not None and (snapshot is None or snapshot.version != version):
+        snapshot = await get_survey_snapshot(attempt_dict["survey_id"], version)
+    if version is None or snapshot is None:
+        if survey_doc is None:
+            survey_doc = await get_survey_collection().find_one({"_id": attempt_dict["survey_id"]})
+            if not survey_doc: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found.")
+        return await _get_survey_question_details(SurveyInDB.model_validate(survey_doc)), None
+    questions = list(snapshot.questions)
+    shuffle_seed = attempt_dict.get("shuffle_seed")
+    if shuffle_seed is None:
+        random.shuffle(questions)
+        return questions, None
+    # Same attempt, same order: the questions only depend on the attempt and its snapshot version.
+    random.Random(shuffle_seed).shuffle(questions)
+    return questions, _questions_etag(attempt_dict)
+
+async def _populate_attempts_response_data(
+    attempt_dicts: List[dict], loaders: RequestLoaders, include_survey_details: bool = False
+) -> None:
+    """
+    Fills survey and student display fields for a page of attempts with at most one query per collection.
+    Max scores come from the survey version each attempt was scored against, or the live survey for
+    attempts started before versions existed.
+    """
+    survey_by_id, student_by_id, snapshot_max_scores = await asyncio.gather(
+        loaders.survey_summaries.load_many(a["survey_id"] for a in attempt_dicts),
+        loaders.users.load_many(a["student_id"] for a in attempt_dicts if "student_id" in a),
+        get_snapshot_max_scores(
+            (a["survey_id"], a["snapshot_version"]) for a in attempt_dicts if a.get("snapshot_version") is not None
+        ),
+    )
+    display_name_by_id = {student_id: student.get("display_name") for student_id, student in student_by_id.items()}
+
+    for attempt_dict in attempt_dicts:
+        survey_doc = survey_by_id.get(attempt_dict["survey_id"])
+        version_max_scores = snapshot_max_scores.get((attempt_dict["survey_id"], attempt_dict.get("snapshot_version")))
+        if version_max_scores is not None:
+            attempt_dict["max_scores_per_course"], attempt_dict["max_overall_survey_score"] = version_max_scores
+        elif survey_doc:
+            attempt_dict["max_scores_per_course"] = survey_doc.get("max_scores_per_course", {})
+            attempt_dict["max_overall_survey_score"] = survey_doc.get("max_overall_survey_score")
+        else:
+            attempt_dict["max_scores_per_course"] = {}
+            attempt_dict["max_overall_survey_score"] = None
         if include_survey_details:
-            attempt_dict["survey_title"] = "Unknown Survey"
-            attempt_dict["survey_description"] = None
-    
-    if "student_id" in attempt_dict:
-        student_doc = await user_collection_ref.find_one({"_id": attempt_dict["student_id"]})
-        attempt_dict["student_display_name"] = student_doc.get("display_name") if student_doc else "Unknown Student"
+            attempt_dict["survey_title"] = survey_doc.get("title") if survey_doc else "Unknown Survey"
+            attempt_dict["survey_description"] = survey_doc.get("description") if survey_doc else None
+
+        if "student_id" in attempt_dict:
+            attempt_dict["student_display_name"] = display_name_by_id.get(attempt_dict["student_id"], "Unknown Student")
+
+async def _populate_attempt_response_data(attempt_dict: dict, loaders: RequestLoaders, include_survey_details: bool = False) -> None:
+    await _populate_attempts_response_data([attempt_dict], loaders, include_survey_details)
 
 @SurveyAttemptRouter.post("/start", response_model=SurveyAttemptStartOut)
 async def start_survey_attempt(
     attempt_create: SurveyAttemptCreateRequest,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: SessionUser = Depends(get_current_active_user)
 ):
     survey_collection = get_survey_collection()
     attempt_collection = get_survey_attempt_collection()
@@ -265,23 +292,27 @@ async def start_survey_attempt(
     survey_doc = await survey_collection.find_one({"_id": attempt_create.survey_id, "is_published": True})
     if not survey_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Published survey not found or does not exist.")
-    survey = SurveyInDB.model_validate(survey_doc) 
+    survey_id = survey_doc["_id"]
 
     existing_attempt_doc = await attempt_collection.find_one({
         "student_id": current_user.id, 
-        "survey_id": survey.id, 
+        "survey_id": survey_id, 
         "is_submitted": False
     })
     
+    snapshot: Optional[CompiledSurveySnapshot] = None
     if existing_attempt_doc:
         created_attempt_doc = existing_attempt_doc
     else:
+        snapshot = await get_published_survey_snapshot(survey_doc)
         new_attempt_data_dict: Dict[str, Any] = {
             "student_id": current_user.id,
-            "survey_id": survey.id,
-            # Populate max scores from survey object at the start of the attempt
-            "max_scores_per_course": survey.max_scores_per_course,
-            "max_overall_survey_score": survey.max_overall_survey_score
+            "survey_id": survey_id,
+            "snapshot_version": snapshot.version,
+            "shuffle_seed": secrets.randbits(32),
+            # Populate max scores from the published version at the start of the attempt
+            "max_scores_per_course": snapshot.max_scores_per_course,
+            "max_overall_survey_score": snapshot.max_overall_survey_score
         }
         new_attempt_obj = SurveyAttemptInDB.model_validate(new_attempt_data_dict)
         try:
@@ -292,39 +323,67 @@ async def start_survey_attempt(
         except DuplicateKeyError: 
             existing_attempt_doc = await attempt_collection.find_one({
                 "student_id": current_user.id, 
-                "survey_id": survey.id, 
+                "survey_id": survey_id, 
                 "is_submitted": False
             })
             if not existing_attempt_doc:
                  raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Conflict creating attempt, and failed to retrieve existing one.")
             created_attempt_doc = existing_attempt_doc
-            
-    questions = await _get_survey_question_details(survey)
+
+    questions, _ = await _attempt_questions(created_attempt_doc, survey_doc, snapshot)
     return SurveyAttemptStartOut(
         attempt_id=str(created_attempt_doc["_id"]), 
-        survey_id=str(survey.id), 
+        survey_id=str(survey_id), 
         student_id=str(current_user.id), 
         started_at=created_attempt_doc["started_at"], 
         questions=questions
     )
 
+@SurveyAttemptRouter.get("/{attempt_id}/questions", response_model=List[SurveyQuestionDetail])
+async def get_survey_attempt_questions(
+    attempt_id: str, request: Request, response: Response, current_user: SessionUser = Depends(get_current_active_user)
+):
+    """The attempt's questions in its own order. Cacheable: sends an ETag and answers a matching If-None-Match with 304."""
+    if not ObjectId.is_valid(attempt_id): raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid attempt ID format.")
+    attempt = await get_survey_attempt_collection().find_one({"_id": PyObjectId(attempt_id), "student_id": current_user.id})
+    if not attempt: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey attempt not found or not yours.")
+
+    questions, etag = await _attempt_questions(attempt)
+    if etag is not None:
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        response.headers.update(cache_headers)
+    return questions
+
 @SurveyAttemptRouter.post("/{attempt_id}/answers", response_model=List[StudentAnswerOut])
 async def submit_answers_for_attempt(
-    attempt_id: str, answers_request: SubmitAnswersRequest, current_user: UserInDB = Depends(get_current_active_user)
+    attempt_id: str, answers_request: SubmitAnswersRequest, request: Request,
+    current_user: SessionUser = Depends(get_current_active_user), loaders: RequestLoaders = Depends(get_loaders)
 ):
+    await enforce_rate_limit("answers", request, user_key=str(current_user.id))
     if not ObjectId.is_valid(attempt_id): raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid attempt ID format.")
     attempt_collection = get_survey_attempt_collection()
     answer_collection = get_student_answer_collection()
-    qca_collection = get_qca_collection()
-    question_collection_ref = get_question_collection()
     attempt_obj_id = PyObjectId(attempt_id)
     attempt = await attempt_collection.find_one({"_id": attempt_obj_id, "student_id": current_user.id})
     if not attempt: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey attempt not found or not yours.")
     if attempt["is_submitted"]: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Survey already submitted, cannot change answers.")
-    processed_answers_out = []
-    for ans_payload in answers_request.answers:
-        qca = await qca_collection.find_one({"_id": ans_payload.qca_id})
-        question_from_db = await question_collection_ref.find_one({"_id": ans_payload.question_id})
+    payloads = answers_request.answers
+    snapshot = await _get_attempt_snapshot(attempt)
+    qca_by_id: Mapping[PyObjectId, Dict] = {}
+    question_by_id: Mapping[PyObjectId, Dict] = {}
+    if snapshot is not None:
+        qca_by_id, question_by_id = snapshot.qca_by_id, snapshot.question_by_id
+    elif payloads:
+        qca_by_id, question_by_id = await asyncio.gather(
+            loaders.qcas.load_many(p.qca_id for p in payloads), loaders.questions.load_many(p.question_id for p in payloads)
+        )
+
+    # Validate the whole page before writing anything.
+    for ans_payload in payloads:
+        qca = qca_by_id.get(ans_payload.qca_id)
+        question_from_db = question_by_id.get(ans_payload.question_id)
         if not qca or not question_from_db or qca["question_id"] != ans_payload.question_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid QCA/Question ID for payload: {ans_payload.qca_id}/{ans_payload.question_id}.")
         try:
@@ -345,75 +404,98 @@ async def submit_answers_for_attempt(
                     if min_v is not None and answer_val < min_v: raise ValueError(f"Value below min {min_v}.")
                     if max_v is not None and answer_val > max_v: raise ValueError(f"Value above max {max_v}.")
         except ValueError as ve: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Q '{question_from_db['title']}': {ve}")
-        
+    if not payloads:
+        return []
+
+    answer_id_by_qca: Dict[PyObjectId, PyObjectId] = {}
+    async for existing in answer_collection.find(
+        {"survey_attempt_id": attempt_obj_id, "student_id": current_user.id, "qca_id": {"$in": list({p.qca_id for p in payloads})}}, {"qca_id": 1}
+    ):
+        answer_id_by_qca[existing["qca_id"]] = existing["_id"]
+
+    # MongoDB keeps datetimes naive and at millisecond precision; respond with exactly what was stored.
+    now = datetime.now(UTC)
+    answered_at = now.replace(microsecond=now.microsecond // 1000 * 1000, tzinfo=None)
+    replace_ops: List[ReplaceOne] = []
+    stored_docs: List[Dict[str, Any]] = []
+    for ans_payload in payloads:
         db_data = ans_payload.model_dump()
-        db_data.update({"survey_attempt_id": attempt_obj_id, "student_id": current_user.id, "answered_at": datetime.now(UTC), "score_achieved": None})
-        await answer_collection.replace_one({"survey_attempt_id": attempt_obj_id, "qca_id": ans_payload.qca_id, "student_id": current_user.id}, db_data, upsert=True)
-        stored = await answer_collection.find_one({"survey_attempt_id": attempt_obj_id, "qca_id": ans_payload.qca_id, "student_id": current_user.id})
-        if stored: processed_answers_out.append(StudentAnswerOut.model_validate(_prepare_student_answer_dict_for_out(stored.copy())))
-    return processed_answers_out
+        db_data.update({"survey_attempt_id": attempt_obj_id, "student_id": current_user.id, "answered_at": answered_at, "score_achieved": None})
+        replace_ops.append(ReplaceOne({"survey_attempt_id": attempt_obj_id, "qca_id": ans_payload.qca_id, "student_id": current_user.id}, db_data, upsert=True))
+        stored_docs.append(db_data)
+    write_result = await answer_collection.bulk_write(replace_ops, ordered=True)
+    for op_index, upserted_id in write_result.upserted_ids.items():
+        answer_id_by_qca.setdefault(payloads[op_index].qca_id, upserted_id)
+    unresolved_qca_ids = [p.qca_id for p in payloads if p.qca_id not in answer_id_by_qca]
+    if unresolved_qca_ids:
+        # Only when a concurrent save inserted the same answer between our lookup and the write.
+        async for existing in answer_collection.find(
+            {"survey_attempt_id": attempt_obj_id, "student_id": current_user.id, "qca_id": {"$in": unresolved_qca_ids}}, {"qca_id": 1}
+        ):
+            answer_id_by_qca[existing["qca_id"]] = existing["_id"]
+    for doc in stored_docs:
+        doc["_id"] = answer_id_by_qca[doc["qca_id"]]
+    return [StudentAnswerOut.model_validate(_prepare_student_answer_dict_for_out(doc.copy())) for doc in stored_docs]
 
 @SurveyAttemptRouter.post("/{attempt_id}/submit", response_model=SurveyAttemptResultOut)
 async def submit_survey_attempt(
-    attempt_id: str, current_user: UserInDB = Depends(get_current_active_user)
+    attempt_id: str, current_user: SessionUser = Depends(get_current_active_user), loaders: RequestLoaders = Depends(get_loaders)
 ):
     if not ObjectId.is_valid(attempt_id): raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid attempt ID format.")
     attempt_collection = get_survey_attempt_collection(); answer_collection = get_student_answer_collection()
-    survey_collection_ref = get_survey_collection(); qca_collection = get_qca_collection()
-    question_collection = get_question_collection(); user_collection_ref = get_user_collection()
     attempt_obj_id = PyObjectId(attempt_id)
     attempt_dict = await attempt_collection.find_one({"_id": attempt_obj_id, "student_id": current_user.id})
     if not attempt_dict: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey attempt not found or not yours.")
     if attempt_dict["is_submitted"]: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Survey has already been submitted.")
-    survey_doc = await survey_collection_ref.find_one({"_id": attempt_dict["survey_id"]})
-    if not survey_doc: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated survey not found.")    
-    survey_obj = SurveyInDB.model_validate(survey_doc)
-    answers_cursor = answer_collection.find({"survey_attempt_id": attempt_obj_id})
-    answers_with_scores: List[Dict[str,Any]] = []
-    calculated_course_scores: Dict[str, float] = {str(cid): 0.0 for cid in survey_obj.course_ids}
-    
-    # For calculating actual_overall_survey_score based on unique questions
-    unique_question_scores_for_overall: Dict[PyObjectId, float] = {}
+    snapshot = await _get_attempt_snapshot(attempt_dict)
+    survey_doc = None
+    if snapshot is None:
+        survey_doc = await loaders.surveys.load(attempt_dict["survey_id"])
+        if not survey_doc: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated survey not found.")    
+        loaders.survey_summaries.prime(survey_doc)
+    stored_answers = await answer_collection.find({"survey_attempt_id": attempt_obj_id}).to_list(length=None)
+    qca_by_id: Mapping[PyObjectId, Dict] = {}
+    question_by_id: Mapping[PyObjectId, Dict] = {}
+    if snapshot is not None:
+        qca_by_id, question_by_id = snapshot.qca_by_id, snapshot.question_by_id
+    else:
+        # Every QCA and question the attempt touches is fetched once and reused for scoring and feedback.
+        qca_by_id = await loaders.qcas.load_many(ans["qca_id"] for ans in stored_answers)
+        question_by_id = await loaders.questions.load_many(qca["question_id"] for qca in qca_by_id.values())
 
-    async for ans_raw in answers_cursor:
-        ans = ans_raw.copy()
-        qca = await qca_collection.find_one({"_id": ans["qca_id"]})
-        q_doc = await question_collection.find_one({"_id": qca["question_id"]}) if qca else None
+    scorable_answers: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = []
+    for ans_raw in stored_answers:
+        qca = qca_by_id.get(ans_raw["qca_id"])
+        q_doc = question_by_id.get(qca["question_id"]) if qca else None
         if not qca or not q_doc: continue
-        score = await calculate_score_for_answer(q_doc, ans["answer_value"])
-        await answer_collection.update_one({"_id": ans["_id"]}, {"$set": {"score_achieved": score}})
-        ans["score_achieved"] = score; answers_with_scores.append(ans)
-        
-        # Accumulate course scores
-        course_id_str = str(qca["course_id"])
-        score_contrib = score * -1 if qca.get("answer_association_type") == AnswerAssociationTypeEnum.negative.value else score
-        if course_id_str in calculated_course_scores: calculated_course_scores[course_id_str] += score_contrib
+        scorable_answers.append((ans_raw.copy(), qca, q_doc))
 
-        # Store score for unique question ID for overall calculation
-        # If a question is somehow answered multiple times (e.g. bad data, or complex survey logic not yet implemented),
-        # this takes the latest processed score for that question.
-        unique_question_scores_for_overall[qca["question_id"]] = score # qca["question_id"] is PyObjectId
+    scores = score_answers_batch(
+        [snapshot.plans[q_doc["_id"]] if snapshot is not None else get_scoring_plan(q_doc) for _, _, q_doc in scorable_answers],
+        [ans["answer_value"] for ans, _, _ in scorable_answers]
+    )
+
+    answers_with_scores: List[Dict[str, Any]] = []
+    scored_answers: List[Tuple[Dict, Dict]] = []
+    score_updates: List[UpdateOne] = []
+    for (ans, qca, _), score in zip(scorable_answers, scores):
+        score_updates.append(UpdateOne({"_id": ans["_id"]}, {"$set": {"score_achieved": score}}))
+        ans["score_achieved"] = score; answers_with_scores.append(ans)
+        scored_answers.append((ans, qca))
+    if score_updates:
+        await answer_collection.bulk_write(score_updates, ordered=False)
 
-    actual_overall_survey_score = sum(unique_question_scores_for_overall.values())
-    
-    attempt_for_feedback = attempt_dict.copy(); attempt_for_feedback["course_scores"] = calculated_course_scores
-    course_fb, detailed_fb, overall_fb, outcomes = await generate_all_feedback_and_outcomes_for_attempt(attempt_for_feedback, survey_obj, answers_with_scores, qca_collection, question_collection)
-    
     update_payload = {
         "is_submitted": True, 
         "submitted_at": datetime.now(UTC), 
-        "course_scores": calculated_course_scores, 
-        "actual_overall_survey_score": actual_overall_survey_score, # ADDED
-        "course_feedback": course_fb, 
-        "detailed_feedback": detailed_fb, 
-        "overall_survey_feedback": overall_fb, 
-        "course_outcome_categorization": outcomes
+        **(build_snapshot_submission_results(attempt_dict, snapshot, scored_answers) if snapshot is not None
+           else build_submission_results(attempt_dict, survey_doc, scored_answers, qca_by_id, question_by_id))
     }
     await attempt_collection.update_one({"_id": attempt_obj_id}, {"$set": update_payload})
     updated_attempt = await attempt_collection.find_one({"_id": attempt_obj_id})
     if not updated_attempt: raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve attempt post-submission.")
     
-    await _populate_attempt_response_data(updated_attempt, survey_collection_ref, user_collection_ref, include_survey_details=True) 
+    await _populate_attempt_response_data(updated_attempt, loaders, include_survey_details=True) 
     
     result_out = SurveyAttemptResultOut.model_validate(_prepare_survey_attempt_dict_for_out(updated_attempt.copy()))
     result_out.answers = [StudentAnswerOut.model_validate(_prepare_student_answer_dict_for_out(a.copy())) for a in answers_with_scores]
@@ -421,23 +503,22 @@ async def submit_survey_attempt(
 
 @SurveyAttemptRouter.get("/{attempt_id}/results", response_model=SurveyAttemptResultOut)
 async def get_survey_attempt_results(
-    attempt_id: str, current_user: UserInDB = Depends(get_current_active_user)
+    attempt_id: str, current_user: SessionUser = Depends(get_current_active_user), loaders: RequestLoaders = Depends(get_loaders)
 ):
     if not ObjectId.is_valid(attempt_id): raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid attempt ID format.")
     attempt_collection = get_survey_attempt_collection(); answer_collection = get_student_answer_collection()
-    survey_collection_ref = get_survey_collection(); user_collection_ref = get_user_collection() 
     attempt_dict_raw = await attempt_collection.find_one({"_id": PyObjectId(attempt_id)})
     if not attempt_dict_raw: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey attempt not found.")
     attempt_dict = attempt_dict_raw.copy()
     is_owner = attempt_dict["student_id"] == current_user.id
     is_teacher_auth = False
     if current_user.role == RoleEnum.teacher:
-        survey_data = await survey_collection_ref.find_one({"_id": attempt_dict["survey_id"]}) 
+        survey_data = await loaders.survey_summaries.load(attempt_dict["survey_id"])
         if survey_data and survey_data["created_by"] == current_user.id: is_teacher_auth = True 
     if not (is_owner or is_teacher_auth): raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view these results.")
     if not attempt_dict["is_submitted"]: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Survey results are not yet available (not submitted).")
     
-    await _populate_attempt_response_data(attempt_dict, survey_collection_ref, user_collection_ref, include_survey_details=True) 
+    await _populate_attempt_response_data(attempt_dict, loaders, include_survey_details=True) 
     
     answers_list = await answer_collection.find({"survey_attempt_id": PyObjectId(attempt_id)}).to_list(length=None)
     
@@ -447,52 +528,110 @@ async def get_survey_attempt_results(
 
 @SurveyAttemptRouter.get("/my", response_model=List[SurveyAttemptOut])
 async def list_my_survey_attempts(
-    current_user: UserInDB = Depends(get_current_active_user), skip: int = 0, limit: int = 20, include_answers: bool = Query(False)
+    response: Response, current_user: SessionUser = Depends(get_current_active_user), skip: int = 0, limit: int = 20,
+    include_answers: bool = Query(False), cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION), loaders: RequestLoaders = Depends(get_loaders)
 ):
+    field_names = parse_fields(fields, SurveyAttemptOut)
     attempt_coll = get_survey_attempt_collection(); ans_coll = get_student_answer_collection()
-    survey_coll_ref = get_survey_collection(); user_coll_ref = get_user_collection()
-    attempts_cursor = attempt_coll.find({"student_id": current_user.id}).skip(skip).limit(limit).sort("started_at", -1)
+    query, sort = keyset_query({"student_id": current_user.id}, "started_at", -1, cursor)
+    projection = fields_projection(field_names, required=["survey_id", "student_id", "is_submitted", "started_at", "snapshot_version"])
+    attempts_cursor = attempt_coll.find(query, projection).sort(sort).limit(limit)
+    if cursor is None:
+        attempts_cursor = attempts_cursor.skip(skip)
     attempts_list_raw = await attempts_cursor.to_list(length=limit)
+    set_next_cursor(response, attempts_list_raw, limit, "started_at")
+    attempts_db = [attempt_raw.copy() for attempt_raw in attempts_list_raw]
+    await _populate_attempts_response_data(attempts_db, loaders, include_survey_details=True)
+    answers_by_attempt: Dict[str, List[StudentAnswerOut]] = {}
+    if include_answers:
+        answers_by_attempt = await _load_answers_by_attempt(ans_coll, [a["_id"] for a in attempts_db if a.get("is_submitted")])
     output_list = []
-    for attempt_raw in attempts_list_raw:
-        attempt_db = attempt_raw.copy()
-        await _populate_attempt_response_data(attempt_db, survey_coll_ref, user_coll_ref, include_survey_details=True)
-        attempt_out = SurveyAttemptOut.model_validate(_prepare_survey_attempt_dict_for_out(attempt_db))
-        
-        if include_answers and attempt_out.is_submitted:
-            answers_raw = await ans_coll.find({"survey_attempt_id": PyObjectId(attempt_out.id)}).to_list(length=None)
-            attempt_out.answers = [StudentAnswerOut.model_validate(_prepare_student_answer_dict_for_out(a.copy())) for a in answers_raw]
-        output_list.append(attempt_out)
+    for attempt_db in attempts_db:
+        if include_answers and attempt_db.get("is_submitted"):
+            attempt_db["answers"] = answers_by_attempt[str(attempt_db["_id"])]
+        attempt_dict = _prepare_survey_attempt_dict_for_out(attempt_db)
+        output_list.append(SurveyAttemptOut.model_validate(attempt_dict) if field_names is None else attempt_dict)
+    if field_names is not None:
+        return fieldset_response(response, SurveyAttemptOut, field_names, output_list)
     return output_list
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def _survey_attempt_rows(
+    attempts_raw: List[dict], survey_doc: dict, include_answers: bool, loaders: RequestLoaders, ans_coll
+) -> List[dict]:
+    attempts_db = [attempt_raw.copy() for attempt_raw in attempts_raw]
+    # The survey is already memoised by the loader, so only the students are looked up.
+    await _populate_attempts_response_data(attempts_db, loaders)
+    answers_by_attempt: Dict[str, List[StudentAnswerOut]] = {}
+    if include_answers:
+        answers_by_attempt = await _load_answers_by_attempt(ans_coll, [a["_id"] for a in attempts_db])
+    rows = []
+    for attempt_db in attempts_db:
+        attempt_db["survey_title"] = survey_doc.get("title")
+        attempt_db["survey_description"] = survey_doc.get("description")
+        if include_answers:
+            attempt_db["answers"] = answers_by_attempt[str(attempt_db["_id"])]
+        rows.append(_prepare_survey_attempt_dict_for_out(attempt_db))
+    return rows
+
+async def _stream_ndjson_rows(attempts_cursor, row_model, load_rows) -> AsyncIterator[bytes]:
+    """One JSON document per line, enriched and written a cursor batch at a time so memory stays flat."""
+    batch: List[dict] = []
+    async for attempt_raw in attempts_cursor:
+        batch.append(attempt_raw)
+        if len(batch) >= ATTEMPT_STREAM_BATCH_SIZE:
+            yield b"".join(row_model.model_validate(row).model_dump_json(by_alias=True).encode() + b"\n" for row in await load_rows(batch))
+            batch = []
+    if batch:
+        yield b"".join(row_model.model_validate(row).model_dump_json(by_alias=True).encode() + b"\n" for row in await load_rows(batch))
+
 @SurveyAttemptRouter.get("/by-survey/{survey_id}", response_model=List[SurveyAttemptOut])
 async def list_attempts_for_survey(
-    survey_id: str, current_user: UserInDB = Depends(require_teacher_role), skip: int = 0, limit: int = 50, include_answers: bool = Query(False)
+    survey_id: str, request: Request, response: Response, current_user: SessionUser = Depends(require_teacher_role), skip: int = 0, limit: int = 50,
+    include_answers: bool = Query(False), cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION), loaders: RequestLoaders = Depends(get_loaders)
 ):
+    """
+    Submitted attempts of the survey, newest first. With `Accept: application/x-ndjson` the attempts are
+    streamed one per line instead, and `limit` only applies when given explicitly.
+    """
     if not ObjectId.is_valid(survey_id): raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid survey ID.")
-    survey_coll = get_survey_collection(); attempt_coll = get_survey_attempt_collection()
-    ans_coll = get_student_answer_collection(); user_coll_ref = get_user_collection()
+    field_names = parse_fields(fields, SurveyAttemptOut)
+    attempt_coll = get_survey_attempt_collection(); ans_coll = get_student_answer_collection()
     survey_obj_id = PyObjectId(survey_id)
-    survey_doc_ref = await survey_coll.find_one({"_id": survey_obj_id}) 
+    survey_doc_ref = await loaders.survey_summaries.load(survey_obj_id)
     if not survey_doc_ref: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found.")
     if survey_doc_ref["created_by"] != current_user.id: raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized.")
-    
-    survey_title_for_attempts = survey_doc_ref.get("title") 
-    survey_description_for_attempts = survey_doc_ref.get("description")
 
-    attempts_cursor = attempt_coll.find({"survey_id": survey_obj_id, "is_submitted": True}).skip(skip).limit(limit).sort("submitted_at", -1)
+    query, sort = keyset_query({"survey_id": survey_obj_id, "is_submitted": True}, "submitted_at", -1, cursor)
+    projection = fields_projection(field_names, required=["survey_id", "student_id", "submitted_at", "snapshot_version"])
+
+    async def load_rows(attempts_raw: List[dict]) -> List[dict]:
+        return await _survey_attempt_rows(attempts_raw, survey_doc_ref, include_answers, loaders, ans_coll)
+
+    async def load_stream_rows(attempts_raw: List[dict]) -> List[dict]:
+        # Fresh loaders per batch, so the stream does not hold on to every student it has written
+        batch_loaders = RequestLoaders()
+        batch_loaders.survey_summaries.prime(survey_doc_ref)
+        return await _survey_attempt_rows(attempts_raw, survey_doc_ref, include_answers, batch_loaders, ans_coll)
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        attempts_cursor = attempt_coll.find(query, projection, batch_size=ATTEMPT_STREAM_BATCH_SIZE).sort(sort)
+        if cursor is None:
+            attempts_cursor = attempts_cursor.skip(skip)
+        if "limit" in request.query_params:
+            attempts_cursor = attempts_cursor.limit(limit)
+        row_model = SurveyAttemptOut if field_names is None else trimmed_model(SurveyAttemptOut, field_names)
+        return StreamingResponse(_stream_ndjson_rows(attempts_cursor, row_model, load_stream_rows), media_type=NDJSON_MEDIA_TYPE)
+
+    attempts_cursor = attempt_coll.find(query, projection).sort(sort).limit(limit)
+    if cursor is None:
+        attempts_cursor = attempts_cursor.skip(skip)
     attempts_list_raw = await attempts_cursor.to_list(length=limit)
-    output_list = []
-    for attempt_raw in attempts_list_raw:
-        attempt_db = attempt_raw.copy()
-        await _populate_attempt_response_data(attempt_db, survey_coll, user_coll_ref) 
-        attempt_db["survey_title"] = survey_title_for_attempts 
-        attempt_db["survey_description"] = survey_description_for_attempts
-        
-        attempt_out = SurveyAttemptOut.model_validate(_prepare_survey_attempt_dict_for_out(attempt_db))
-        
-        if include_answers:
-            answers_raw = await ans_coll.find({"survey_attempt_id": PyObjectId(attempt_out.id)}).to_list(length=None)
-            attempt_out.answers = [StudentAnswerOut.model_validate(_prepare_student_answer_dict_for_out(a.copy())) for a in answers_raw]
-        output_list.append(attempt_out)
-    return output_list
\ No newline at end of file
+    set_next_cursor(response, attempts_list_raw, limit, "submitted_at")
+    rows = await load_rows(attempts_list_raw)
+    if field_names is not None:
+        return fieldset_response(response, SurveyAttemptOut, field_names, rows)
+    return [SurveyAttemptOut.model_validate(row) for row in rows]
\ No newline at end of file
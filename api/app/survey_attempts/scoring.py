@@ -0,0 +1,314 @@
+# api/app/survey_attempts/scoring.py
+import unicodedata
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.settings import SCORING_PLAN_CACHE_TTL_SECONDS, STANDARD_QUESTION_MAX_SCORE
+from app.questions.data_types import AnswerTypeEnum
+
+# Compiled plans keyed by question _id. Invalidated by the question write paths of this worker, and
+# expired after SCORING_PLAN_CACHE_TTL_SECONDS so edits made through other workers are picked up.
+SCORING_PLAN_CACHE = LRUCache("scoring_plans", maxsize=4096, ttl=SCORING_PLAN_CACHE_TTL_SECONDS)
+
+_EMPTY_SCORES: Mapping[str, float] = MappingProxyType({})
+
+
+def _clamp(raw_score: float) -> float:
+    return max(0.0, min(raw_score, STANDARD_QUESTION_MAX_SCORE))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class ScoringPlan:
+    """
+    Immutable, pre-parsed scoring rules for a single question.
+
+    The base plan is used for unknown answer types: any given answer scores 0.0.
+    """
+    answer_type: Optional[AnswerTypeEnum]
+    unanswered_score: float
+
+    def score(self, student_answer_value: Any) -> float:
+        if student_answer_value is None:
+            return self.unanswered_score
+        return round(_clamp(self.raw_score(student_answer_value)), 2)
+
+    def raw_score(self, student_answer_value: Any) -> float:
+        return 0.0
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class MultipleChoicePlan(ScoringPlan):
+    option_scores: Mapping[str, float]
+    correct_key: Optional[str]
+    score_if_correct: float
+    score_if_incorrect: float
+
+    def raw_score(self, student_answer_value: Any) -> float:
+        if self.option_scores and student_answer_value in self.option_scores:
+            return self.option_scores[student_answer_value]
+        if self.correct_key is not None:
+            return self.score_if_correct if self.correct_key == student_answer_value else self.score_if_incorrect
+        return 0.0
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class MultipleSelectPlan(ScoringPlan):
+    option_scores: Mapping[str, float]
+    correct_keys: FrozenSet[str]
+    option_keys: FrozenSet[str]
+    score_per_correct: float
+    penalty_per_incorrect: float
+
+    def raw_score(self, student_answer_value: Any) -> float:
+        if not isinstance(student_answer_value, list):
+            return 0.0
+        selected_keys = set(student_answer_value)
+        total = 0.0
+        if self.option_scores:
+            for key in selected_keys:
+                if key in self.option_scores:
+                    total += self.option_scores[key]
+        elif self.correct_keys:
+            for key in selected_keys:
+                if key in self.correct_keys: total += self.score_per_correct
+                elif key in self.option_keys: total += self.penalty_per_incorrect
+        return total
+
+
+def normalize_input_answer(text: str, case_sensitive: bool) -> str:
+    """Unicode NFKC with surrounding whitespace trimmed; case-insensitive keys are also casefolded."""
+    normalized = unicodedata.normalize("NFKC", text).strip()
+    if not case_sensitive:
+        normalized = unicodedata.normalize("NFKC", normalized.casefold())
+    return normalized
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class InputPlan(ScoringPlan):
+    # Normalised expected text -> (rule position, score). When an answer matches rules in both maps,
+    # the rule listed first on the question wins, as with the original ordered scan.
+    case_sensitive_answers: Mapping[str, Tuple[int, float]]
+    case_insensitive_answers: Mapping[str, Tuple[int, float]]
+    default_incorrect_score: float
+
+    def raw_score(self, student_answer_value: Any) -> float:
+        if not isinstance(student_answer_value, str):
+            return self.default_incorrect_score
+        best = None
+        if self.case_sensitive_answers:
+            best = self.case_sensitive_answers.get(normalize_input_answer(student_answer_value, True))
+        if self.case_insensitive_answers:
+            match = self.case_insensitive_answers.get(normalize_input_answer(student_answer_value, False))
+            if match is not None and (best is None or match[0] < best[0]):
+                best = match
+        return best[1] if best is not None else self.default_incorrect_score
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class RangePlan(ScoringPlan):
+    # None when the stored rules/options cannot be converted to numbers; every answer then scores 0.0.
+    target_value: Optional[float]
+    score_at_target: float
+    score_per_deviation_unit: float
+
+    def raw_score(self, student_answer_value: Any) -> float:
+        if self.target_value is None:
+            return 0.0
+        try:
+            val = float(student_answer_value)
+        except (ValueError, TypeError):
+            return 0.0
+        deviation = abs(val - self.target_value)
+        return self.score_at_target + (deviation * self.score_per_deviation_unit)
+
+
+def _float_map(raw: Any) -> Mapping[str, float]:
+    if raw and isinstance(raw, dict):
+        return MappingProxyType({key: float(value) for key, value in raw.items()})
+    return _EMPTY_SCORES
+
+
+def compile_scoring_plan(question_dict: Dict) -> ScoringPlan:
+    rules = question_dict.get("scoring_rules") or {}
+    options = question_dict.get("answer_options") or {}
+    unanswered_score = _clamp(float(rules.get("score_if_unanswered", 0.0)))
+
+    try:
+        q_type = AnswerTypeEnum(question_dict.get("answer_type"))
+    except ValueError:
+        return ScoringPlan(answer_type=None, unanswered_score=unanswered_score)
+
+    if q_type == AnswerTypeEnum.multiple_choice:
+        correct_key = rules.get("correct_option_key")
+        return MultipleChoicePlan(
+            answer_type=q_type,
+            unanswered_score=unanswered_score,
+            option_scores=_float_map(rules.get("option_scores")),
+            correct_key=correct_key,
+            score_if_correct=float(rules.get("score_if_correct", STANDARD_QUESTION_MAX_SCORE)) if correct_key is not None else 0.0,
+            score_if_incorrect=float(rules.get("score_if_incorrect", 0.0)) if correct_key is not None else 0.0,
+        )
+
+    if q_type == AnswerTypeEnum.multiple_select:
+        correct_keys = frozenset(rules.get("correct_option_keys", []))
+        num_correct_defined = len(correct_keys)
+        score_per_correct = 0.0
+        penalty_per_incorrect = 0.0
+        if correct_keys:
+            score_per_correct = float(rules.get("score_per_correct", STANDARD_QUESTION_MAX_SCORE / num_correct_defined))
+            penalty_per_incorrect = float(rules.get("penalty_per_incorrect", 0.0))
+        return MultipleSelectPlan(
+            answer_type=q_type,
+            unanswered_score=unanswered_score,
+            option_scores=_float_map(rules.get("option_scores")),
+            correct_keys=correct_keys,
+            option_keys=frozenset(options),
+            score_per_correct=score_per_correct,
+            penalty_per_incorrect=penalty_per_incorrect,
+        )
+
+    if q_type == AnswerTypeEnum.input:
+        case_sensitive_answers: Dict[str, Tuple[int, float]] = {}
+        case_insensitive_answers: Dict[str, Tuple[int, float]] = {}
+        for position, expected in enumerate(rules.get("expected_answers") or []):
+            case_sensitive = bool(expected.get("case_sensitive", False))
+            target = case_sensitive_answers if case_sensitive else case_insensitive_answers
+            # setdefault keeps the earliest rule for duplicate spellings.
+            target.setdefault(
+                normalize_input_answer(expected.get("text", ""), case_sensitive),
+                (position, float(expected.get("score", 0.0)))
+            )
+        return InputPlan(
+            answer_type=q_type,
+            unanswered_score=unanswered_score,
+            case_sensitive_answers=MappingProxyType(case_sensitive_answers),
+            case_insensitive_answers=MappingProxyType(case_insensitive_answers),
+            default_incorrect_score=float(rules.get("default_incorrect_score", 0.0)),
+        )
+
+    # AnswerTypeEnum.range
+    try:
+        min_opt_val = float(options.get("min", 0)); max_opt_val = float(options.get("max", 10))
+        target_value: Optional[float] = float(rules.get("target_value", (min_opt_val + max_opt_val) / 2))
+        score_at_target = float(rules.get("score_at_target", STANDARD_QUESTION_MAX_SCORE))
+        score_per_deviation_unit = float(rules.get("score_per_deviation_unit", -1.0))
+    except (ValueError, TypeError):
+        target_value, score_at_target, score_per_deviation_unit = None, 0.0, 0.0
+    return RangePlan(
+        answer_type=q_type,
+        unanswered_score=unanswered_score,
+        target_value=target_value,
+        score_at_target=score_at_target,
+        score_per_deviation_unit=score_per_deviation_unit,
+    )
+
+
+def get_scoring_plan(question_dict: Dict) -> ScoringPlan:
+    """Returns the compiled plan for a question document, cached by its _id when it has one."""
+    question_id = question_dict.get("_id")
+    if question_id is None:
+        return compile_scoring_plan(question_dict)
+    return SCORING_PLAN_CACHE.get_or_compute(question_id, lambda: compile_scoring_plan(question_dict))
+
+
+def invalidate_scoring_plan(question_id: Any) -> None:
+    SCORING_PLAN_CACHE.invalidate(question_id)
+
+
+def refresh_scoring_plan(question_dict: Dict) -> ScoringPlan:
+    """Compiles a freshly saved question so the first submit after a write does not pay for it."""
+    plan = compile_scoring_plan(question_dict)
+    SCORING_PLAN_CACHE.set(question_dict["_id"], plan)
+    return plan
+
+
+def _memo_key(plan: ScoringPlan, student_answer_value: Any) -> Optional[Any]:
+    """Hashable key under which an answer's score can be shared within a plan group, or None."""
+    if isinstance(plan, MultipleSelectPlan):
+        if not isinstance(student_answer_value, list):
+            return None
+        try:
+            key = tuple(student_answer_value)
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    if isinstance(student_answer_value, (str, int, float)):
+        # bool/int/float keys that compare equal (1, 1.0, True) must not share a score slot.
+        return (type(student_answer_value), student_answer_value)
+    return None
+
+
+def _score_range_batch(plans: Sequence[RangePlan], answer_values: Sequence[Any]) -> List[float]:
+    scores = [0.0] * len(plans)
+    valid_idx: List[int] = []
+    values: List[float] = []
+    for i, (plan, student_answer_value) in enumerate(zip(plans, answer_values)):
+        if plan.target_value is None:
+            continue
+        try:
+            values.append(float(student_answer_value))
+        except (ValueError, TypeError):
+            continue
+        valid_idx.append(i)
+    if not valid_idx:
+        return scores
+
+    vals = np.fromiter(values, dtype=np.float64, count=len(values))
+    targets = np.fromiter((plans[i].target_value for i in valid_idx), dtype=np.float64, count=len(valid_idx))
+    at_target = np.fromiter((plans[i].score_at_target for i in valid_idx), dtype=np.float64, count=len(valid_idx))
+    slopes = np.fromiter((plans[i].score_per_deviation_unit for i in valid_idx), dtype=np.float64, count=len(valid_idx))
+    with np.errstate(invalid="ignore", over="ignore"):
+        raw = at_target + (np.abs(vals - targets) * slopes)
+    # Match the scalar clamp: NaN collapses to 0.0 and -0.0 is normalised to 0.0.
+    raw = np.where(np.isnan(raw), 0.0, raw)
+    clamped = np.clip(raw, 0.0, STANDARD_QUESTION_MAX_SCORE) + 0.0
+    for i, value in zip(valid_idx, clamped.tolist()):
+        scores[i] = round(value, 2)
+    return scores
+
+
+def score_answers_batch(plans: Sequence[ScoringPlan], answer_values: Sequence[Any]) -> List[float]:
+    """
+    Scores many (plan, answer) pairs at once, returning the same values as ScoringPlan.score for each pair.
+
+    Range answers are scored together with NumPy; the other types are grouped per plan so every distinct
+    answer value is looked up once per question.
+    """
+    if len(plans) != len(answer_values):
+        raise ValueError("plans and answer_values must have the same length.")
+    scores = [0.0] * len(plans)
+    range_idx: List[int] = []
+    groups: Dict[int, List[int]] = {}
+
+    for i, (plan, student_answer_value) in enumerate(zip(plans, answer_values)):
+        if student_answer_value is None:
+            scores[i] = plan.unanswered_score
+        elif isinstance(plan, RangePlan):
+            range_idx.append(i)
+        else:
+            groups.setdefault(id(plan), []).append(i)
+
+    if range_idx:
+        range_scores = _score_range_batch([plans[i] for i in range_idx], [answer_values[i] for i in range_idx])  # type: ignore[misc]
+        for i, score in zip(range_idx, range_scores):
+            scores[i] = score
+
+    for indices in groups.values():
+        plan = plans[indices[0]]
+        memo: Dict[Any, float] = {}
+        for i in indices:
+            student_answer_value = answer_values[i]
+            key = _memo_key(plan, student_answer_value)
+            if key is None:
+                scores[i] = plan.score(student_answer_value)
+                continue
+            score = memo.get(key)
+            if score is None:
+                score = memo[key] = plan.score(student_answer_value)
+            scores[i] = score
+    return scores
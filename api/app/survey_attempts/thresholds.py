@@ -0,0 +1,184 @@
+# api/app/survey_attempts/thresholds.py
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.cache import LRUCache
+from app.core.settings import FEEDBACK_TABLE_CACHE_TTL_SECONDS
+from app.questions.data_types import ScoreFeedbackItem, FeedbackComparisonEnum
+from app.surveys.data_types import OutcomeThresholdItem, OutcomeCategoryEnum
+
+# Question default feedbacks and QCA feedbacks compiled into tables, keyed by ("question" | "qca", _id).
+# Invalidated by the question and QCA write paths of this worker, and expired so edits made through other
+# workers are picked up. Survey thresholds are stored on the survey document instead.
+FEEDBACK_TABLE_CACHE = LRUCache("feedback_tables", maxsize=8192, ttl=FEEDBACK_TABLE_CACHE_TTL_SECONDS)
+# Tables for surveys saved before thresholds were compiled on write, keyed by survey (_id, updated_at).
+LEGACY_SURVEY_TABLE_CACHE = LRUCache("legacy_survey_threshold_tables", maxsize=512, ttl=FEEDBACK_TABLE_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class IntervalTable:
+    """
+    Precomputed answers to "which rule matches this score first?".
+
+    The distinct rule thresholds split the real line into alternating open intervals and single points:
+    (-inf, b0), {b0}, (b0, b1), {b1}, ..., {bn}, (bn, inf). Every comparison is constant on each piece,
+    so the winning result per piece is computed once and a lookup is a single bisect.
+    """
+    bounds: Tuple[float, ...]
+    results: Tuple[Any, ...]
+    nan_result: Any = None
+
+    def lookup(self, score: float) -> Any:
+        if score != score:
+            return self.nan_result
+        i = bisect_left(self.bounds, score)
+        if i < len(self.bounds) and self.bounds[i] == score:
+            return self.results[2 * i + 1]
+        return self.results[2 * i]
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {"bounds": list(self.bounds), "results": list(self.results), "nan_result": self.nan_result}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "IntervalTable":
+        return cls(bounds=tuple(doc["bounds"]), results=tuple(doc["results"]), nan_result=doc.get("nan_result"))
+
+
+def _rule_matches_piece(comparison: FeedbackComparisonEnum, value: float, lo: float, hi: float, point: Optional[float]) -> bool:
+    if value != value:
+        # Every comparison against NaN is false except "not equal".
+        return comparison == FeedbackComparisonEnum.neq
+    if point is not None:
+        if comparison == FeedbackComparisonEnum.lt: return point < value
+        if comparison == FeedbackComparisonEnum.lte: return point <= value
+        if comparison == FeedbackComparisonEnum.gt: return point > value
+        if comparison == FeedbackComparisonEnum.gte: return point >= value
+        if comparison == FeedbackComparisonEnum.eq: return point == value
+        return point != value
+    # Open interval (lo, hi) containing no threshold: every threshold is <= lo or >= hi.
+    if comparison in (FeedbackComparisonEnum.lt, FeedbackComparisonEnum.lte): return value >= hi
+    if comparison in (FeedbackComparisonEnum.gt, FeedbackComparisonEnum.gte): return value <= lo
+    return comparison == FeedbackComparisonEnum.neq
+
+
+def build_interval_table(rules: Sequence[Tuple[float, FeedbackComparisonEnum, Any]], default: Any = None) -> IntervalTable:
+    """Compiles ordered (score_value, comparison, result) rules; the first matching rule wins."""
+    bounds = tuple(sorted({value for value, _, _ in rules if value == value}))
+
+    def first_match(lo: float, hi: float, point: Optional[float]) -> Any:
+        for value, comparison, result in rules:
+            if _rule_matches_piece(comparison, value, lo, hi, point):
+                return result
+        return default
+
+    results: List[Any] = []
+    lo = float("-inf")
+    for bound in bounds:
+        results.append(first_match(lo, bound, None))
+        results.append(first_match(bound, bound, bound))
+        lo = bound
+    results.append(first_match(lo, float("inf"), None))
+    nan_result = next((result for _, comparison, result in rules if comparison == FeedbackComparisonEnum.neq), default)
+    return IntervalTable(bounds=bounds, results=tuple(results), nan_result=nan_result)
+
+
+def _validated_items(rules_input: Optional[Sequence[Any]], model: Any) -> List[Any]:
+    items = []
+    for rule_input in rules_input or []:
+        if isinstance(rule_input, model):
+            items.append(rule_input)
+        elif isinstance(rule_input, dict):
+            try: items.append(model.model_validate(rule_input))
+            except Exception: continue
+    return items
+
+
+def compile_feedback_table(feedback_rules_input: Optional[Sequence[Any]]) -> Optional[IntervalTable]:
+    """Feedback rules (ScoreFeedbackItem or dicts) in their saved order; None when there are no rules."""
+    if not feedback_rules_input:
+        return None
+    items = _validated_items(feedback_rules_input, ScoreFeedbackItem)
+    return build_interval_table([(float(r.score_value), r.comparison, r.feedback) for r in items])
+
+
+def compile_outcome_table(outcome_rules_input: Optional[Sequence[Any]]) -> Optional[IntervalTable]:
+    """Outcome rules are evaluated sorted by (score_value, comparison); None when there are no rules."""
+    if not outcome_rules_input:
+        return None
+    items = _validated_items(outcome_rules_input, OutcomeThresholdItem)
+    items.sort(key=lambda r: (r.score_value, r.comparison.value))
+    return build_interval_table(
+        [(float(r.score_value), r.comparison, r.outcome.value) for r in items],
+        default=OutcomeCategoryEnum.UNDEFINED.value
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CourseThresholdTables:
+    feedback: Optional[IntervalTable] = None
+    outcome: Optional[IntervalTable] = None
+
+    def feedback_for(self, total_score: float) -> Optional[str]:
+        return self.feedback.lookup(total_score) if self.feedback else None
+
+    def outcome_for(self, total_score: float) -> OutcomeCategoryEnum:
+        return OutcomeCategoryEnum(self.outcome.lookup(total_score)) if self.outcome else OutcomeCategoryEnum.UNDEFINED
+
+
+def compile_survey_thresholds(
+    course_skill_total_score_thresholds: Optional[Dict[str, Sequence[Any]]],
+    course_outcome_thresholds: Optional[Dict[str, Sequence[Any]]]
+) -> Dict[str, Dict[str, Any]]:
+    """Storable form of a survey's per-course threshold tables, saved as `compiled_thresholds`."""
+    compiled: Dict[str, Dict[str, Any]] = {}
+    for course_id in set(course_skill_total_score_thresholds or {}) | set(course_outcome_thresholds or {}):
+        feedback_table = compile_feedback_table((course_skill_total_score_thresholds or {}).get(course_id))
+        outcome_table = compile_outcome_table((course_outcome_thresholds or {}).get(course_id))
+        compiled[str(course_id)] = {
+            "feedback": feedback_table.to_doc() if feedback_table else None,
+            "outcome": outcome_table.to_doc() if outcome_table else None,
+        }
+    return compiled
+
+
+def tables_from_compiled(compiled: Dict[str, Dict[str, Any]]) -> Dict[str, CourseThresholdTables]:
+    return {
+        course_id: CourseThresholdTables(
+            feedback=IntervalTable.from_doc(tables["feedback"]) if tables.get("feedback") else None,
+            outcome=IntervalTable.from_doc(tables["outcome"]) if tables.get("outcome") else None,
+        )
+        for course_id, tables in compiled.items()
+    }
+
+
+def get_survey_threshold_tables(survey_doc: Dict[str, Any]) -> Dict[str, CourseThresholdTables]:
+    """Per-course tables for a raw survey document, without re-validating its rule models."""
+    compiled = survey_doc.get("compiled_thresholds")
+    if compiled is not None:
+        return tables_from_compiled(compiled)
+    return LEGACY_SURVEY_TABLE_CACHE.get_or_compute(
+        (survey_doc.get("_id"), survey_doc.get("updated_at")),
+        lambda: tables_from_compiled(compile_survey_thresholds(
+            survey_doc.get("course_skill_total_score_thresholds"), survey_doc.get("course_outcome_thresholds")
+        ))
+    )
+
+
+def get_feedback_table(kind: str, doc: Dict[str, Any], field_name: str) -> Optional[IntervalTable]:
+    doc_id = doc.get("_id")
+    if doc_id is None:
+        return compile_feedback_table(doc.get(field_name))
+    return FEEDBACK_TABLE_CACHE.get_or_compute((kind, doc_id), lambda: compile_feedback_table(doc.get(field_name)))
+
+
+def get_question_feedback_table(question_doc: Dict[str, Any]) -> Optional[IntervalTable]:
+    return get_feedback_table("question", question_doc, "default_feedbacks_on_score")
+
+
+def get_qca_feedback_table(qca_doc: Dict[str, Any]) -> Optional[IntervalTable]:
+    return get_feedback_table("qca", qca_doc, "feedbacks_based_on_score")
+
+
+def invalidate_feedback_table(kind: str, doc_id: Any) -> None:
+    FEEDBACK_TABLE_CACHE.invalidate((kind, doc_id))
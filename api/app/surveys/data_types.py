@@ -124,4 +124,21 @@ class SurveyOut(SurveyBase): # Inherits all fields from SurveyBase
     model_config = ConfigDict(
         from_attributes=True, # was orm_mode
         populate_by_name=True
-    )
\ No newline at end of file
+    )
+class SurveySnapshotInDB(BaseModel):
+    """Frozen copy of everything needed to run and score a published survey version."""
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    survey_id: PyObjectId
+    version: int
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    title: str
+    description: Optional[str] = None
+    course_ids: List[PyObjectId] = Field(default_factory=list)
+    questions: List[SurveyQuestionDetail] = Field(default_factory=list, description="Questions as shown to students, one per question.")
+    qcas: List[Dict[str, Any]] = Field(default_factory=list, description="Every QCA of the survey's courses, with its compiled feedback table.")
+    question_docs: List[Dict[str, Any]] = Field(default_factory=list, description="Scoring rules and compiled default feedback table per question.")
+    compiled_thresholds: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    max_scores_per_course: Dict[str, float] = Field(default_factory=dict)
+    max_overall_survey_score: Optional[float] = None
+
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
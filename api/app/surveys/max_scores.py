@@ -0,0 +1,163 @@
+# api/app/surveys/max_scores.py
+"""
+Every course keeps `question_count`, its number of QCAs, and every question keeps `course_link_counts`,
+its number of QCAs per course. The QCA and question write paths adjust them together with the max
+scores of the surveys using the course, so surveys never rescan QCAs to get them.
+
+`python -m app.surveys.max_scores` recomputes all of them from the QCAs, for data written before the
+counters existed or left inconsistent by an interrupted write.
+"""
+import argparse
+import asyncio
+from typing import Dict, Iterable, List, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateMany, UpdateOne
+
+from app.core.db import (
+    close_mongo_connection, connect_to_mongo,
+    get_course_collection, get_qca_collection, get_question_collection, get_survey_collection,
+)
+from app.core.settings import STANDARD_QUESTION_MAX_SCORE
+from app.users.data_types import PyObjectId
+
+
+async def get_course_question_counts(course_ids: Iterable[PyObjectId]) -> Dict[PyObjectId, int]:
+    course_collection = get_course_collection()
+    ids = list(dict.fromkeys(course_ids))
+    counts: Dict[PyObjectId, int] = {}
+    uncounted: List[PyObjectId] = []
+    async for course in course_collection.find({"_id": {"$in": ids}}, {"question_count": 1}):
+        if "question_count" in course:
+            counts[course["_id"]] = course["question_count"]
+        else:
+            uncounted.append(course["_id"])
+    # Courses created before the counter existed are counted once and backfilled.
+    for course_id in uncounted:
+        count = await get_qca_collection().count_documents({"course_id": course_id})
+        await course_collection.update_one({"_id": course_id, "question_count": {"$exists": False}}, {"$set": {"question_count": count}})
+        counts[course_id] = count
+    return counts
+
+
+async def compute_survey_max_scores(course_ids: List[PyObjectId]) -> Tuple[Dict[str, float], float]:
+    """Max score per course and overall (each unique question counted once) for a survey's courses."""
+    if not course_ids:
+        return {}, 0.0
+    counts = await get_course_question_counts(course_ids)
+    max_scores_per_course = {str(cid): counts.get(cid, 0) * STANDARD_QUESTION_MAX_SCORE for cid in course_ids}
+    unique_course_ids = list(dict.fromkeys(course_ids))
+    if len(unique_course_ids) == 1:
+        return max_scores_per_course, max_scores_per_course[str(unique_course_ids[0])]
+    # A question linked to several of the survey's courses only counts once towards the overall score.
+    question_ids = await get_qca_collection().distinct("question_id", {"course_id": {"$in": unique_course_ids}})
+    return max_scores_per_course, float(len(question_ids) * STANDARD_QUESTION_MAX_SCORE)
+
+
+async def _other_linked_courses(question_id: PyObjectId, course_id: PyObjectId, delta: int) -> List[PyObjectId]:
+    """
+    Applies `delta` to the question's link count for `course_id` and returns the other courses it is
+    linked to, as of that same atomic update, so concurrent QCA writes for one question each see the
+    links the others left behind.
+    """
+    question = await get_question_collection().find_one_and_update(
+        {"_id": question_id, "course_link_counts": {"$exists": True}},
+        {"$inc": {f"course_link_counts.{course_id}": delta}},
+        projection={"course_link_counts": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if question is None:
+        # Questions saved before the counts existed, until the repair command has run
+        return await get_qca_collection().distinct("course_id", {"question_id": question_id, "course_id": {"$ne": course_id}})
+    return [ObjectId(other_id) for other_id, count in question["course_link_counts"].items() if count > 0 and other_id != str(course_id)]
+
+
+async def _apply_qca_change(question_id: PyObjectId, course_id: PyObjectId, delta: int) -> None:
+    await get_course_collection().update_one(
+        {"_id": course_id, "question_count": {"$exists": True}}, {"$inc": {"question_count": delta}}
+    )
+    # The question's other courses decide whether a survey's overall max changes: it only does when
+    # this association is the question's only link into that survey.
+    other_course_ids = await _other_linked_courses(question_id, course_id, delta)
+    score_delta = delta * STANDARD_QUESTION_MAX_SCORE
+    await get_survey_collection().bulk_write([
+        UpdateMany({"course_ids": course_id}, {"$inc": {f"max_scores_per_course.{course_id}": score_delta}}),
+        UpdateMany({"course_ids": {"$eq": course_id, "$nin": other_course_ids}}, {"$inc": {"max_overall_survey_score": score_delta}}),
+    ], ordered=False)
+
+
+async def apply_qca_created(question_id: PyObjectId, course_id: PyObjectId) -> None:
+    await _apply_qca_change(question_id, course_id, 1)
+
+
+async def apply_qca_deleted(question_id: PyObjectId, course_id: PyObjectId) -> None:
+    await _apply_qca_change(question_id, course_id, -1)
+
+
+async def apply_question_deleted(course_ids: List[PyObjectId]) -> None:
+    """After a question and all of its QCAs (one per course in `course_ids`) were deleted."""
+    if not course_ids:
+        return
+    await get_course_collection().update_many(
+        {"_id": {"$in": course_ids}, "question_count": {"$exists": True}}, {"$inc": {"question_count": -1}}
+    )
+    ops = [
+        UpdateMany({"course_ids": course_id}, {"$inc": {f"max_scores_per_course.{course_id}": -STANDARD_QUESTION_MAX_SCORE}})
+        for course_id in course_ids
+    ]
+    ops.append(UpdateMany({"course_ids": {"$in": course_ids}}, {"$inc": {"max_overall_survey_score": -STANDARD_QUESTION_MAX_SCORE}}))
+    await get_survey_collection().bulk_write(ops, ordered=False)
+
+
+async def repair_max_scores() -> Dict[str, int]:
+    """Recomputes every course's question count, question's link counts and survey's max scores from the QCAs."""
+    course_counts: Dict[PyObjectId, int] = {}
+    link_counts: Dict[PyObjectId, Dict[str, int]] = {}
+    pairs = await get_qca_collection().aggregate([
+        {"$group": {"_id": {"question_id": "$question_id", "course_id": "$course_id"}, "count": {"$sum": 1}}}
+    ])
+    async for pair in pairs:
+        question_id, course_id = pair["_id"]["question_id"], pair["_id"]["course_id"]
+        course_counts[course_id] = course_counts.get(course_id, 0) + pair["count"]
+        link_counts.setdefault(question_id, {})[str(course_id)] = pair["count"]
+
+    repaired = {"courses": 0, "questions": 0, "surveys": 0}
+    course_ops = [
+        UpdateOne({"_id": course["_id"]}, {"$set": {"question_count": course_counts.get(course["_id"], 0)}})
+        async for course in get_course_collection().find({}, {"question_count": 1})
+        if course.get("question_count") != course_counts.get(course["_id"], 0)
+    ]
+    if course_ops:
+        repaired["courses"] = (await get_course_collection().bulk_write(course_ops, ordered=False)).modified_count
+    question_ops = [
+        UpdateOne({"_id": question["_id"]}, {"$set": {"course_link_counts": link_counts.get(question["_id"], {})}})
+        async for question in get_question_collection().find({}, {"course_link_counts": 1})
+        if question.get("course_link_counts") != link_counts.get(question["_id"], {})
+    ]
+    if question_ops:
+        repaired["questions"] = (await get_question_collection().bulk_write(question_ops, ordered=False)).modified_count
+
+    survey_ops = []
+    async for survey in get_survey_collection().find({}, {"course_ids": 1, "max_scores_per_course": 1, "max_overall_survey_score": 1}):
+        max_scores_per_course, max_overall_survey_score = await compute_survey_max_scores(survey.get("course_ids") or [])
+        if survey.get("max_scores_per_course") != max_scores_per_course or survey.get("max_overall_survey_score") != max_overall_survey_score:
+            survey_ops.append(UpdateOne({"_id": survey["_id"]}, {"$set": {
+                "max_scores_per_course": max_scores_per_course, "max_overall_survey_score": max_overall_survey_score
+            }}))
+    if survey_ops:
+        repaired["surveys"] = (await get_survey_collection().bulk_write(survey_ops, ordered=False)).modified_count
+    return repaired
+
+
+async def _main() -> None:
+    await connect_to_mongo()
+    try:
+        repaired = await repair_max_scores()
+    finally:
+        await close_mongo_connection()
+    print(", ".join(f"{kind} repaired: {count}" for kind, count in repaired.items()))
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Recompute question counts and survey max scores from the QCAs.").parse_args()
+    asyncio.run(_main())
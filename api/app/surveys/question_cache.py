@@ -0,0 +1,33 @@
+# api/app/surveys/question_cache.py
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Tuple
+
+from app.core.cache import LRUCache
+from app.core.settings import SURVEY_QUESTION_CACHE_SIZE, SURVEY_QUESTION_CACHE_TTL_SECONDS
+from app.users.data_types import PyObjectId
+from .data_types import SurveyQuestionDetail
+
+# Resolved question sets keyed by survey _id. The TTL bounds staleness from writes that bypass the hooks below.
+SURVEY_QUESTION_SET_CACHE = LRUCache(
+    "survey_question_sets", maxsize=SURVEY_QUESTION_CACHE_SIZE, ttl=SURVEY_QUESTION_CACHE_TTL_SECONDS
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SurveyQuestionSet:
+    course_ids: FrozenSet[PyObjectId]
+    question_ids: FrozenSet[PyObjectId]
+    details: Tuple[SurveyQuestionDetail, ...]
+
+
+def invalidate_survey_questions(survey_id: PyObjectId) -> None:
+    SURVEY_QUESTION_SET_CACHE.invalidate(survey_id)
+
+
+def invalidate_survey_questions_for_courses(course_ids: Iterable[PyObjectId]) -> None:
+    changed = frozenset(course_ids)
+    SURVEY_QUESTION_SET_CACHE.invalidate_where(lambda question_set: not question_set.course_ids.isdisjoint(changed))
+
+
+def invalidate_survey_questions_for_question(question_id: PyObjectId) -> None:
+    SURVEY_QUESTION_SET_CACHE.invalidate_where(lambda question_set: question_id in question_set.question_ids)
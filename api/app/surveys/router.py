@@ -1,5 +1,5 @@
 # api/app/surveys/router.py
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
 from datetime import datetime, UTC
@@ -13,18 +13,23 @@ from app.core.db import (
     get_survey_attempt_collection, # ADDED IMPORT
     get_student_answer_collection  # ADDED IMPORT
 )
+from app.core.pagination import CURSOR_QUERY_DESCRIPTION, keyset_query, set_next_cursor
+from app.core.fieldsets import FIELDS_QUERY_DESCRIPTION, fields_projection, fieldset_response, parse_fields
 from app.users.auth import require_teacher_role, get_current_active_user
-from app.users.data_types import UserInDB, PyObjectId, RoleEnum
+from app.users.data_types import SessionUser, PyObjectId, RoleEnum
 from .data_types import (
     SurveyCreate, SurveyUpdate, SurveyOut, SurveyInDB, SurveyQuestionDetail, 
     ScoreFeedbackItem, OutcomeThresholdItem
 )
 from app.questions.data_types import AnswerTypeEnum
-from app.core.settings import STANDARD_QUESTION_MAX_SCORE # IMPORTED CONSTANT
+from app.survey_attempts.thresholds import compile_survey_thresholds
+from .snapshots import create_survey_snapshot, delete_survey_snapshots
+from .question_cache import SURVEY_QUESTION_SET_CACHE, SurveyQuestionSet, invalidate_survey_questions
+from .max_scores import compute_survey_max_scores
 
 SurveyRouter = APIRouter()
 
-async def _get_survey_question_details(survey: SurveyInDB) -> List[SurveyQuestionDetail]:
+async def _resolve_survey_question_set(survey: SurveyInDB) -> SurveyQuestionSet:
     qca_collection = get_qca_collection()
     question_collection = get_question_collection()
     
@@ -32,34 +37,44 @@ async def _get_survey_question_details(survey: SurveyInDB) -> List[SurveyQuestio
     # processed_question_ids_in_survey = set() # Renamed for clarity
 
     if not survey.course_ids:
-        return []
+        return SurveyQuestionSet(course_ids=frozenset(), question_ids=frozenset(), details=())
+
+    # One round trip: the first QCA per question (in insertion order) joined with just the question fields we need.
+    pipeline = [
+        {"$match": {"course_id": {"$in": survey.course_ids}}},
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$question_id", "qca_id": {"$first": "$_id"}, "course_id": {"$first": "$course_id"}}},
+        {"$lookup": {
+            "from": question_collection.name,
+            "localField": "_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"title": 1, "details": 1, "answer_type": 1, "answer_options": 1}}],
+            "as": "question"
+        }},
+        {"$unwind": "$question"},
+    ]
+
+    question_ids = set()
+    async for row in await qca_collection.aggregate(pipeline):
+        question = row["question"]
+        question_ids.add(question["_id"])
+        sqd = SurveyQuestionDetail(
+            qca_id=str(row["qca_id"]),
+            question_id=str(question["_id"]),
+            course_id=str(row["course_id"]), 
+            title=question["title"],
+            details=question.get("details"),
+            answer_type=AnswerTypeEnum(question["answer_type"]),
+            answer_options=question.get("answer_options")
+        )
+        survey_questions_details.append(sqd)
+    return SurveyQuestionSet(
+        course_ids=frozenset(survey.course_ids), question_ids=frozenset(question_ids), details=tuple(survey_questions_details)
+    )
 
-    qcas_for_survey_courses_cursor = qca_collection.find({"course_id": {"$in": survey.course_ids}})
-    
-    question_context_map: Dict[PyObjectId, Dict[str, Any]] = {}
-
-    async for qca in qcas_for_survey_courses_cursor:
-        question_id = qca["question_id"]
-        if question_id not in question_context_map:
-            question_context_map[question_id] = {
-                "qca_id": str(qca["_id"]),
-                "course_id": str(qca["course_id"]) 
-            }
-
-    for question_id, context_info in question_context_map.items():
-        question = await question_collection.find_one({"_id": question_id})
-        if question:
-            sqd = SurveyQuestionDetail(
-                qca_id=context_info["qca_id"],
-                question_id=str(question["_id"]),
-                course_id=context_info["course_id"], 
-                title=question["title"],
-                details=question.get("details"),
-                answer_type=AnswerTypeEnum(question["answer_type"]),
-                answer_options=question.get("answer_options")
-            )
-            survey_questions_details.append(sqd)
-    
+async def _get_survey_question_details(survey: SurveyInDB) -> List[SurveyQuestionDetail]:
+    question_set = await SURVEY_QUESTION_SET_CACHE.get_or_load(survey.id, lambda: _resolve_survey_question_set(survey))
+    survey_questions_details = list(question_set.details)
     random.shuffle(survey_questions_details)
     return survey_questions_details
 
@@ -105,46 +120,19 @@ def _validate_threshold_keys(
                     detail=f"Course ID key '{course_id_str_key}' in {field_name} is not associated with this survey."
                 )
 
-async def _calculate_and_set_max_scores(
-    survey_data: dict, 
-    qca_collection
-):
-    survey_course_ids_pyobj = survey_data.get("course_ids", []) 
-    if not survey_course_ids_pyobj:
-        survey_data["max_scores_per_course"] = {}
-        survey_data["max_overall_survey_score"] = 0.0
-        return
-
-    temp_max_course_scores: Dict[PyObjectId, float] = {cid: 0.0 for cid in survey_course_ids_pyobj}
-    unique_questions_in_survey_for_overall_score: set[PyObjectId] = set()
-    
-    processed_q_for_course_calc: set[tuple[PyObjectId, PyObjectId]] = set()
-
-    if survey_course_ids_pyobj:
-        qcas_cursor = qca_collection.find({"course_id": {"$in": survey_course_ids_pyobj}})
-        async for qca in qcas_cursor:
-            question_id: PyObjectId = qca["question_id"]
-            course_id: PyObjectId = qca["course_id"]
-
-            if course_id in temp_max_course_scores:
-                if (question_id, course_id) not in processed_q_for_course_calc:
-                    temp_max_course_scores[course_id] += STANDARD_QUESTION_MAX_SCORE
-                    processed_q_for_course_calc.add((question_id, course_id))
-            
-            unique_questions_in_survey_for_overall_score.add(question_id)
-
-    survey_data["max_scores_per_course"] = {str(cid): score for cid, score in temp_max_course_scores.items()}
-    survey_data["max_overall_survey_score"] = float(len(unique_questions_in_survey_for_overall_score) * STANDARD_QUESTION_MAX_SCORE)
+async def _calculate_and_set_max_scores(survey_data: dict):
+    max_scores_per_course, max_overall_survey_score = await compute_survey_max_scores(survey_data.get("course_ids") or [])
+    survey_data["max_scores_per_course"] = max_scores_per_course
+    survey_data["max_overall_survey_score"] = max_overall_survey_score
 
 
 @SurveyRouter.post("/", response_model=SurveyOut, status_code=status.HTTP_201_CREATED)
 async def create_survey(
     survey_in: SurveyCreate,
-    current_user: UserInDB = Depends(require_teacher_role)
+    current_user: SessionUser = Depends(require_teacher_role)
 ):
     survey_collection = get_survey_collection()
     course_collection = get_course_collection()
-    qca_collection = get_qca_collection()
     
     valid_course_ids_pyobj: List[PyObjectId] = survey_in.course_ids # Already List[PyObjectId]
     if valid_course_ids_pyobj:
@@ -163,14 +151,20 @@ async def create_survey(
     survey_db_data["created_by"] = current_user.id
     # survey_db_data["course_ids"] already set as List[PyObjectId] from survey_in
 
-    await _calculate_and_set_max_scores(survey_db_data, qca_collection)
+    await _calculate_and_set_max_scores(survey_db_data)
             
     survey_db_obj = SurveyInDB(**survey_db_data) 
-    result = await survey_collection.insert_one(survey_db_obj.model_dump(by_alias=True))
+    survey_db_doc = survey_db_obj.model_dump(by_alias=True)
+    survey_db_doc["compiled_thresholds"] = compile_survey_thresholds(
+        survey_db_doc.get("course_skill_total_score_thresholds"), survey_db_doc.get("course_outcome_thresholds")
+    )
+    result = await survey_collection.insert_one(survey_db_doc)
     created_survey_doc = await survey_collection.find_one({"_id": result.inserted_id})
     
     if not created_survey_doc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create survey.")
+    if created_survey_doc.get("is_published"):
+        await create_survey_snapshot(created_survey_doc)
     
     prepared_dict = _prepare_survey_dict_for_out(created_survey_doc.copy()) 
     return SurveyOut.model_validate(prepared_dict)
@@ -180,13 +174,12 @@ async def create_survey(
 async def update_survey(
     survey_id: str,
     survey_update_payload: SurveyUpdate,
-    current_user: UserInDB = Depends(require_teacher_role)
+    current_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(survey_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid survey ID format.")
 
     survey_collection = get_survey_collection()
-    qca_collection = get_qca_collection()
     course_collection = get_course_collection()
     
     survey_obj_id = PyObjectId(survey_id)
@@ -224,24 +217,36 @@ async def update_survey(
         data_for_max_calc[key] = value
     data_for_max_calc["course_ids"] = effective_course_ids_pyobj 
 
-    await _calculate_and_set_max_scores(data_for_max_calc, qca_collection)
-    
-    update_data["max_scores_per_course"] = data_for_max_calc["max_scores_per_course"]
-    update_data["max_overall_survey_score"] = data_for_max_calc["max_overall_survey_score"]
+    # Max scores only depend on the courses; QCA and question writes keep them current otherwise.
+    if "course_ids" in update_data:
+        await _calculate_and_set_max_scores(data_for_max_calc)
+        update_data["max_scores_per_course"] = data_for_max_calc["max_scores_per_course"]
+        update_data["max_overall_survey_score"] = data_for_max_calc["max_overall_survey_score"]
+    update_data["compiled_thresholds"] = compile_survey_thresholds(
+        data_for_max_calc.get("course_skill_total_score_thresholds"), data_for_max_calc.get("course_outcome_thresholds")
+    )
     
     await survey_collection.update_one({"_id": survey_obj_id}, {"$set": update_data})
+    invalidate_survey_questions(survey_obj_id)
     updated_survey_doc = await survey_collection.find_one({"_id": survey_obj_id})
     if not updated_survey_doc:
          raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve survey after update.")
+    # Publishing, or saving a published survey whose questions, rules or thresholds changed, freezes a new
+    # version for attempts started from now on. Title and description edits keep the current version.
+    if updated_survey_doc.get("is_published"):
+        await create_survey_snapshot(updated_survey_doc, only_if_changed=True)
     
     prepared_dict = _prepare_survey_dict_for_out(updated_survey_doc.copy())
     return SurveyOut.model_validate(prepared_dict)
 
 @SurveyRouter.get("/", response_model=List[SurveyOut])
 async def list_surveys(
-    current_user: UserInDB = Depends(get_current_active_user),
+    response: Response,
+    current_user: SessionUser = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
     published_only: Optional[bool] = Query(None, description="Filter by published status. Student role always sees only published.")
 ):
     survey_collection = get_survey_collection()
@@ -252,16 +257,24 @@ async def list_surveys(
     elif published_only is not None: 
         query["is_published"] = published_only
         
-    surveys_cursor = survey_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
+    field_names = parse_fields(fields, SurveyOut)
+    query, sort = keyset_query(query, "created_at", -1, cursor)
+    surveys_cursor = survey_collection.find(query, fields_projection(field_names, required=["created_at"])).sort(sort).limit(limit)
+    if cursor is None:
+        surveys_cursor = surveys_cursor.skip(skip)
     surveys_list_from_db = await surveys_cursor.to_list(length=limit)
+    set_next_cursor(response, surveys_list_from_db, limit, "created_at")
     
-    return [_prepare_survey_dict_for_out(s.copy()) for s in surveys_list_from_db] 
+    prepared_surveys = [_prepare_survey_dict_for_out(s.copy()) for s in surveys_list_from_db]
+    if field_names is not None:
+        return fieldset_response(response, SurveyOut, field_names, prepared_surveys)
+    return prepared_surveys
 
 
 @SurveyRouter.get("/{survey_id}", response_model=SurveyOut)
 async def get_survey(
     survey_id: str,
-    current_user: UserInDB = Depends(get_current_active_user),
+    current_user: SessionUser = Depends(get_current_active_user),
     include_questions: bool = Query(False, description="Set to true to include question details")
 ):
     if not ObjectId.is_valid(survey_id):
@@ -291,7 +304,7 @@ async def get_survey(
 @SurveyRouter.delete("/{survey_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_survey(
     survey_id: str,
-    current_user: UserInDB = Depends(require_teacher_role)
+    current_user: SessionUser = Depends(require_teacher_role)
 ):
     if not ObjectId.is_valid(survey_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid survey ID format.")
@@ -323,5 +336,7 @@ async def delete_survey(
     async for attempt in attempts_to_delete_cursor:
         await student_answer_collection.delete_many({"survey_attempt_id": attempt["_id"]})
     await attempt_collection.delete_many({"survey_id": survey_obj_id})
+    await delete_survey_snapshots(survey_obj_id)
+    invalidate_survey_questions(survey_obj_id)
     
     return None
\ No newline at end of file
@@ -0,0 +1,253 @@
+# api/app/surveys/snapshots.py
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import bson
+from pymongo import ReturnDocument
+
+from app.core.cache import LRUCache
+from app.core.db import get_survey_collection, get_qca_collection, get_question_collection, get_survey_snapshot_collection
+from app.users.data_types import PyObjectId
+from app.survey_attempts.scoring import ScoringPlan, compile_scoring_plan
+from app.survey_attempts.thresholds import (
+    CourseThresholdTables, IntervalTable, compile_feedback_table, compile_survey_thresholds, tables_from_compiled
+)
+from .data_types import SurveyQuestionDetail, SurveySnapshotInDB
+
+SNAPSHOT_BACKFILL_CLAIM_TTL = timedelta(seconds=30)
+SNAPSHOT_BACKFILL_WAIT_SECONDS = 10.0
+SNAPSHOT_BACKFILL_POLL_SECONDS = 0.05
+
+# Snapshots never change once written, so compiled ones are keyed by (survey_id, version) and never invalidated.
+COMPILED_SNAPSHOT_CACHE = LRUCache("survey_snapshots", maxsize=256)
+
+# What attempts are served and scored from; title and description are informational only.
+_SCORING_FIELDS = (
+    "course_ids", "questions", "qcas", "question_docs", "compiled_thresholds", "max_scores_per_course", "max_overall_survey_score"
+)
+_QCA_SNAPSHOT_PROJECTION = {"question_id": 1, "course_id": 1, "answer_association_type": 1, "feedbacks_based_on_score": 1}
+_QUESTION_SNAPSHOT_PROJECTION = {
+    "title": 1, "details": 1, "answer_type": 1, "answer_options": 1, "scoring_rules": 1, "default_feedbacks_on_score": 1
+}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompiledSurveySnapshot:
+    survey_id: PyObjectId
+    version: int
+    title: str
+    description: Optional[str]
+    course_ids: List[PyObjectId]
+    questions: List[SurveyQuestionDetail]
+    max_scores_per_course: Dict[str, float]
+    max_overall_survey_score: Optional[float]
+    threshold_tables: Dict[str, CourseThresholdTables]
+    qca_by_id: Mapping[PyObjectId, Dict[str, Any]]
+    question_by_id: Mapping[PyObjectId, Dict[str, Any]]
+    plans: Mapping[PyObjectId, ScoringPlan]
+    qca_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]]
+    question_feedback_tables: Mapping[PyObjectId, Optional[IntervalTable]]
+
+
+def _table_from_doc(doc: Optional[Dict[str, Any]]) -> Optional[IntervalTable]:
+    return IntervalTable.from_doc(doc) if doc else None
+
+
+def compile_survey_snapshot(snapshot_doc: Dict[str, Any]) -> CompiledSurveySnapshot:
+    qca_by_id = {qca["_id"]: qca for qca in snapshot_doc.get("qcas", [])}
+    question_by_id = {question["_id"]: question for question in snapshot_doc.get("question_docs", [])}
+    return CompiledSurveySnapshot(
+        survey_id=snapshot_doc["survey_id"],
+        version=snapshot_doc["version"],
+        title=snapshot_doc.get("title", ""),
+        description=snapshot_doc.get("description"),
+        course_ids=snapshot_doc.get("course_ids", []),
+        questions=[SurveyQuestionDetail.model_validate(q) for q in snapshot_doc.get("questions", [])],
+        max_scores_per_course=snapshot_doc.get("max_scores_per_course") or {},
+        max_overall_survey_score=snapshot_doc.get("max_overall_survey_score"),
+        threshold_tables=tables_from_compiled(snapshot_doc.get("compiled_thresholds") or {}),
+        qca_by_id=qca_by_id,
+        question_by_id=question_by_id,
+        # Compiled from the frozen rules, not through the live per-question plan cache.
+        plans={question_id: compile_scoring_plan(question) for question_id, question in question_by_id.items()},
+        qca_feedback_tables={qca_id: _table_from_doc(qca.get("feedback_table")) for qca_id, qca in qca_by_id.items()},
+        question_feedback_tables={
+            question_id: _table_from_doc(question.get("feedback_table")) for question_id, question in question_by_id.items()
+        },
+    )
+
+
+async def _snapshot_content(survey_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything a snapshot freezes for the survey as it is now, except its version."""
+    course_ids = survey_doc.get("course_ids") or []
+
+    qcas: List[Dict[str, Any]] = []
+    if course_ids:
+        qcas = await get_qca_collection().find({"course_id": {"$in": course_ids}}, _QCA_SNAPSHOT_PROJECTION).sort("_id", 1).to_list(length=None)
+    question_docs: List[Dict[str, Any]] = []
+    if qcas:
+        question_docs = await get_question_collection().find(
+            {"_id": {"$in": list({qca["question_id"] for qca in qcas})}}, _QUESTION_SNAPSHOT_PROJECTION
+        ).sort("_id", 1).to_list(length=None)
+    question_by_id = {question["_id"]: question for question in question_docs}
+
+    # Students see each question once, through its first association (as _get_survey_question_details does).
+    questions: List[SurveyQuestionDetail] = []
+    listed_question_ids = set()
+    for qca in qcas:
+        question = question_by_id.get(qca["question_id"])
+        if question is None or qca["question_id"] in listed_question_ids:
+            continue
+        listed_question_ids.add(qca["question_id"])
+        questions.append(SurveyQuestionDetail(
+            qca_id=str(qca["_id"]),
+            question_id=str(question["_id"]),
+            course_id=str(qca["course_id"]),
+            title=question["title"],
+            details=question.get("details"),
+            answer_type=question["answer_type"],
+            answer_options=question.get("answer_options")
+        ))
+    for qca in qcas:
+        table = compile_feedback_table(qca.get("feedbacks_based_on_score"))
+        qca["feedback_table"] = table.to_doc() if table else None
+    for question in question_docs:
+        table = compile_feedback_table(question.get("default_feedbacks_on_score"))
+        question["feedback_table"] = table.to_doc() if table else None
+
+    compiled_thresholds = survey_doc.get("compiled_thresholds")
+    if compiled_thresholds is None:
+        compiled_thresholds = compile_survey_thresholds(
+            survey_doc.get("course_skill_total_score_thresholds"), survey_doc.get("course_outcome_thresholds")
+        )
+
+    return {
+        "title": survey_doc.get("title", ""),
+        "description": survey_doc.get("description"),
+        "course_ids": course_ids,
+        "questions": questions,
+        "qcas": qcas,
+        "question_docs": question_docs,
+        "compiled_thresholds": compiled_thresholds,
+        "max_scores_per_course": survey_doc.get("max_scores_per_course") or {},
+        "max_overall_survey_score": survey_doc.get("max_overall_survey_score"),
+    }
+
+
+def _scoring_fields(snapshot_doc: Dict[str, Any]) -> Dict[str, Any]:
+    # Round-tripped through BSON so a freshly built document compares equal to its stored copy.
+    return bson.decode(bson.encode({field: snapshot_doc.get(field) for field in _SCORING_FIELDS}))
+
+
+async def create_survey_snapshot(survey_doc: Dict[str, Any], only_if_changed: bool = False) -> Dict[str, Any]:
+    """
+    Freezes the survey's current questions, rules and thresholds as its next published version. With
+    `only_if_changed`, the current published snapshot is kept (and returned) when none of that changed.
+    """
+    survey_collection = get_survey_collection()
+    content = await _snapshot_content(survey_doc)
+    snapshot = SurveySnapshotInDB(survey_id=survey_doc["_id"], version=0, **content)
+    snapshot_doc = snapshot.model_dump(by_alias=True)
+
+    if only_if_changed and survey_doc.get("published_version") is not None:
+        current = await get_survey_snapshot_collection().find_one(
+            {"survey_id": survey_doc["_id"], "version": survey_doc["published_version"]}
+        )
+        if current is not None and _scoring_fields(current) == _scoring_fields(snapshot_doc):
+            return current
+
+    counter_doc = await survey_collection.find_one_and_update(
+        {"_id": survey_doc["_id"]}, {"$inc": {"snapshot_counter": 1}},
+        projection={"snapshot_counter": 1}, return_document=ReturnDocument.AFTER
+    )
+    version = counter_doc["snapshot_counter"] if counter_doc else 1
+    snapshot_doc["version"] = version
+    await get_survey_snapshot_collection().insert_one(snapshot_doc)
+    # Only point the survey at the snapshot once it exists; $max keeps concurrent publishes monotonic.
+    await survey_collection.update_one({"_id": survey_doc["_id"]}, {"$max": {"published_version": version}})
+    COMPILED_SNAPSHOT_CACHE.set((survey_doc["_id"], version), compile_survey_snapshot(snapshot_doc))
+    return snapshot_doc
+
+
+async def get_survey_snapshot(survey_id: PyObjectId, version: int) -> Optional[CompiledSurveySnapshot]:
+    key = (survey_id, version)
+
+    async def load() -> Optional[CompiledSurveySnapshot]:
+        snapshot_doc = await get_survey_snapshot_collection().find_one({"survey_id": survey_id, "version": version})
+        return compile_survey_snapshot(snapshot_doc) if snapshot_doc is not None else None
+
+    # Single-flight: a class opening the same survey at once triggers one read.
+    compiled = await COMPILED_SNAPSHOT_CACHE.get_or_load(key, load)
+    if compiled is None:
+        COMPILED_SNAPSHOT_CACHE.invalidate(key)
+    return compiled
+
+
+async def get_snapshot_max_scores(
+    keys: Iterable[Tuple[PyObjectId, int]]
+) -> Dict[Tuple[PyObjectId, int], Tuple[Dict[str, float], Optional[float]]]:
+    """
+    Max scores per course and overall for each (survey_id, version): from the compiled snapshots this
+    worker holds, and the rest in one query that reads only those fields.
+    """
+    max_scores: Dict[Tuple[PyObjectId, int], Tuple[Dict[str, float], Optional[float]]] = {}
+    uncached: List[Tuple[PyObjectId, int]] = []
+    for key in dict.fromkeys(keys):
+        compiled = COMPILED_SNAPSHOT_CACHE.get(key)
+        if compiled is not None:
+            max_scores[key] = (compiled.max_scores_per_course, compiled.max_overall_survey_score)
+        else:
+            uncached.append(key)
+    if uncached:
+        snapshot_docs = get_survey_snapshot_collection().find(
+            {"$or": [{"survey_id": survey_id, "version": version} for survey_id, version in uncached]},
+            {"survey_id": 1, "version": 1, "max_scores_per_course": 1, "max_overall_survey_score": 1},
+        )
+        async for doc in snapshot_docs:
+            max_scores[(doc["survey_id"], doc["version"])] = (doc.get("max_scores_per_course", {}), doc.get("max_overall_survey_score"))
+    return max_scores
+
+
+async def get_published_survey_snapshot(survey_doc: Dict[str, Any]) -> CompiledSurveySnapshot:
+    """
+    The snapshot new attempts should use. Surveys published before snapshots existed get one on first
+    use: one request claims the backfill atomically and creates it, concurrent starts wait for it.
+    """
+    survey_collection = get_survey_collection()
+    deadline = asyncio.get_running_loop().time() + SNAPSHOT_BACKFILL_WAIT_SECONDS
+    while True:
+        version = survey_doc.get("published_version")
+        if version is not None:
+            compiled = await get_survey_snapshot(survey_doc["_id"], version)
+            if compiled is not None:
+                return compiled
+
+        now = datetime.now(UTC)
+        claimed = await survey_collection.find_one_and_update(
+            {
+                "_id": survey_doc["_id"],
+                "published_version": version if version is not None else {"$exists": False},
+                # A claim whose holder died is taken over once it is stale.
+                "$or": [{"snapshot_backfill_at": {"$exists": False}}, {"snapshot_backfill_at": {"$lt": now - SNAPSHOT_BACKFILL_CLAIM_TTL}}],
+            },
+            {"$set": {"snapshot_backfill_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if claimed is not None:
+            try:
+                snapshot_doc = await create_survey_snapshot(claimed)
+            finally:
+                await survey_collection.update_one({"_id": survey_doc["_id"]}, {"$unset": {"snapshot_backfill_at": ""}})
+            return await get_survey_snapshot(snapshot_doc["survey_id"], snapshot_doc["version"])
+
+        # Another request is creating the snapshot (or just published a new version); re-read and retry.
+        if asyncio.get_running_loop().time() > deadline:
+            raise RuntimeError(f"Timed out waiting for the snapshot of survey {survey_doc['_id']}.")
+        await asyncio.sleep(SNAPSHOT_BACKFILL_POLL_SECONDS)
+        survey_doc = await survey_collection.find_one({"_id": survey_doc["_id"]}) or survey_doc
+
+
+async def delete_survey_snapshots(survey_id: PyObjectId) -> None:
+    await get_survey_snapshot_collection().delete_many({"survey_id": survey_id})
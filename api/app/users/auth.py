@@ -2,10 +2,12 @@ from fastapi import Depends, HTTPException, status, Request
 from passlib.context import CryptContext
 from typing import Optional
 from bson import ObjectId
+import time
 
-from .data_types import UserInDB, UserOut, PyObjectId, RoleEnum # MODIFIED: Added RoleEnum
+from .data_types import UserInDB, UserInDBBase, UserOut, PyObjectId, RoleEnum, SessionUser # MODIFIED: Added RoleEnum
+from app.core.cache import LRUCache
 from app.core.db import get_user_collection
-from app.core.settings import PWD_ALGORITHM
+from app.core.settings import PWD_ALGORITHM, SESSION_USER_CACHE_SIZE, SESSION_USER_CACHE_TTL_SECONDS, SESSION_CLAIMS_REVALIDATE_SECONDS
 
 
 # Password Hashing
@@ -18,7 +20,52 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 # Authentication / Session Dependencies
-async def get_current_user_from_session(request: Request) -> Optional[UserInDB]:
+# Keyed by the session's user id string. Entries expire after the TTL so role or profile changes made
+# outside the API are picked up; changes through the API should call invalidate_session_user.
+SESSION_USER_CACHE = LRUCache("session_users", maxsize=SESSION_USER_CACHE_SIZE, ttl=SESSION_USER_CACHE_TTL_SECONDS)
+
+def cache_session_user(user: UserInDBBase) -> SessionUser:
+    session_user = SessionUser.model_validate(user.model_dump(by_alias=True, exclude={"password_hash"}))
+    SESSION_USER_CACHE.set(str(session_user.id), session_user)
+    return session_user
+
+def invalidate_session_user(user_id: str) -> None:
+    SESSION_USER_CACHE.invalidate(str(user_id))
+
+# Session claims: login stores the caller's identity and role in the session cookie, which SessionMiddleware
+# signs with SESSION_SECRET_KEY. Requests trust the claims without reading `users` until they are
+# SESSION_CLAIMS_REVALIDATE_SECONDS old, then re-check the user's token_version (through the cache above)
+# so revoke_user_sessions takes effect within that window (plus the cache TTL on other workers).
+SESSION_CLAIMS_VERSION = 1
+
+def issue_session_claims(request: Request, user: UserInDBBase, issued_at: Optional[int] = None) -> None:
+    now = int(time.time())
+    request.session["user_id"] = str(user.id)
+    request.session["username"] = user.username
+    request.session["claims"] = {
+        "v": SESSION_CLAIMS_VERSION,
+        "sub": str(user.id),
+        "username": user.username,
+        "display_name": user.display_name,
+        "role": user.role.value,
+        "photo_url": user.photo_url,
+        "tv": user.token_version,
+        "iat": issued_at if issued_at is not None else now,
+        "checked_at": now,
+    }
+
+def _user_from_claims(claims: dict) -> SessionUser:
+    return SessionUser(
+        _id=claims["sub"], username=claims["username"], display_name=claims["display_name"],
+        role=claims["role"], photo_url=claims["photo_url"], token_version=claims["tv"],
+    )
+
+async def revoke_user_sessions(user_id: str) -> None:
+    """Invalidates every session issued to the user so far; each is rejected at its next revalidation."""
+    await get_user_collection().update_one({"_id": ObjectId(str(user_id))}, {"$inc": {"token_version": 1}})
+    invalidate_session_user(user_id)
+
+async def get_current_user_from_session(request: Request) -> Optional[SessionUser]:
     user_id_str = request.session.get("user_id")
     if not user_id_str:
         return None
@@ -26,20 +73,34 @@ async def get_current_user_from_session(request: Request) -> Optional[UserInDB]:
     if not ObjectId.is_valid(user_id_str):
         request.session.clear()
         return None
+
+    claims = request.session.get("claims")
+    if not claims or claims.get("v") != SESSION_CLAIMS_VERSION or claims.get("sub") != user_id_str:
+        claims = None  # Sessions from before claims, or from an older claim format: upgraded below
+    elif time.time() - claims["checked_at"] < SESSION_CLAIMS_REVALIDATE_SECONDS:
+        return _user_from_claims(claims)
     
-    user_collection = get_user_collection()
+    async def load() -> Optional[SessionUser]:
+        user_dict = await get_user_collection().find_one({"_id": ObjectId(user_id_str)}, {"password_hash": 0})
+        return SessionUser(**user_dict) if user_dict else None
+
     try:
-        user_dict = await user_collection.find_one({"_id": ObjectId(user_id_str)})
+        user = await SESSION_USER_CACHE.get_or_load(user_id_str, load)
     except Exception:
         return None
-        
-    if user_dict:
-        return UserInDB(**user_dict)
-    return None
+    if user is None:
+        SESSION_USER_CACHE.invalidate(user_id_str)
+        return None
+    if claims is not None and claims["tv"] != user.token_version:
+        request.session.clear()
+        return None
+    # Refresh the claims so role or profile changes reach the session too
+    issue_session_claims(request, user, issued_at=claims["iat"] if claims else None)
+    return user
 
 async def get_current_active_user(
-    current_user: Optional[UserInDB] = Depends(get_current_user_from_session)
-) -> UserInDB:
+    current_user: Optional[SessionUser] = Depends(get_current_user_from_session)
+) -> SessionUser:
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +110,7 @@ async def get_current_active_user(
     return current_user
 
 # MODIFIED: Added role-based dependency
-async def require_teacher_role(current_user: UserInDB = Depends(get_current_active_user)):
+async def require_teacher_role(current_user: SessionUser = Depends(get_current_active_user)):
     if current_user.role != RoleEnum.teacher:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -58,7 +119,7 @@ async def require_teacher_role(current_user: UserInDB = Depends(get_current_acti
     return current_user
 # END MODIFICATION
 
-def to_user_out(user_in_db: UserInDB) -> UserOut:
+def to_user_out(user_in_db: UserInDBBase) -> UserOut:
     user_data_for_out = user_in_db.model_dump(by_alias=False, exclude={'password_hash'})
 
     if 'id' in user_data_for_out and isinstance(user_data_for_out['id'], PyObjectId):
@@ -104,10 +104,16 @@ class UserInDBBase(UserBase):
         alias="_id"
         # json_schema_extra={"example": "..."} # Can be added to PyObjectId.__get_pydantic_json_schema__
     )
+    # Bumped to revoke every session issued to the user (see auth.revoke_user_sessions)
+    token_version: int = 0
 
 class UserInDB(UserInDBBase):
     password_hash: str
 
+class SessionUser(UserInDBBase):
+    """The authenticated user of a request, as cached per session; never carries the password hash."""
+    pass
+
 class UserOut(UserBase):
     id: str 
     model_config = ConfigDict(
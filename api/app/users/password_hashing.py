@@ -0,0 +1,58 @@
+# api/app/users/password_hashing.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from app.core.settings import PASSWORD_HASH_CONCURRENCY
+
+T = TypeVar("T")
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt hashing and verification on a dedicated thread pool so a login storm does not
+    block the event loop. bcrypt releases the GIL, so `max_workers` is the number of hashes
+    computed at once; further calls wait in the executor queue and are counted as `queue_depth`.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.completed = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.submitted - self.completed - self.running
+
+    def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._run, fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "completed": self.completed,
+        }
+
+
+PASSWORD_HASH_POOL = PasswordHashPool(PASSWORD_HASH_CONCURRENCY)
@@ -2,19 +2,26 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from bson import ObjectId # For converting string ID from session to ObjectId for DB query
 
-from .data_types import UserCreate, UserLogin, UserOut, UserInDB # Relative imports
+from .data_types import UserCreate, UserLogin, UserOut, UserInDB, SessionUser # Relative imports
 from .auth import ( # Relative imports
     get_password_hash, 
     verify_password,
     get_current_active_user,
-    to_user_out
+    to_user_out,
+    cache_session_user,
+    invalidate_session_user,
+    issue_session_claims,
+    revoke_user_sessions
 )
+from .password_hashing import PASSWORD_HASH_POOL
 from app.core.db import get_user_collection # Absolute import from project root
+from app.core.rate_limit import enforce_rate_limit
 
 UserRouter = APIRouter()
 
 @UserRouter.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def signup_user(user_in: UserCreate, request: Request):
+    await enforce_rate_limit("login", request)
     user_collection = get_user_collection()
     existing_user = await user_collection.find_one({"username": user_in.username})
     if existing_user:
@@ -23,7 +30,7 @@ async def signup_user(user_in: UserCreate, request: Request):
             detail="Username (email) already registered."
         )
     
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await PASSWORD_HASH_POOL.run(get_password_hash, user_in.password)
     
     # Prepare data for UserInDB, explicitly creating PyObjectId for id
     user_db_data = user_in.model_dump(exclude={"password"}) # Should be model_dump
@@ -41,14 +48,15 @@ async def signup_user(user_in: UserCreate, request: Request):
 
     # Automatically log in the user by creating a session
     # Store user ID as string in session, as ObjectId is not directly JSON serializable for session cookie
-    request.session["user_id"] = str(created_user_instance.id) 
-    request.session["username"] = created_user_instance.username
+    issue_session_claims(request, created_user_instance)
+    cache_session_user(created_user_instance)
 
     return to_user_out(created_user_instance)
 
 
 @UserRouter.post("/login", response_model=UserOut)
 async def login_for_session(form_data: UserLogin, request: Request):
+    await enforce_rate_limit("login", request, user_key=form_data.username)
     user_collection = get_user_collection()
     user_dict = await user_collection.find_one({"username": form_data.username})
     if not user_dict:
@@ -58,24 +66,35 @@ async def login_for_session(form_data: UserLogin, request: Request):
             headers={"WWW-Authenticate": "Session"},
         )
     user = UserInDB(**user_dict)
-    if not verify_password(form_data.password, user.password_hash):
+    if not await PASSWORD_HASH_POOL.run(verify_password, form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Session"},
         )
 
-    # Create session - store user ID as string
-    request.session["user_id"] = str(user.id)
-    request.session["username"] = user.username
+    # Create session - store user ID as string, plus signed claims so later requests skip the user lookup
+    issue_session_claims(request, user)
+    # Refresh the cached session user from the row just read, so a login picks up out-of-band changes
+    cache_session_user(user)
     
     return to_user_out(user)
 
 @UserRouter.post("/logout")
 async def logout(request: Request):
+    user_id = request.session.get("user_id")
+    if user_id:
+        invalidate_session_user(user_id)
     request.session.clear()
     return {"message": "Successfully logged out"}
 
+@UserRouter.post("/logout-all")
+async def logout_all_sessions(request: Request, current_user: SessionUser = Depends(get_current_active_user)):
+    """Logs the user out everywhere by revoking every session issued to them, this one included."""
+    await revoke_user_sessions(str(current_user.id))
+    request.session.clear()
+    return {"message": "Successfully logged out of all sessions"}
+
 @UserRouter.get("/me", response_model=UserOut)
-async def read_users_me(current_user: UserInDB = Depends(get_current_active_user)):
+async def read_users_me(current_user: SessionUser = Depends(get_current_active_user)):
     return to_user_out(current_user)
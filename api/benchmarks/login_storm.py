@@ -0,0 +1,123 @@
+# api/benchmarks/login_storm.py
+"""
+Login storm benchmark: the exam-start case where hundreds of students log in at once.
+
+Against a running API (e.g. `fastapi run` from ./api with MongoDB up), it signs up `--users`
+students, measures latency of other endpoints on an idle server, then fires every login at once
+while measuring the same endpoints again. With hashing off the event loop, the probe p99
+during the storm should stay close to the idle baseline.
+Every request comes from one address, so large runs may need LOGIN_RATE_LIMIT_PER_IP raised
+(or RATE_LIMIT_BACKEND=off) on the server.
+
+    python benchmarks/login_storm.py --base-url http://localhost:8000 --users 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+
+PASSWORD = "storm-password"
+PROBE_PATHS = ("/api/v1/users/me", "/api/v1/courses/?limit=20")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summary(label: str, samples: List[float]) -> str:
+    if not samples:
+        return f"{label:<22} no samples"
+    ms = [s * 1000 for s in samples]
+    return (f"{label:<22} n={len(ms):<5} p50={statistics.median(ms):7.1f} ms  "
+            f"p99={percentile(ms, 99):7.1f} ms  max={max(ms):7.1f} ms")
+
+
+async def signup_users(base_url: str, count: int, prefix: str, concurrency: int) -> List[str]:
+    usernames = [f"{prefix}_{i}@example.com" for i in range(count)]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def signup(client: httpx.AsyncClient, username: str) -> None:
+        async with slots:
+            response = await client.post("/api/v1/users/signup", json={
+                "username": username, "display_name": username.split("@")[0], "role": "student", "password": PASSWORD,
+            })
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await asyncio.gather(*(signup(client, username) for username in usernames))
+    return usernames
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> List[float]:
+    latencies: List[float] = []
+    while not stop.is_set():
+        for path in PROBE_PATHS:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def probe_for(client: httpx.AsyncClient, seconds: float, interval: float) -> List[float]:
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(client, stop, interval))
+    await asyncio.sleep(seconds)
+    stop.set()
+    return await task
+
+
+async def login_storm(base_url: str, usernames: List[str]) -> List[float]:
+    async def login(username: str) -> float:
+        # A client per student, as each browser holds its own session cookie
+        async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/users/login", json={"username": username, "password": PASSWORD})
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            return elapsed
+
+    return list(await asyncio.gather(*(login(username) for username in usernames)))
+
+
+async def main(args: argparse.Namespace) -> None:
+    prefix = f"storm_{uuid.uuid4().hex[:8]}"
+    print(f"Signing up {args.users} students ({prefix}_*)...")
+    usernames = await signup_users(args.base_url, args.users + 1, prefix, args.signup_concurrency)
+    prober_username, storm_usernames = usernames[0], usernames[1:]
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as prober:
+        (await prober.post("/api/v1/users/login", json={"username": prober_username, "password": PASSWORD})).raise_for_status()
+
+        baseline = await probe_for(prober, args.baseline_seconds, args.probe_interval)
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(prober, stop, args.probe_interval))
+        storm_started = time.perf_counter()
+        logins = await login_storm(args.base_url, storm_usernames)
+        storm_seconds = time.perf_counter() - storm_started
+        stop.set()
+        during_storm = await probe_task
+
+    print(f"\n{len(storm_usernames)} concurrent logins finished in {storm_seconds:.1f} s")
+    print(summary("logins", logins))
+    print(summary("probes, idle", baseline))
+    print(summary("probes, during storm", during_storm))
+    if baseline and during_storm:
+        print(f"p99 ratio (storm / idle): {percentile(during_storm, 99) / percentile(baseline, 99):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure endpoint latency while many students log in at once.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=500, help="Students logging in at once.")
+    parser.add_argument("--signup-concurrency", type=int, default=20)
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Pause between probe rounds, in seconds.")
+    asyncio.run(main(parser.parse_args()))
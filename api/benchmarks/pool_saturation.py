@@ -0,0 +1,162 @@
+# api/benchmarks/pool_saturation.py
+"""
+Connection pool saturation benchmark for the MongoDB client options in app/core/settings.py.
+
+Runs a burst of concurrent "submits" directly against MongoDB, once per scenario. Each submit
+upserts a batch of answers and then updates its attempt, like an answer save followed by a submit.
+Each scenario changes one client option. For each it reports throughput, submit latency, time
+spent waiting for a pooled connection, connections opened, and checkouts that timed out.
+Everything is written to a scratch database that is dropped at the end.
+
+    python benchmarks/pool_saturation.py --concurrency 500 --submits 5000
+    python benchmarks/pool_saturation.py --scenario pool-10 --scenario pool-200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import AsyncMongoClient, UpdateOne, monitoring
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.settings import DATABASE_NAME, MONGO_CLIENT_OPTIONS, MONGO_DATABASE_URL  # noqa: E402
+
+ANSWERS_PER_SUBMIT = 20
+
+# Each scenario starts from the configured MONGO_CLIENT_OPTIONS and overrides one setting.
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "configured": {},
+    "pool-10": {"maxPoolSize": 10},
+    "pool-50": {"maxPoolSize": 50},
+    "pool-200": {"maxPoolSize": 200},
+    "warm-pool-50": {"maxPoolSize": 50, "minPoolSize": 50},
+    "idle-close-100ms": {"maxIdleTimeMS": 100},
+    "wait-queue-200ms": {"maxPoolSize": 10, "waitQueueTimeoutMS": 200},
+    "socket-timeout-50ms": {"socketTimeoutMS": 50},
+    "server-selection-2s": {"serverSelectionTimeoutMS": 2000},
+    "zstd": {"compressors": "zstd"},
+    "snappy": {"compressors": "snappy"},
+    "zlib": {"compressors": "zlib"},
+}
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Collects checkout waits and connection counts for one client."""
+
+    def __init__(self):
+        self.checkout_waits: List[float] = []
+        self.created = 0
+        self.checkout_timeouts = 0
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_checked_out(self, event):
+        self.checkout_waits.append(event.duration)
+
+    def connection_check_out_failed(self, event):
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self.checkout_timeouts += 1
+
+    # Events this benchmark does not use
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+async def submit(db, attempt_id: ObjectId) -> None:
+    await db.student_answers.bulk_write([
+        UpdateOne(
+            {"survey_attempt_id": attempt_id, "qca_id": i},
+            {"$set": {"answer_value": "a", "score_achieved": 10.0, "padding": "x" * 200}},
+            upsert=True,
+        ) for i in range(ANSWERS_PER_SUBMIT)
+    ], ordered=False)
+    await db.survey_attempts.update_one(
+        {"_id": attempt_id}, {"$set": {"is_submitted": True, "total_score": 10.0 * ANSWERS_PER_SUBMIT}}, upsert=True
+    )
+
+
+async def run_scenario(name: str, overrides: Dict[str, Any], database: str, concurrency: int, submits: int) -> Dict[str, Any]:
+    stats = PoolStats()
+    options = {**MONGO_CLIENT_OPTIONS, **overrides}
+    client = AsyncMongoClient(MONGO_DATABASE_URL, event_listeners=[stats], **options)
+    db = client[database]
+    await client.admin.command("ping")
+    if options.get("minPoolSize"):
+        await asyncio.sleep(0.5)  # let the pool open its minimum connections before the burst
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one_submit() -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await submit(db, ObjectId())
+                latencies.append(time.perf_counter() - started)
+            except PyMongoError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_submit() for _ in range(submits)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    return {
+        "scenario": name,
+        "submits/s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50 ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99 ms": percentile(latencies, 99) * 1000,
+        "wait p99 ms": percentile(stats.checkout_waits, 99) * 1000,
+        "connections": stats.created,
+        "timeouts": stats.checkout_timeouts,
+        "errors": ", ".join(f"{k}={v}" for k, v in errors.items()) or "-",
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(f"{r[c]:.1f}" if isinstance(r[c], float) else str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join((f"{row[c]:.1f}" if isinstance(row[c], float) else str(row[c])).ljust(widths[c]) for c in columns))
+
+
+async def main(args: argparse.Namespace) -> None:
+    database = f"{DATABASE_NAME}_pool_benchmark"
+    names = args.scenario or list(SCENARIOS)
+    print(f"{args.submits} submits, {args.concurrency} in flight, against {database}. Base options: {MONGO_CLIENT_OPTIONS}\n")
+    rows = []
+    try:
+        for name in names:
+            rows.append(await run_scenario(name, SCENARIOS[name], database, args.concurrency, args.submits))
+    finally:
+        cleanup = AsyncMongoClient(MONGO_DATABASE_URL)
+        await cleanup.drop_database(database)
+        await cleanup.close()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare MongoDB client pool settings under concurrent submits.")
+    parser.add_argument("--concurrency", type=int, default=500, help="Submits in flight at once.")
+    parser.add_argument("--submits", type=int, default=5000)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Run only these scenarios (repeatable).")
+    asyncio.run(main(parser.parse_args()))
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from typing import Generator
 import asyncio
 import uuid
+from contextlib import contextmanager
+from pymongo import monitoring
 
 from app.main import app
 from app.core.db import (
@@ -11,10 +13,51 @@ from app.core.db import (
     get_question_collection, get_qca_collection,
     get_survey_collection, 
     get_survey_attempt_collection,
-    get_student_answer_collection
+    get_student_answer_collection,
+    get_rescore_job_collection,
+    get_survey_snapshot_collection, get_rate_limit_collection
 )
+from app.core.rate_limit import reset_rate_limits
 from app.core.settings import DATABASE_NAME, MONGO_DATABASE_URL
 
+
+class DbCommandRecorder(monitoring.CommandListener):
+    """
+    Records the names of commands the app sends to MongoDB while `record()` is active, and the
+    full (database, command) pairs in `documents` for tests that re-run them, e.g. with explain.
+    """
+    def __init__(self):
+        self.commands: list[str] = []
+        self.documents: list[tuple[str, dict]] = []
+        self.active = False
+
+    def started(self, event):
+        if self.active:
+            self.commands.append(event.command_name)
+            self.documents.append((event.database_name, dict(event.command)))
+
+    def succeeded(self, event): pass
+
+    def failed(self, event): pass
+
+    @contextmanager
+    def record(self):
+        self.commands = []
+        self.documents = []
+        self.active = True
+        try:
+            yield self.commands
+        finally:
+            self.active = False
+
+# Registered globally so it applies to the client the app creates in its lifespan.
+DB_COMMAND_RECORDER = DbCommandRecorder()
+monitoring.register(DB_COMMAND_RECORDER)
+
+@pytest.fixture(scope="function")
+def db_commands() -> DbCommandRecorder:
+    return DB_COMMAND_RECORDER
+
 @pytest.fixture(scope="session", autouse=True)
 def database_warning_and_final_cleanup():
     if "test" not in MONGO_DATABASE_URL.lower() and "test" not in DATABASE_NAME.lower():
@@ -90,6 +133,8 @@ def auto_db_cleanup(client: TestClient): # client fixture implicitly handles app
     # This fixture will run after each test function due to autouse=True
     # It relies on MONGO_DB.db being set up by the TestClient's app lifespan
     
+    # Every test starts with full rate-limit buckets, as the suite logs in from one client address
+    reset_rate_limits()
     # Yield to let the test run
     yield
 
@@ -106,7 +151,8 @@ def auto_db_cleanup(client: TestClient): # client fixture implicitly handles app
                 get_user_collection, get_course_collection,
                 get_question_collection, get_qca_collection,
                 get_survey_collection, get_survey_attempt_collection,
-                get_student_answer_collection
+                get_student_answer_collection, get_rescore_job_collection,
+                get_survey_snapshot_collection, get_rate_limit_collection
             ]
             for coll_func in collections_to_clean_funcs:
                 try:
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+
+from app.core.cache import LRUCache, all_cache_stats
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires_entries(monkeypatch):
+    cache = LRUCache("test_lru_eviction", maxsize=2)
+    cache.set("a", 1); cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    ttl_cache = LRUCache("test_lru_ttl", maxsize=10, ttl=30)
+    ttl_cache.set("k", "v")
+    now[0] += 29
+    assert ttl_cache.get("k") == "v"
+    now[0] += 2
+    assert ttl_cache.get("k") is None
+    assert len(ttl_cache) == 0
+
+
+async def test_get_or_load_coalesces_concurrent_misses():
+    cache = LRUCache("test_single_flight", maxsize=10)
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return "resolved"
+
+    results = await asyncio.gather(*(cache.get_or_load("survey", load) for _ in range(50)))
+    assert results == ["resolved"] * 50
+    assert loads == 1
+    assert await cache.get_or_load("survey", load) == "resolved" and loads == 1
+    stats = next(s for s in all_cache_stats() if s["name"] == "test_single_flight")
+    assert stats["coalesced"] == 49 and stats["hits"] == 1
+
+
+async def test_get_or_load_does_not_keep_values_invalidated_while_loading():
+    cache = LRUCache("test_invalidate_inflight", maxsize=10)
+
+    async def load():
+        cache.invalidate("key")  # a write lands while the value is being resolved
+        return "stale"
+
+    assert await cache.get_or_load("key", load) == "stale"
+    assert len(cache) == 0
+
+    async def failing_load():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("other", failing_load)
+    assert len(cache) == 0
+
+
+async def test_get_or_load_survives_the_first_caller_being_cancelled():
+    cache = LRUCache("test_cancelled_leader", maxsize=10)
+    release = asyncio.Event()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return "resolved"
+
+    leader = asyncio.create_task(cache.get_or_load("key", load))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get_or_load("key", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["resolved"] * 3
+    assert leader.cancelled()
+    assert loads == 1 and cache.get("key") == "resolved"
+
+
+async def test_invalidate_where_only_drops_matching_loads_in_flight():
+    cache = LRUCache("test_invalidate_where_inflight", maxsize=10)
+    release = asyncio.Event()
+
+    async def load(value):
+        await release.wait()
+        return value
+
+    loads = asyncio.gather(cache.get_or_load("a", lambda: load({"survey": 1})), cache.get_or_load("b", lambda: load({"survey": 2})))
+    await asyncio.sleep(0)
+    cache.invalidate_where(lambda value: value["survey"] == 1)
+    release.set()
+
+    assert await loads == [{"survey": 1}, {"survey": 2}]
+    assert cache.get("a") is None
+    assert cache.get("b") == {"survey": 2}
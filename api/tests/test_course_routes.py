@@ -1,7 +1,9 @@
 from fastapi.testclient import TestClient
 from http import HTTPStatus
 import uuid
+from bson import ObjectId
 
+from app.core.pagination import encode_cursor
 from app.questions.data_types import AnswerTypeEnum
 
 # Base data for courses (can be templates)
@@ -107,6 +109,40 @@ def test_list_courses_as_student(
     assert course2_payload["code"] in retrieved_codes
     assert len(data) >= 2
 
+def test_list_courses_cursor_pagination(authenticated_teacher_data_and_client: tuple[TestClient, dict]):
+    teacher_client, _ = authenticated_teacher_data_and_client
+    created_codes = set()
+    for _ in range(5):
+        payload = create_unique_course_payload(course_template_1)
+        assert teacher_client.post("/api/v1/courses/", json=payload).status_code == HTTPStatus.CREATED
+        created_codes.add(payload["code"])
+
+    seen_ids, seen_codes, cursor, pages = [], set(), None, 0
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = teacher_client.get("/api/v1/courses/", params=params)
+        assert response.status_code == HTTPStatus.OK
+        seen_ids.extend(item["id"] for item in response.json())
+        seen_codes.update(item["code"] for item in response.json())
+        pages += 1
+        if pages == 1:
+            # A course created while paging lands after the cursor instead of shifting later pages
+            late_payload = create_unique_course_payload(course_template_2)
+            assert teacher_client.post("/api/v1/courses/", json=late_payload).status_code == HTTPStatus.CREATED
+            created_codes.add(late_payload["code"])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert len(seen_ids) == len(set(seen_ids))
+    assert created_codes <= seen_codes
+
+    response = teacher_client.get("/api/v1/courses/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    # A well-formed token whose sort value is a query operator instead of an _id
+    forged = encode_cursor({"$ne": None}, ObjectId())
+    response = teacher_client.get("/api/v1/courses/", params={"cursor": forged})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
 def test_list_courses_unauthenticated(client: TestClient):
     response = client.get("/api/v1/courses/")
     assert response.status_code == HTTPStatus.UNAUTHORIZED
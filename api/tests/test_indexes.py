@@ -0,0 +1,35 @@
+import pytest
+from datetime import datetime, UTC
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
+
+from app.core.db import get_survey_attempt_collection
+from app.core.indexes import INDEXES, check_indexes, ensure_indexes
+from app.users.data_types import PyObjectId
+
+
+def test_lifespan_applies_every_registered_index(client: TestClient):
+    report = client.portal.call(check_indexes)
+    assert report["missing"] == []
+    # Applying again is a no-op
+    assert client.portal.call(ensure_indexes) == []
+
+
+def test_index_names_are_unique_per_collection():
+    names = [(spec.collection, spec.index_name) for spec in INDEXES]
+    assert len(names) == len(set(names))
+
+
+def test_only_one_open_attempt_per_student_and_survey(client: TestClient):
+    attempt_collection = get_survey_attempt_collection()
+    student_id, survey_id = PyObjectId(), PyObjectId()
+
+    def open_attempt(is_submitted: bool = False):
+        doc = {"student_id": student_id, "survey_id": survey_id, "is_submitted": is_submitted, "started_at": datetime.now(UTC)}
+        return client.portal.call(attempt_collection.insert_one, doc)
+
+    open_attempt(is_submitted=True)
+    open_attempt(is_submitted=True)
+    open_attempt()
+    with pytest.raises(DuplicateKeyError):
+        open_attempt()
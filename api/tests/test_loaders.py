@@ -0,0 +1,35 @@
+import asyncio
+from fastapi.testclient import TestClient
+
+from app.core.db import get_course_collection
+from app.core.loaders import DocumentLoader
+
+
+def test_loads_in_the_same_tick_share_one_query_and_are_memoised(client: TestClient, db_commands):
+    course_collection = get_course_collection()
+    inserted = client.portal.call(course_collection.insert_many, [{"name": f"Loader {i}", "code": f"LOAD{i}"} for i in range(3)])
+    ids = inserted.inserted_ids
+
+    async def exercise():
+        loader = DocumentLoader(course_collection)
+        first = await asyncio.gather(*(loader.load(doc_id) for doc_id in ids), loader.load(ids[0]))
+        again = await loader.load_many(ids)
+        return loader.queries, first, again
+
+    with db_commands.record() as commands:
+        queries, first, again = client.portal.call(exercise)
+    assert queries == 1 and commands.count("find") == 1
+    assert [doc["name"] for doc in first] == ["Loader 0", "Loader 1", "Loader 2", "Loader 0"]
+    assert list(again) == ids
+
+
+def test_missing_documents_are_memoised_as_none(client: TestClient):
+    async def exercise():
+        loader = DocumentLoader(get_course_collection())
+        missing = await loader.load("no-such-id")
+        loader.prime({"_id": "primed", "name": "Primed"})
+        return loader.queries, missing, await loader.load("no-such-id"), await loader.load_many(["primed", "no-such-id"])
+
+    queries, missing, missing_again, loaded = client.portal.call(exercise)
+    assert queries == 1 and missing is None and missing_again is None
+    assert loaded == {"primed": {"_id": "primed", "name": "Primed"}}
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+from app.users.auth import get_password_hash, verify_password
+from app.users.password_hashing import PasswordHashPool
+
+
+async def test_hashing_runs_off_the_event_loop():
+    pool = PasswordHashPool(max_workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    hashed = await pool.run(get_password_hash, "secret-password")
+    assert await pool.run(verify_password, "secret-password", hashed)
+    assert not await pool.run(verify_password, "wrong-password", hashed)
+    ticker_task.cancel()
+    # bcrypt takes tens of milliseconds per call; the loop kept serving other tasks meanwhile
+    assert ticks > 3
+    assert pool.stats()["completed"] == 3
+
+
+async def test_hashing_concurrency_is_capped_and_queue_depth_reported():
+    pool = PasswordHashPool(max_workers=1)
+    release = threading.Event()
+    pending = [asyncio.create_task(pool.run(release.wait)) for _ in range(3)]
+    deadline = time.monotonic() + 2
+    while pool.running != 1 and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+    stats = pool.stats()
+    assert stats["running"] == 1 and stats["queue_depth"] == 2 and stats["peak_queue_depth"] >= 2
+    release.set()
+    await asyncio.gather(*pending)
+    assert pool.stats()["queue_depth"] == 0 and pool.stats()["completed"] == 3
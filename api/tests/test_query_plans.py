@@ -0,0 +1,200 @@
+import random
+import uuid
+from datetime import datetime, timedelta, UTC
+from http import HTTPStatus
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.core.db import MONGO_DB
+
+# Query-plan regression harness: seed enough unrelated data that a missing index shows up, drive the
+# API through its endpoints while recording every command, then re-run each read/write with explain and
+# fail on collection scans, unindexed $lookup joins, or scans that examine far more documents than they return.
+
+EXPLAINED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Session and driver fields that explain either rejects or does not need.
+_STRIPPED_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "writeConcern", "readConcern", "apiVersion"}
+_UNINDEXED_JOIN_STRATEGIES = {"NestedLoopJoin", "HashJoin"}
+MAX_EXAMINED_PER_RETURNED = 10
+MIN_EXAMINED_TO_FLAG = 50
+
+
+async def _seed_realistic_dataset(num_courses: int = 30, num_questions: int = 600, num_surveys: int = 60,
+                                  num_students: int = 400, num_attempts: int = 3000) -> None:
+    db = MONGO_DB.db
+    rng = random.Random(1234)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    teacher_id = ObjectId()
+
+    courses = [{"_id": ObjectId(), "name": f"Seed Course {i}", "code": f"SEED{i}_{uuid.uuid4().hex[:6]}", "question_count": 0}
+               for i in range(num_courses)]
+    questions = [{
+        "_id": ObjectId(), "title": f"Seed Question {i}", "answer_type": "multiple_choice",
+        "answer_options": {"a": "A", "b": "B"}, "scoring_rules": {"correct_option_key": "a", "score_if_correct": 10.0},
+    } for i in range(num_questions)]
+    qcas = []
+    for question in questions:
+        for course in rng.sample(courses, rng.choice([1, 1, 2])):
+            qcas.append({"_id": ObjectId(), "question_id": question["_id"], "course_id": course["_id"], "answer_association_type": "positive"})
+            course["question_count"] += 1
+    surveys = [{
+        "_id": ObjectId(), "title": f"Seed Survey {i}", "course_ids": [c["_id"] for c in rng.sample(courses, 2)],
+        "is_published": i % 3 != 0, "created_by": teacher_id, "created_at": now - timedelta(minutes=i), "updated_at": now,
+        "max_scores_per_course": {}, "max_overall_survey_score": 0.0,
+    } for i in range(num_surveys)]
+    students = [{"_id": ObjectId(), "username": f"seed_student_{i}_{uuid.uuid4().hex[:6]}@example.com",
+                 "display_name": f"Seed Student {i}", "role": "student", "password_hash": "x"} for i in range(num_students)]
+    qcas_by_course = {}
+    for qca in qcas:
+        qcas_by_course.setdefault(qca["course_id"], []).append(qca)
+
+    attempts, answers = [], []
+    for i in range(num_attempts):
+        survey, student = rng.choice(surveys), rng.choice(students)
+        submitted = i % 5 != 0
+        attempt = {
+            "_id": ObjectId(), "student_id": student["_id"], "survey_id": survey["_id"], "is_submitted": submitted,
+            "started_at": now - timedelta(seconds=i), "submitted_at": now - timedelta(seconds=i) if submitted else None,
+        }
+        if not submitted:
+            # Keep the one-open-attempt-per-student-and-survey invariant.
+            attempt["student_id"] = ObjectId()
+        attempts.append(attempt)
+        course_qcas = qcas_by_course.get(survey["course_ids"][0], [])
+        for qca in rng.sample(course_qcas, min(4, len(course_qcas))):
+            answers.append({
+                "_id": ObjectId(), "survey_attempt_id": attempt["_id"], "student_id": attempt["student_id"],
+                "qca_id": qca["_id"], "question_id": qca["question_id"], "answer_value": "a",
+                "answered_at": now, "score_achieved": 10.0 if submitted else None,
+            })
+
+    for name, docs in [("courses", courses), ("questions", questions), ("question_course_associations", qcas),
+                       ("surveys", surveys), ("users", students), ("survey_attempts", attempts), ("student_answers", answers)]:
+        await db[name].insert_many(docs, ordered=False)
+
+
+def _exercise_endpoints(client: TestClient, teacher_details: dict, student_details: dict) -> None:
+    """Walks every router through a teacher authoring a survey and a student taking it."""
+    def login(details: dict):
+        assert client.post("/api/v1/users/login", json={"username": details["username"], "password": "testpassword"}).status_code == HTTPStatus.OK
+
+    def ok(response, expected=HTTPStatus.OK):
+        assert response.status_code == expected, response.text
+        return response.json() if response.content else None
+
+    login(teacher_details)
+    ok(client.get("/api/v1/users/me"))
+    courses = [ok(client.post("/api/v1/courses/", json={"name": f"Plan Course {i}", "code": f"PLAN{i}_{uuid.uuid4().hex[:6]}"}), HTTPStatus.CREATED)
+               for i in range(2)]
+    questions = [ok(client.post("/api/v1/questions/", json={
+        "title": f"Plan Question {i}", "answer_type": "multiple_choice", "answer_options": {"a": "A", "b": "B"},
+        "scoring_rules": {"correct_option_key": "a", "score_if_correct": 10.0},
+    }), HTTPStatus.CREATED) for i in range(3)]
+    qcas = [ok(client.post("/api/v1/question-course-associations/", json={"question_id": q["id"], "course_id": courses[i % 2]["id"]}), HTTPStatus.CREATED)
+            for i, q in enumerate(questions)]
+    survey = ok(client.post("/api/v1/surveys/", json={"title": "Plan Survey", "course_ids": [c["id"] for c in courses], "is_published": True}), HTTPStatus.CREATED)
+
+    ok(client.get("/api/v1/courses/", params={"limit": 5}))
+    ok(client.get(f"/api/v1/courses/{courses[0]['id']}"))
+    ok(client.put(f"/api/v1/courses/{courses[0]['id']}", json={"description": "Edited"}))
+    ok(client.get("/api/v1/questions/", params={"limit": 5}))
+    ok(client.get(f"/api/v1/questions/{questions[0]['id']}"))
+    ok(client.get("/api/v1/question-course-associations/", params={"course_id": courses[0]["id"]}))
+    ok(client.get(f"/api/v1/question-course-associations/{qcas[0]['id']}"))
+    ok(client.get("/api/v1/surveys/", params={"limit": 5}))
+    ok(client.get(f"/api/v1/surveys/{survey['id']}", params={"include_questions": "true"}))
+    ok(client.put(f"/api/v1/surveys/{survey['id']}", json={"description": "Edited"}))
+
+    login(student_details)
+    ok(client.get("/api/v1/surveys/", params={"limit": 5}))
+    start = ok(client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}))
+    answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start["questions"]]
+    ok(client.post(f"/api/v1/survey-attempts/{start['attempt_id']}/answers", json={"answers": answers}))
+    ok(client.post(f"/api/v1/survey-attempts/{start['attempt_id']}/submit"))
+    ok(client.get(f"/api/v1/survey-attempts/{start['attempt_id']}/results"))
+    ok(client.get("/api/v1/survey-attempts/my", params={"include_answers": "true"}))
+
+    login(teacher_details)
+    ok(client.get(f"/api/v1/survey-attempts/by-survey/{survey['id']}", params={"include_answers": "true"}))
+    ok(client.put(f"/api/v1/questions/{questions[0]['id']}", json={"scoring_rules": {"correct_option_key": "b", "score_if_correct": 10.0}}))
+    job = ok(client.post(f"/api/v1/questions/{questions[0]['id']}/rescore"), HTTPStatus.ACCEPTED)
+    ok(client.get(f"/api/v1/questions/rescore-jobs/{job['id']}"))
+    ok(client.put(f"/api/v1/question-course-associations/{qcas[1]['id']}", json={"answer_association_type": "negative"}))
+    ok(client.delete(f"/api/v1/question-course-associations/{qcas[2]['id']}"), HTTPStatus.NO_CONTENT)
+    ok(client.delete(f"/api/v1/questions/{questions[2]['id']}"), HTTPStatus.NO_CONTENT)
+    ok(client.get("/api/v1/metrics/caches"))
+    spare_course = ok(client.post("/api/v1/courses/", json={"name": "Plan Spare", "code": f"PLANX_{uuid.uuid4().hex[:6]}"}), HTTPStatus.CREATED)
+    ok(client.delete(f"/api/v1/courses/{spare_course['id']}"), HTTPStatus.NO_CONTENT)
+    draft = ok(client.post("/api/v1/surveys/", json={"title": "Plan Draft", "course_ids": [courses[1]["id"]]}), HTTPStatus.CREATED)
+    ok(client.delete(f"/api/v1/surveys/{draft['id']}"), HTTPStatus.NO_CONTENT)
+    ok(client.post("/api/v1/users/logout"))
+
+
+def _explainable(command_name: str, command: dict) -> list[dict]:
+    """The recorded command as one or more explainable commands (explain takes one write statement at a time)."""
+    command = {key: value for key, value in command.items() if key not in _STRIPPED_FIELDS}
+    if command_name == "update":
+        return [{"update": command["update"], "updates": [statement]} for statement in command["updates"]]
+    if command_name == "delete":
+        return [{"delete": command["delete"], "deletes": [statement]} for statement in command["deletes"]]
+    return [command]
+
+
+def _walk_plan(node, stages: list, strategies: list, stats: list) -> None:
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        if isinstance(node.get("strategy"), str):
+            strategies.append(node["strategy"])
+        if "totalDocsExamined" in node and "nReturned" in node:
+            stats.append(node)
+        for key, value in node.items():
+            if key not in ("rejectedPlans", "allPlansExecution"):
+                _walk_plan(value, stages, strategies, stats)
+    elif isinstance(node, list):
+        for item in node:
+            _walk_plan(item, stages, strategies, stats)
+
+
+def _plan_problems(command_name: str, explain_result: dict) -> list[str]:
+    stages, strategies, stats = [], [], []
+    _walk_plan(explain_result, stages, strategies, stats)
+    problems = []
+    if "COLLSCAN" in stages:
+        problems.append("COLLSCAN")
+    problems.extend(f"unindexed $lookup ({strategy})" for strategy in strategies if strategy in _UNINDEXED_JOIN_STRATEGIES)
+    if command_name in ("find", "aggregate", "count", "distinct"):
+        for execution_stats in stats:
+            examined, returned = execution_stats["totalDocsExamined"], execution_stats["nReturned"]
+            if examined > MIN_EXAMINED_TO_FLAG and examined > MAX_EXAMINED_PER_RETURNED * max(returned, 1):
+                problems.append(f"examined {examined} documents to return {returned}")
+    return problems
+
+
+def test_hot_path_queries_use_indexes(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    client.portal.call(_seed_realistic_dataset)
+
+    with db_commands.record():
+        _exercise_endpoints(client, teacher_details, student_details)
+    recorded = [(database, command) for database, command in db_commands.documents if next(iter(command)) in EXPLAINED_COMMANDS]
+    assert recorded, "No commands were recorded."
+
+    async def explain(database: str, command: dict) -> dict:
+        return await MONGO_DB.client[database].command({"explain": command, "verbosity": "executionStats"})
+
+    failures = []
+    for database, command in recorded:
+        command_name = next(iter(command))
+        for explainable in _explainable(command_name, command):
+            problems = _plan_problems(command_name, client.portal.call(explain, database, explainable))
+            if problems:
+                failures.append(f"{command_name} on {command[command_name]}: {', '.join(problems)}\n    {explainable}")
+    assert not failures, "Query plan regressions:\n" + "\n".join(failures)
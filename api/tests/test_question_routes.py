@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from http import HTTPStatus
 import uuid 
+from bson import ObjectId
 
 from app.questions.data_types import AnswerTypeEnum
 from app.courses.data_types import CourseCreate # For creating courses for QCA test
@@ -244,4 +245,55 @@ def test_delete_question_cascades_to_qca(authenticated_teacher_data_and_client:
 
     # 5. Verify QCA is deleted
     get_qca_after_delete_res = client.get(f"/api/v1/question-course-associations/{qca_id}") # client is teacher
-    assert get_qca_after_delete_res.status_code == HTTPStatus.NOT_FOUND
\ No newline at end of file
+    assert get_qca_after_delete_res.status_code == HTTPStatus.NOT_FOUND
+
+def test_rescore_question_updates_submitted_attempts(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict]
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    unique_suffix = uuid.uuid4().hex[:6]
+
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_test_course_for_question_test(client, unique_suffix)
+    question_payload = create_base_question_payload(AnswerTypeEnum.multiple_choice, unique_suffix)
+    question = client.post("/api/v1/questions/", json=question_payload).json()
+    create_test_qca_for_question_test(client, question["id"], course["id"])
+    survey_res = client.post("/api/v1/surveys/", json={"title": f"Rescore Survey {unique_suffix}", "course_ids": [course["id"]], "is_published": True})
+    assert survey_res.status_code == HTTPStatus.CREATED, survey_res.text
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey_res.json()["id"]}).json()
+    attempt_id = start_data["attempt_id"]
+    qca_id = start_data["questions"][0]["qca_id"]
+    client.post(f"/api/v1/survey-attempts/{attempt_id}/answers", json={"answers": [{"qca_id": qca_id, "question_id": question["id"], "answer_value": "c"}]})
+    submit_data = client.post(f"/api/v1/survey-attempts/{attempt_id}/submit").json()
+    assert submit_data["course_scores"][course["id"]] == 5.0
+
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    update_res = client.put(f"/api/v1/questions/{question['id']}", json={"scoring_rules": {"correct_option_key": "c", "score_if_correct": 8, "score_if_incorrect": 0}})
+    assert update_res.status_code == HTTPStatus.OK, update_res.text
+
+    rescore_res = client.post(f"/api/v1/questions/{question['id']}/rescore")
+    assert rescore_res.status_code == HTTPStatus.ACCEPTED, rescore_res.text
+    job_id = rescore_res.json()["id"]
+
+    job_res = client.get(f"/api/v1/questions/rescore-jobs/{job_id}")
+    assert job_res.status_code == HTTPStatus.OK, job_res.text
+    job_data = job_res.json()
+    assert job_data["status"] == "completed", job_data
+    assert job_data["total_answers"] == 1
+    assert job_data["updated_answers"] == 1
+    assert job_data["processed_attempts"] == 1
+
+    results = client.get(f"/api/v1/survey-attempts/{attempt_id}/results").json()
+    assert results["course_scores"][course["id"]] == 8.0
+    assert results["actual_overall_survey_score"] == 8.0
+    assert results["answers"][0]["score_achieved"] == 8.0
+
+def test_get_rescore_job_not_found(authenticated_teacher_data_and_client: tuple[TestClient, dict]):
+    client, _ = authenticated_teacher_data_and_client
+    response = client.get(f"/api/v1/questions/rescore-jobs/{ObjectId()}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,71 @@
+import pytest
+from http import HTTPStatus
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core.rate_limit import _BACKENDS, RATE_LIMITS, MemoryTokenBuckets, RateLimit, enforce_rate_limit
+
+
+async def test_memory_bucket_allows_burst_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    buckets = MemoryTokenBuckets(max_keys=10)
+    limit = RateLimit(burst=3, per_minute=60)  # one token per second
+
+    assert [await buckets.take("k", limit) for _ in range(3)] == [0, 0, 0]
+    assert await buckets.take("k", limit) == pytest.approx(1.0)
+    now[0] += 0.5
+    assert await buckets.take("k", limit) == pytest.approx(0.5)
+    now[0] += 0.5
+    assert await buckets.take("k", limit) == 0
+    assert await buckets.take("other", limit) == 0  # keys are independent
+
+
+async def test_memory_buckets_are_bounded():
+    buckets = MemoryTokenBuckets(max_keys=2)
+    limit = RateLimit(burst=1, per_minute=1)
+    for key in ("a", "b", "c"):
+        assert await buckets.take(key, limit) == 0
+    # "a" was dropped as least recently used, so it starts from a full bucket again
+    assert await buckets.take("a", limit) == 0
+    assert await buckets.take("c", limit) > 0
+
+
+async def test_denied_request_takes_no_token_from_other_buckets(monkeypatch):
+    monkeypatch.setattr("app.core.rate_limit.RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setitem(_BACKENDS, "memory", MemoryTokenBuckets(max_keys=10))
+    monkeypatch.setitem(RATE_LIMITS, "answers", (RateLimit(burst=2, per_minute=0), RateLimit(burst=1, per_minute=0)))
+    request = Request({"type": "http", "client": ("10.0.0.1", 1234), "headers": []})
+
+    await enforce_rate_limit("answers", request, user_key="a")
+    for _ in range(5):
+        with pytest.raises(HTTPException) as denied:
+            await enforce_rate_limit("answers", request, user_key="a")
+        assert denied.value.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    # Student "a" being over their own limit left the shared address with a token for "b"
+    await enforce_rate_limit("answers", request, user_key="b")
+
+    # Now the address is empty: "c" is denied and gets back the token it took from its own bucket
+    with pytest.raises(HTTPException):
+        await enforce_rate_limit("answers", request, user_key="c")
+    assert await _BACKENDS["memory"].take("answers:user:c", RateLimit(burst=1, per_minute=0)) == 0
+
+
+def test_rate_limit_parses_settings():
+    assert RateLimit.parse("20/10") == RateLimit(burst=20, per_minute=10.0)
+
+
+@pytest.mark.parametrize("backend", ["memory", "mongo"])
+def test_login_is_limited_per_username_with_retry_after(client: TestClient, monkeypatch, backend):
+    monkeypatch.setattr("app.core.rate_limit.RATE_LIMIT_BACKEND", backend)
+    monkeypatch.setitem(RATE_LIMITS, "login", (RateLimit(burst=100, per_minute=100), RateLimit(burst=2, per_minute=1)))
+    payload = {"username": f"hammer_{backend}@example.com", "password": "wrong"}
+    assert [client.post("/api/v1/users/login", json=payload).status_code for _ in range(2)] == [HTTPStatus.UNAUTHORIZED] * 2
+
+    response = client.post("/api/v1/users/login", json=payload)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+    # Other students from the same address are unaffected
+    other = client.post("/api/v1/users/login", json={"username": f"other_{backend}@example.com", "password": "wrong"})
+    assert other.status_code == HTTPStatus.UNAUTHORIZED
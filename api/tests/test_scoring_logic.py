@@ -1,18 +1,25 @@
 import pytest
 from typing import Dict, Any
+from datetime import datetime
+from bson import ObjectId
 
 # Function to be tested (imagine it's imported or defined here for testing)
 # For a real test, you'd import it: from app.survey_attempts.router import calculate_score_for_answer
 # For this simulation, I'll define a simplified version or assume it's accessible.
 # We'll use the actual one from the provided file structure context.
 from app.survey_attempts.router import calculate_score_for_answer
-from app.questions.data_types import AnswerTypeEnum
+from app.survey_attempts.scoring import SCORING_PLAN_CACHE, compile_scoring_plan, get_scoring_plan, invalidate_scoring_plan, score_answers_batch, MultipleChoicePlan
+from app.survey_attempts.thresholds import (
+    FEEDBACK_TABLE_CACHE, build_interval_table, compile_feedback_table, compile_outcome_table,
+    get_qca_feedback_table, get_survey_threshold_tables,
+)
+from app.questions.data_types import AnswerTypeEnum, FeedbackComparisonEnum
+from app.surveys.data_types import OutcomeCategoryEnum
 from app.core.settings import STANDARD_QUESTION_MAX_SCORE # Should be 10.0
 
 # --- Test Cases ---
 
-@pytest.mark.asyncio
-@pytest.mark.parametrize("question_config, answer, expected_score", [
+SCORING_SCENARIOS = [
     # Multiple Choice - Correct Option Key
     ({"answer_type": AnswerTypeEnum.multiple_choice.value, "scoring_rules": {"correct_option_key": "a", "score_if_correct": 5.0, "score_if_incorrect": 0.5}}, "a", 5.0),
     ({"answer_type": AnswerTypeEnum.multiple_choice.value, "scoring_rules": {"correct_option_key": "a", "score_if_correct": 5.0, "score_if_incorrect": 0.5}}, "b", 0.5),
@@ -60,7 +67,10 @@ from app.core.settings import STANDARD_QUESTION_MAX_SCORE # Should be 10.0
     ({"answer_type": AnswerTypeEnum.multiple_choice.value, "scoring_rules": {"correct_option_key": "a", "score_if_unanswered": 1.0}}, None, 1.0),
     ({"answer_type": AnswerTypeEnum.input.value, "scoring_rules": {"expected_answers": [], "default_incorrect_score": 0.0, "score_if_unanswered": 0.5}}, None, 0.5),
     ({"answer_type": AnswerTypeEnum.input.value, "scoring_rules": {"score_if_unanswered": 12.0}}, None, STANDARD_QUESTION_MAX_SCORE), # Cap unanswered score
-])
+]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("question_config, answer, expected_score", SCORING_SCENARIOS)
 async def test_calculate_score_for_answer_various_scenarios(question_config: Dict[str, Any], answer: Any, expected_score: float):
     # Add a default title if not present, as it's used in error messages but not for logic
     if "title" not in question_config:
@@ -68,3 +78,129 @@ async def test_calculate_score_for_answer_various_scenarios(question_config: Dic
     
     score = await calculate_score_for_answer(question_config, answer)
     assert score == expected_score, f"Failed for Q type: {question_config['answer_type']}, Answer: {answer}"
+
+
+def test_scoring_plan_is_cached_by_question_id_until_invalidated_or_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    question_id = ObjectId()
+    question_doc = {"_id": question_id, "answer_type": AnswerTypeEnum.multiple_choice.value, "scoring_rules": {"correct_option_key": "a", "score_if_correct": 4.0}}
+    plan = get_scoring_plan(question_doc)
+    assert isinstance(plan, MultipleChoicePlan)
+    assert plan.score("a") == 4.0
+    assert get_scoring_plan(question_doc) is plan
+
+    # A write in this worker invalidates the plan
+    question_doc["scoring_rules"] = {"correct_option_key": "a", "score_if_correct": 6.0}
+    invalidate_scoring_plan(question_id)
+    recompiled = get_scoring_plan(question_doc)
+    assert recompiled is not plan
+    assert recompiled.score("a") == 6.0
+
+    # A write through another worker is picked up once the cached plan expires
+    question_doc["scoring_rules"] = {"correct_option_key": "a", "score_if_correct": 8.0}
+    now[0] += SCORING_PLAN_CACHE.ttl + 1
+    assert get_scoring_plan(question_doc).score("a") == 8.0
+    invalidate_scoring_plan(question_id)
+
+
+def test_compile_scoring_plan_is_type_specialised():
+    plan = compile_scoring_plan({"answer_type": AnswerTypeEnum.multiple_select.value, "answer_options": {"a": "A", "b": "B", "c": "C"}, "scoring_rules": {"correct_option_keys": ["a", "b"]}})
+    assert plan.correct_keys == frozenset({"a", "b"})
+    assert plan.score_per_correct == STANDARD_QUESTION_MAX_SCORE / 2
+    unknown_plan = compile_scoring_plan({"answer_type": "unknown", "scoring_rules": {"score_if_unanswered": 2}})
+    assert unknown_plan.score("anything") == 0.0
+    assert unknown_plan.score(None) == 2.0
+
+
+def test_score_answers_batch_matches_single_answer_scoring():
+    plans = [compile_scoring_plan(question_config) for question_config, _, _ in SCORING_SCENARIOS]
+    answers = [answer for _, answer, _ in SCORING_SCENARIOS]
+    expected = [expected_score for _, _, expected_score in SCORING_SCENARIOS]
+    assert score_answers_batch(plans, answers) == expected
+
+    # Repeated answers to the same question share a plan group and must still line up with their inputs
+    range_plan = compile_scoring_plan({"answer_type": AnswerTypeEnum.range.value, "answer_options": {"min": 0, "max": 10}, "scoring_rules": {"target_value": 5, "score_per_deviation_unit": -2}})
+    mc_plan = compile_scoring_plan({"answer_type": AnswerTypeEnum.multiple_choice.value, "scoring_rules": {"option_scores": {"a": 3.0, "b": 1.0}}})
+    batch_plans = [range_plan, mc_plan, range_plan, mc_plan, range_plan, mc_plan]
+    batch_answers = [5, "a", 7.5, "b", "not a number", None]
+    assert score_answers_batch(batch_plans, batch_answers) == [plan.score(answer) for plan, answer in zip(batch_plans, batch_answers)]
+    assert score_answers_batch(batch_plans, batch_answers) == [10.0, 3.0, 5.0, 1.0, 0.0, 0.0]
+
+
+def _first_matching_rule(rules, score, default=None):
+    ops = {"lt": score.__lt__, "lte": score.__le__, "gt": score.__gt__, "gte": score.__ge__, "eq": score.__eq__, "neq": score.__ne__}
+    for value, comparison, result in rules:
+        if ops[comparison.value](value) is True:
+            return result
+    return default
+
+
+def test_interval_table_matches_first_matching_rule():
+    rules = [
+        (8.0, FeedbackComparisonEnum.gte, "great"),
+        (5.0, FeedbackComparisonEnum.eq, "exactly five"),
+        (5.0, FeedbackComparisonEnum.gt, "good"),
+        (2.0, FeedbackComparisonEnum.lte, "low"),
+        (3.0, FeedbackComparisonEnum.neq, "not three"),
+    ]
+    table = build_interval_table(rules, default="fallback")
+    for score in [-1.0, 0.0, 2.0, 2.5, 3.0, 4.99, 5.0, 5.01, 7.99, 8.0, 100.0, float("inf"), float("nan")]:
+        assert table.lookup(score) == _first_matching_rule(rules, score, "fallback"), score
+
+
+def test_compiled_feedback_and_outcome_tables():
+    feedback_table = compile_feedback_table([
+        {"score_value": 5, "comparison": "gte", "feedback": "Well done"},
+        {"score_value": 5, "comparison": "lt", "feedback": "Keep practising"},
+    ])
+    assert feedback_table.lookup(5.0) == "Well done"
+    assert feedback_table.lookup(4.99) == "Keep practising"
+    assert compile_feedback_table([]) is None
+
+    # Outcome rules are evaluated in (score_value, comparison) order regardless of how they were saved
+    outcome_table = compile_outcome_table([
+        {"score_value": 15, "comparison": "gte", "outcome": OutcomeCategoryEnum.NOT_SUITABLE.value},
+        {"score_value": 5, "comparison": "gte", "outcome": OutcomeCategoryEnum.ELIGIBLE_FOR_ERPL.value},
+    ])
+    assert outcome_table.lookup(20.0) == OutcomeCategoryEnum.ELIGIBLE_FOR_ERPL.value
+    assert outcome_table.lookup(1.0) == OutcomeCategoryEnum.UNDEFINED.value
+    assert type(outcome_table).from_doc(outcome_table.to_doc()).lookup(20.0) == OutcomeCategoryEnum.ELIGIBLE_FOR_ERPL.value
+
+
+def test_feedback_tables_are_recompiled_after_expiry_or_survey_update(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    qca_doc = {"_id": ObjectId(), "feedbacks_based_on_score": [{"score_value": 5, "comparison": "gte", "feedback": "Well done"}]}
+    table = get_qca_feedback_table(qca_doc)
+    assert table.lookup(5.0) == "Well done"
+
+    # Edited through another worker: served from the cache until it expires
+    qca_doc["feedbacks_based_on_score"] = [{"score_value": 5, "comparison": "gte", "feedback": "Excellent"}]
+    assert get_qca_feedback_table(qca_doc) is table
+    now[0] += FEEDBACK_TABLE_CACHE.ttl + 1
+    assert get_qca_feedback_table(qca_doc).lookup(5.0) == "Excellent"
+
+    course_id = str(ObjectId())
+    survey_doc = {"_id": ObjectId(), "updated_at": datetime(2025, 1, 1), "course_outcome_thresholds": {course_id: [
+        {"score_value": 5, "comparison": "gte", "outcome": OutcomeCategoryEnum.ELIGIBLE_FOR_ERPL.value},
+    ]}}
+    assert get_survey_threshold_tables(survey_doc)[course_id].outcome.lookup(6.0) == OutcomeCategoryEnum.ELIGIBLE_FOR_ERPL.value
+    survey_doc["course_outcome_thresholds"][course_id][0]["outcome"] = OutcomeCategoryEnum.NOT_SUITABLE.value
+    survey_doc["updated_at"] = datetime(2025, 1, 2)
+    assert get_survey_threshold_tables(survey_doc)[course_id].outcome.lookup(6.0) == OutcomeCategoryEnum.NOT_SUITABLE.value
+
+
+def test_input_plan_matches_normalised_answers_by_lookup():
+    plan = compile_scoring_plan({"answer_type": AnswerTypeEnum.input.value, "scoring_rules": {"expected_answers": [
+        {"text": "Straße", "score": 7.0, "case_sensitive": False},
+        {"text": "Colour", "score": 3.0, "case_sensitive": True},
+        {"text": "colour", "score": 9.0, "case_sensitive": False},
+        {"text": "ﬁle", "score": 4.0, "case_sensitive": True},
+    ], "default_incorrect_score": 0.5}})
+    assert plan.score("  STRASSE ") == 7.0  # casefold + trimmed whitespace
+    assert plan.score("Colour") == 3.0  # earlier case-sensitive rule wins over the later case-insensitive one
+    assert plan.score("COLOUR") == 9.0
+    assert plan.score("file") == 4.0  # NFKC folds the "fi" ligature
+    assert plan.score("File") == 0.5
+    assert plan.score(42) == 0.5
@@ -1,8 +1,16 @@
+import pytest
 from fastapi.testclient import TestClient
 from http import HTTPStatus
+import asyncio
+import json
 import uuid
 from bson import ObjectId # For creating dummy ObjectIds
 
+from app.core.db import get_survey_collection, get_survey_snapshot_collection
+from app.core.loaders import SURVEY_SUMMARY_PROJECTION
+from app.survey_attempts.router import _ANSWER_OUT_PROJECTION
+from app.surveys.snapshots import COMPILED_SNAPSHOT_CACHE, get_published_survey_snapshot
+
 # Helper functions (can be moved to a shared test utility module if not already)
 def create_course_for_attempt_test(client: TestClient, suffix: str):
     payload = {"name": f"Course Att {suffix}", "code": f"CRS_ATT_{suffix}", "description": "Test course"}
@@ -247,6 +255,118 @@ def test_list_my_survey_attempts(
     assert survey1["id"] in survey_ids_in_response
     assert survey2["id"] in survey_ids_in_response
 
+@pytest.mark.parametrize("include_answers", [False, True])
+def test_list_my_survey_attempts_costs_constant_queries(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands,
+    include_answers: bool
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, f"C_MyPage_{uuid.uuid4().hex[:4]}")
+    question = create_question_for_attempt_test(client, f"MyPage_{uuid.uuid4().hex[:4]}")
+    create_qca_for_attempt_test(client, question["id"], course["id"])
+    surveys = [create_survey_for_attempt_test(client, [course["id"]], title_prefix=f"MyPage{i}") for i in range(4)]
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    page_commands = []
+    # A page of one attempt and a page of four cost the same number of commands
+    for batch in surveys[:1], surveys[1:]:
+        for survey in batch:
+            start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+            if include_answers:
+                answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start_data["questions"]]
+                client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/answers", json={"answers": answers})
+                client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/submit")
+        with db_commands.record() as commands:
+            response = client.get("/api/v1/survey-attempts/my", params={"include_answers": include_answers})
+        assert response.status_code == HTTPStatus.OK
+        assert all(att["survey_title"] and att["student_display_name"] != "Unknown Student" for att in response.json())
+        if include_answers:
+            assert all(len(att["answers"]) == 1 and att["answers"][0]["score_achieved"] == 1.0 for att in response.json())
+        page_commands.append(list(commands))
+    assert len(page_commands[0]) == len(page_commands[1]), page_commands
+
+def test_list_attempts_for_survey_streams_ndjson(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, f"C_Ndjson_{uuid.uuid4().hex[:4]}")
+    question = create_question_for_attempt_test(client, f"Ndjson_{uuid.uuid4().hex[:4]}")
+    create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Ndjson")
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start_data["questions"]]
+    client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/answers", json={"answers": answers})
+    assert client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/submit").status_code == HTTPStatus.OK
+
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    url = f"/api/v1/survey-attempts/by-survey/{survey['id']}"
+    json_rows = client.get(url, params={"include_answers": "true"}).json()
+    with db_commands.record():
+        response = client.get(url, params={"include_answers": "true"}, headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    ndjson_rows = [json.loads(line) for line in response.text.splitlines()]
+    assert ndjson_rows == json_rows
+    assert ndjson_rows[0]["id"] == start_data["attempt_id"] and len(ndjson_rows[0]["answers"]) == 1
+    # Answers are read with the projection of the fields the rows show
+    answer_finds = [cmd for _, cmd in db_commands.documents if cmd.get("find") == "student_answers"]
+    assert len(answer_finds) == 1 and answer_finds[0]["projection"] == _ANSWER_OUT_PROJECTION
+
+    with db_commands.record():
+        response = client.get(url, params={"fields": "actual_overall_survey_score"}, headers={"Accept": "application/x-ndjson"})
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"id": start_data["attempt_id"], "actual_overall_survey_score": 1.0}]
+    attempt_finds = [cmd for _, cmd in db_commands.documents if cmd.get("find") == "survey_attempts"]
+    assert set(attempt_finds[0]["projection"]) == {"_id", "actual_overall_survey_score", "survey_id", "student_id", "submitted_at", "snapshot_version"}
+
+def test_list_attempts_for_survey_streams_batches_with_one_lookup_each(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands,
+    monkeypatch
+):
+    # Five attempts in batches of two: two full batches flushed in the loop and a final one of one
+    monkeypatch.setattr("app.survey_attempts.router.ATTEMPT_STREAM_BATCH_SIZE", 2)
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, f"C_NdBatch_{uuid.uuid4().hex[:4]}")
+    question = create_question_for_attempt_test(client, f"NdBatch_{uuid.uuid4().hex[:4]}")
+    create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="NdjsonBatches")
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    for _ in range(5):
+        start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+        answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start_data["questions"]]
+        client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/answers", json={"answers": answers})
+        assert client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/submit").status_code == HTTPStatus.OK
+
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    url = f"/api/v1/survey-attempts/by-survey/{survey['id']}"
+    json_rows = client.get(url, params={"include_answers": "true"}).json()
+    with db_commands.record():
+        response = client.get(url, params={"include_answers": "true"}, headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == HTTPStatus.OK
+    ndjson_rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(ndjson_rows) == 5 and ndjson_rows == json_rows
+    assert all(len(row["answers"]) == 1 and row["student_display_name"] != "Unknown Student" for row in ndjson_rows)
+    # One $in per batch for the students and one for the answers, never one per row
+    batch_finds = [cmd["find"] for _, cmd in db_commands.documents if cmd.get("find") and "$in" in str(cmd.get("filter"))]
+    assert batch_finds.count("users") == 3 and batch_finds.count("student_answers") == 3, batch_finds
+
 def test_get_results_unsubmitted_survey_fail(
     client: TestClient,
     authenticated_teacher_data_and_client: tuple[TestClient, dict],
@@ -291,3 +411,297 @@ def test_get_results_not_owner_not_teacher_fail(
     response_s2_view_s1_results = client.get(f"/api/v1/survey-attempts/{attempt_id}/results")
     assert response_s2_view_s1_results.status_code == HTTPStatus.FORBIDDEN
     assert "Not authorized" in response_s2_view_s1_results.json()["detail"]
+
+
+def _submit_attempt_with_answer_count(client: TestClient, teacher_details: dict, student_details: dict, num_answers: int, db_commands) -> list:
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, f"RT{num_answers}_{uuid.uuid4().hex[:4]}")
+    for i in range(num_answers):
+        question = create_question_for_attempt_test(client, f"RT{num_answers}_{i}")
+        create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix=f"Round Trips {num_answers}")
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start_data["questions"]]
+    assert client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/answers", json={"answers": answers}).status_code == HTTPStatus.OK
+
+    with db_commands.record() as commands:
+        response_submit = client.post(f"/api/v1/survey-attempts/{start_data['attempt_id']}/submit")
+    assert response_submit.status_code == HTTPStatus.OK, response_submit.text
+    assert len(response_submit.json()["answers"]) == num_answers
+    assert response_submit.json()["actual_overall_survey_score"] == float(num_answers)
+    return list(commands)
+
+
+def test_submit_survey_round_trips_do_not_grow_with_answers(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+
+    few = _submit_attempt_with_answer_count(client, teacher_details, student_details, 2, db_commands)
+    many = _submit_attempt_with_answer_count(client, teacher_details, student_details, 8, db_commands)
+    assert len(few) == len(many), (few, many)
+    assert many.count("update") == 2  # one bulk write for the answers, one for the attempt
+
+
+def test_submit_answers_upserts_page_in_one_write(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, "Upsert")
+    for i in range(5):
+        question = create_question_for_attempt_test(client, f"Upsert_{i}")
+        create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Upsert Page")
+
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    attempt_id = start_data["attempt_id"]
+    answers = [{"qca_id": q["qca_id"], "question_id": q["question_id"], "answer_value": "a"} for q in start_data["questions"]]
+
+    with db_commands.record() as commands:
+        first_save = client.post(f"/api/v1/survey-attempts/{attempt_id}/answers", json={"answers": answers[:3]})
+    assert first_save.status_code == HTTPStatus.OK, first_save.text
+    assert commands.count("update") == 1
+    first_ids = {ans["qca_id"]: ans["id"] for ans in first_save.json()}
+
+    # Autosaving the full page again updates the first three answers in place and inserts the rest
+    for ans in answers: ans["answer_value"] = "b"
+    second_save = client.post(f"/api/v1/survey-attempts/{attempt_id}/answers", json={"answers": answers})
+    assert second_save.status_code == HTTPStatus.OK, second_save.text
+    saved = second_save.json()
+    assert [ans["qca_id"] for ans in saved] == [ans["qca_id"] for ans in answers]
+    assert all(ans["answer_value"] == "b" and ans["score_achieved"] is None for ans in saved)
+    for ans in saved:
+        if ans["qca_id"] in first_ids:
+            assert ans["id"] == first_ids[ans["qca_id"]]
+
+    # An invalid answer anywhere in the page rejects the whole page
+    answers[0]["answer_value"] = "a"; answers[-1]["answer_value"] = "not-an-option"
+    assert client.post(f"/api/v1/survey-attempts/{attempt_id}/answers", json={"answers": answers}).status_code == HTTPStatus.BAD_REQUEST
+
+    client.post(f"/api/v1/survey-attempts/{attempt_id}/submit")
+    results = client.get(f"/api/v1/survey-attempts/{attempt_id}/results").json()
+    assert len(results["answers"]) == 5
+    assert {ans["id"] for ans in results["answers"]} == {ans["id"] for ans in saved}
+    assert all(ans["answer_value"] == "b" for ans in results["answers"])
+
+
+def test_in_flight_attempt_is_scored_against_its_published_snapshot(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict]
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    login_teacher = lambda: client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    login_student = lambda: client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+
+    login_teacher()
+    course = create_course_for_attempt_test(client, "Snapshot")
+    question1 = create_question_for_attempt_test(client, "Snap1", rules={"correct_option_key": "a", "score_if_correct": 2.0})
+    create_qca_for_attempt_test(client, question1["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Snapshot Survey")
+
+    login_student()
+    start_v1 = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    assert len(start_v1["questions"]) == 1
+    qca1_id = start_v1["questions"][0]["qca_id"]
+    client.post(f"/api/v1/survey-attempts/{start_v1['attempt_id']}/answers", json={"answers": [{"qca_id": qca1_id, "question_id": question1["id"], "answer_value": "a"}]})
+
+    # The question bank changes while the attempt is in flight
+    login_teacher()
+    update_res = client.put(f"/api/v1/questions/{question1['id']}", json={"scoring_rules": {"correct_option_key": "b", "score_if_correct": 5.0}})
+    assert update_res.status_code == HTTPStatus.OK, update_res.text
+    question2 = create_question_for_attempt_test(client, "Snap2")
+    create_qca_for_attempt_test(client, question2["id"], course["id"])
+
+    login_student()
+    resumed = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    assert resumed["attempt_id"] == start_v1["attempt_id"]
+    assert len(resumed["questions"]) == 1
+    submit_v1 = client.post(f"/api/v1/survey-attempts/{start_v1['attempt_id']}/submit").json()
+    assert submit_v1["snapshot_version"] == 1
+    assert submit_v1["course_scores"][course["id"]] == 2.0
+
+    # Saving the survey again publishes a new version for attempts started from now on
+    login_teacher()
+    assert client.put(f"/api/v1/surveys/{survey['id']}", json={"description": "Republished"}).status_code == HTTPStatus.OK
+
+    login_student()
+    start_v2 = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    assert len(start_v2["questions"]) == 2
+    q_map = {q["question_id"]: q["qca_id"] for q in start_v2["questions"]}
+    client.post(f"/api/v1/survey-attempts/{start_v2['attempt_id']}/answers", json={"answers": [{"qca_id": q_map[question1["id"]], "question_id": question1["id"], "answer_value": "b"}]})
+    submit_v2 = client.post(f"/api/v1/survey-attempts/{start_v2['attempt_id']}/submit").json()
+    assert submit_v2["snapshot_version"] == 2
+    assert submit_v2["course_scores"][course["id"]] == 5.0
+
+
+def test_resumed_attempt_keeps_question_order_and_supports_etag(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict]
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course = create_course_for_attempt_test(client, "Order")
+    for i in range(8):
+        question = create_question_for_attempt_test(client, f"Order_{i}")
+        create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Ordered Survey")
+
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    first = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]})
+    assert first.status_code == HTTPStatus.OK
+    assert "etag" not in first.headers
+    attempt_id = first.json()["attempt_id"]
+
+    resumed = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]})
+    assert resumed.json()["attempt_id"] == attempt_id
+    assert [q["qca_id"] for q in resumed.json()["questions"]] == [q["qca_id"] for q in first.json()["questions"]]
+
+    questions = client.get(f"/api/v1/survey-attempts/{attempt_id}/questions")
+    assert questions.status_code == HTTPStatus.OK
+    assert [q["qca_id"] for q in questions.json()] == [q["qca_id"] for q in first.json()["questions"]]
+    etag = questions.headers.get("etag")
+    assert etag
+    assert questions.headers.get("cache-control") == "private, no-cache"
+
+    not_modified = client.get(f"/api/v1/survey-attempts/{attempt_id}/questions", headers={"If-None-Match": etag})
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers.get("etag") == etag
+    assert not_modified.content == b""
+
+    # A new attempt after submitting gets its own order and validator
+    client.post(f"/api/v1/survey-attempts/{attempt_id}/submit")
+    next_attempt = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]})
+    assert next_attempt.status_code == HTTPStatus.OK
+    next_questions = client.get(
+        f"/api/v1/survey-attempts/{next_attempt.json()['attempt_id']}/questions", headers={"If-None-Match": etag}
+    )
+    assert next_questions.status_code == HTTPStatus.OK
+    assert next_questions.headers.get("etag") != etag
+
+    # Only the student who owns the attempt can read its questions
+    _, teacher_details = authenticated_teacher_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    assert client.get(f"/api/v1/survey-attempts/{attempt_id}/questions").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_teacher_results_read_the_survey_once(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict],
+    db_commands
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    _submit_attempt_with_answer_count(client, teacher_details, student_details, 1, db_commands)
+    attempt_id = client.get("/api/v1/survey-attempts/my").json()[0]["id"]
+
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    with db_commands.record():
+        response = client.get(f"/api/v1/survey-attempts/{attempt_id}/results")
+    assert response.status_code == HTTPStatus.OK, response.text
+    # Authorization and the response both use the survey, through the request's loader
+    survey_finds = [cmd for _, cmd in db_commands.documents if cmd.get("find") == "surveys"]
+    assert len(survey_finds) == 1, survey_finds
+    # ...and only reads the fields it shows
+    assert set(survey_finds[0]["projection"]) == set(SURVEY_SUMMARY_PROJECTION)
+    user_finds = [cmd for _, cmd in db_commands.documents if cmd.get("find") == "users" and "$in" in str(cmd.get("filter"))]
+    assert [cmd["projection"] for cmd in user_finds] == [{"display_name": 1}]
+
+
+def test_attempt_max_scores_follow_the_version_it_was_scored_against(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict],
+    authenticated_student_data_and_client: tuple[TestClient, dict]
+):
+    _, teacher_details = authenticated_teacher_data_and_client
+    _, student_details = authenticated_student_data_and_client
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    course1 = create_course_for_attempt_test(client, f"C_MaxV1_{uuid.uuid4().hex[:4]}")
+    course2 = create_course_for_attempt_test(client, f"C_MaxV2_{uuid.uuid4().hex[:4]}")
+    create_qca_for_attempt_test(client, create_question_for_attempt_test(client, "MaxV1")["id"], course1["id"])
+    create_qca_for_attempt_test(client, create_question_for_attempt_test(client, "MaxV2")["id"], course2["id"])
+    survey = create_survey_for_attempt_test(client, [course1["id"]], title_prefix="MaxVersions")
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    start_data = client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]}).json()
+    attempt_id = start_data["attempt_id"]
+    assert client.post(f"/api/v1/survey-attempts/{attempt_id}/submit").status_code == HTTPStatus.OK
+
+    # The teacher adds a course afterwards: the live survey's max scores double
+    client.post("/api/v1/users/login", json={"username": teacher_details["username"], "password": "testpassword"})
+    edited = client.put(f"/api/v1/surveys/{survey['id']}", json={"course_ids": [course1["id"], course2["id"]]})
+    assert edited.status_code == HTTPStatus.OK
+    assert edited.json()["max_overall_survey_score"] == 20.0
+
+    original_max_scores = ({course1["id"]: 10.0}, 10.0)
+
+    def max_scores(attempt: dict) -> tuple:
+        return attempt["max_scores_per_course"], attempt["max_overall_survey_score"]
+
+    def teacher_views() -> list:
+        by_survey = client.get(f"/api/v1/survey-attempts/by-survey/{survey['id']}").json()
+        return [max_scores(client.get(f"/api/v1/survey-attempts/{attempt_id}/results").json())] + [max_scores(a) for a in by_survey]
+
+    assert teacher_views() == [original_max_scores] * 2
+    # Also when the snapshot is read from the database rather than this worker's cache
+    COMPILED_SNAPSHOT_CACHE.clear()
+    assert teacher_views() == [original_max_scores] * 2
+
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    assert [max_scores(a) for a in client.get("/api/v1/survey-attempts/my").json()] == [original_max_scores]
+    # A new attempt is scored against the edited survey
+    client.post("/api/v1/survey-attempts/start", json={"survey_id": survey["id"]})
+    newest = client.get("/api/v1/survey-attempts/my").json()[0]
+    assert max_scores(newest) == ({course1["id"]: 10.0, course2["id"]: 10.0}, 20.0)
+
+
+def test_title_edits_keep_the_published_snapshot_version(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict]
+):
+    course = create_course_for_attempt_test(client, "SnapTitle")
+    question = create_question_for_attempt_test(client, "SnapTitle")
+    create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Snapshot Title")
+
+    assert client.put(f"/api/v1/surveys/{survey['id']}", json={"title": "Renamed", "description": "Reworded"}).status_code == HTTPStatus.OK
+    survey_doc = client.portal.call(get_survey_collection().find_one, {"_id": ObjectId(survey["id"])})
+    assert survey_doc["published_version"] == 1
+
+
+def test_legacy_survey_snapshot_backfill_is_single_flight(
+    client: TestClient,
+    authenticated_teacher_data_and_client: tuple[TestClient, dict]
+):
+    course = create_course_for_attempt_test(client, "Backfill")
+    question = create_question_for_attempt_test(client, "Backfill")
+    create_qca_for_attempt_test(client, question["id"], course["id"])
+    survey = create_survey_for_attempt_test(client, [course["id"]], title_prefix="Backfill")
+    survey_id = ObjectId(survey["id"])
+
+    async def start_class_on_legacy_survey():
+        # As published before snapshots existed
+        await get_survey_snapshot_collection().delete_many({"survey_id": survey_id})
+        await get_survey_collection().update_one({"_id": survey_id}, {"$unset": {"published_version": "", "snapshot_counter": ""}})
+        legacy_doc = await get_survey_collection().find_one({"_id": survey_id})
+        snapshots = await asyncio.gather(*(get_published_survey_snapshot(legacy_doc) for _ in range(20)))
+        return {snapshot.version for snapshot in snapshots}, await get_survey_snapshot_collection().count_documents({"survey_id": survey_id})
+
+    versions, stored = client.portal.call(start_class_on_legacy_survey)
+    assert versions == {1} and stored == 1
@@ -3,6 +3,9 @@ from http import HTTPStatus
 import uuid 
 from bson import ObjectId 
 
+from app.core.db import get_course_collection, get_question_collection, get_survey_collection
+from app.surveys.max_scores import repair_max_scores
+
 # Helper functions from other test files (or a shared conftest/utils)
 
 def create_sample_course_for_survey_test(client: TestClient, suffix: str):
@@ -153,6 +156,133 @@ def test_get_survey_with_questions(authenticated_teacher_data_and_client: tuple[
     assert data["questions"] is not None and len(data["questions"]) == 1
     assert data["questions"][0]["question_id"] == question["id"]
 
+def test_get_survey_questions_resolve_in_one_query(authenticated_teacher_data_and_client: tuple[TestClient, dict], db_commands):
+    teacher_client, _ = authenticated_teacher_data_and_client 
+    course_a = create_sample_course_for_survey_test(teacher_client, f"C_QA_{uuid.uuid4().hex[:4]}")
+    course_b = create_sample_course_for_survey_test(teacher_client, f"C_QB_{uuid.uuid4().hex[:4]}")
+    question_ids = []
+    for i in range(6):
+        question = create_sample_question_for_survey_test(teacher_client, f"Q_One_{i}_{uuid.uuid4().hex[:4]}")
+        question_ids.append(question["id"])
+        create_sample_qca_for_survey_test(teacher_client, question["id"], course_a["id"])
+    # A question linked to both courses is listed once, with its first association
+    create_sample_qca_for_survey_test(teacher_client, question_ids[0], course_b["id"])
+    survey = create_sample_survey_for_test(teacher_client, [course_a["id"], course_b["id"]], "SvyOneQuery", published=True)
+
+    with db_commands.record() as commands:
+        response = teacher_client.get(f"/api/v1/surveys/{survey['id']}?include_questions=true")
+    assert response.status_code == HTTPStatus.OK
+    questions = response.json()["questions"]
+    assert sorted(q["question_id"] for q in questions) == sorted(question_ids)
+    assert all(q["course_id"] == course_a["id"] for q in questions)
+    assert commands.count("aggregate") == 1
+    assert commands.count("find") <= 2  # session user and the survey itself
+
+def test_survey_question_set_is_cached_until_a_write_invalidates_it(authenticated_teacher_data_and_client: tuple[TestClient, dict], db_commands):
+    teacher_client, _ = authenticated_teacher_data_and_client 
+    course = create_sample_course_for_survey_test(teacher_client, f"C_Cache_{uuid.uuid4().hex[:4]}")
+    question = create_sample_question_for_survey_test(teacher_client, f"Q_Cache_{uuid.uuid4().hex[:4]}")
+    create_sample_qca_for_survey_test(teacher_client, question["id"], course["id"])
+    survey = create_sample_survey_for_test(teacher_client, [course["id"]], "SvyCached", published=True)
+    survey_url = f"/api/v1/surveys/{survey['id']}?include_questions=true"
+
+    with db_commands.record() as commands:
+        assert len(teacher_client.get(survey_url).json()["questions"]) == 1
+        assert len(teacher_client.get(survey_url).json()["questions"]) == 1
+    assert commands.count("aggregate") == 1
+
+    # Linking another question to the survey's course drops the cached set
+    new_question = create_sample_question_for_survey_test(teacher_client, f"Q_Cache2_{uuid.uuid4().hex[:4]}")
+    create_sample_qca_for_survey_test(teacher_client, new_question["id"], course["id"])
+    with db_commands.record() as commands:
+        assert len(teacher_client.get(survey_url).json()["questions"]) == 2
+    assert commands.count("aggregate") == 1
+
+    # So does renaming one of its questions
+    teacher_client.put(f"/api/v1/questions/{new_question['id']}", json={"title": "Renamed cached question"})
+    titles = [q["title"] for q in teacher_client.get(survey_url).json()["questions"]]
+    assert "Renamed cached question" in titles
+
+    metrics = teacher_client.get("/api/v1/metrics/caches")
+    assert metrics.status_code == HTTPStatus.OK
+    question_set_stats = next(c for c in metrics.json() if c["name"] == "survey_question_sets")
+    assert question_set_stats["hits"] >= 1 and question_set_stats["misses"] >= 3
+
+def test_survey_max_scores_follow_qca_writes_without_rescans(authenticated_teacher_data_and_client: tuple[TestClient, dict], db_commands):
+    teacher_client, _ = authenticated_teacher_data_and_client 
+    course1 = create_sample_course_for_survey_test(teacher_client, f"C_Max1_{uuid.uuid4().hex[:4]}")
+    course2 = create_sample_course_for_survey_test(teacher_client, f"C_Max2_{uuid.uuid4().hex[:4]}")
+    shared_question = create_sample_question_for_survey_test(teacher_client, f"Q_Max1_{uuid.uuid4().hex[:4]}")
+    create_sample_qca_for_survey_test(teacher_client, shared_question["id"], course1["id"])
+    survey = create_sample_survey_for_test(teacher_client, [course1["id"], course2["id"]], "SvyMaxScores", published=False)
+    assert survey["max_scores_per_course"] == {course1["id"]: 10.0, course2["id"]: 0.0}
+    assert survey["max_overall_survey_score"] == 10.0
+
+    def max_scores():
+        data = teacher_client.get(f"/api/v1/surveys/{survey['id']}").json()
+        return data["max_scores_per_course"], data["max_overall_survey_score"]
+
+    # The same question in a second survey course raises that course's max but not the overall one
+    with db_commands.record() as commands:
+        shared_qca_2 = create_sample_qca_for_survey_test(teacher_client, shared_question["id"], course2["id"])
+    assert commands.count("distinct") == 0  # the question's other courses come back from its own counter update
+    assert max_scores() == ({course1["id"]: 10.0, course2["id"]: 10.0}, 10.0)
+
+    other_question = create_sample_question_for_survey_test(teacher_client, f"Q_Max2_{uuid.uuid4().hex[:4]}")
+    create_sample_qca_for_survey_test(teacher_client, other_question["id"], course2["id"])
+    assert max_scores() == ({course1["id"]: 10.0, course2["id"]: 20.0}, 20.0)
+
+    assert teacher_client.delete(f"/api/v1/question-course-associations/{shared_qca_2['id']}").status_code == HTTPStatus.NO_CONTENT
+    assert max_scores() == ({course1["id"]: 10.0, course2["id"]: 10.0}, 20.0)
+
+    assert teacher_client.delete(f"/api/v1/questions/{shared_question['id']}").status_code == HTTPStatus.NO_CONTENT
+    assert max_scores() == ({course1["id"]: 0.0, course2["id"]: 10.0}, 10.0)
+
+    # Metadata-only edits never look at QCAs
+    with db_commands.record() as commands:
+        response = teacher_client.put(f"/api/v1/surveys/{survey['id']}", json={"title": "SvyMaxScores renamed"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["max_overall_survey_score"] == 10.0
+    assert commands.count("distinct") == 0 and commands.count("count") == 0 and commands.count("aggregate") == 0
+
+def test_repair_max_scores_recomputes_counters_from_qcas(client: TestClient, authenticated_teacher_data_and_client: tuple[TestClient, dict]):
+    teacher_client, _ = authenticated_teacher_data_and_client
+    course1 = create_sample_course_for_survey_test(teacher_client, f"C_Fix1_{uuid.uuid4().hex[:4]}")
+    course2 = create_sample_course_for_survey_test(teacher_client, f"C_Fix2_{uuid.uuid4().hex[:4]}")
+    question = create_sample_question_for_survey_test(teacher_client, f"Q_Fix_{uuid.uuid4().hex[:4]}")
+    create_sample_qca_for_survey_test(teacher_client, question["id"], course1["id"])
+    create_sample_qca_for_survey_test(teacher_client, question["id"], course2["id"])
+    survey = create_sample_survey_for_test(teacher_client, [course1["id"], course2["id"]], "SvyRepair", published=False)
+
+    # As left by data written before the counters existed, or by an interrupted write
+    client.portal.call(get_course_collection().update_one, {"_id": ObjectId(course1["id"])}, {"$unset": {"question_count": ""}})
+    client.portal.call(get_course_collection().update_one, {"_id": ObjectId(course2["id"])}, {"$set": {"question_count": 7}})
+    client.portal.call(get_question_collection().update_one, {"_id": ObjectId(question["id"])}, {"$unset": {"course_link_counts": ""}})
+    client.portal.call(get_survey_collection().update_one, {"_id": ObjectId(survey["id"])}, {"$set": {"max_overall_survey_score": 70.0}})
+
+    repaired = client.portal.call(repair_max_scores)
+    assert repaired["courses"] >= 2 and repaired["questions"] >= 1 and repaired["surveys"] >= 1
+    assert client.portal.call(get_course_collection().find_one, {"_id": ObjectId(course2["id"])})["question_count"] == 1
+    question_doc = client.portal.call(get_question_collection().find_one, {"_id": ObjectId(question["id"])})
+    assert question_doc["course_link_counts"] == {course1["id"]: 1, course2["id"]: 1}
+    data = teacher_client.get(f"/api/v1/surveys/{survey['id']}").json()
+    assert (data["max_scores_per_course"], data["max_overall_survey_score"]) == ({course1["id"]: 10.0, course2["id"]: 10.0}, 10.0)
+    assert client.portal.call(repair_max_scores) == {"courses": 0, "questions": 0, "surveys": 0}
+
+def test_list_surveys_sparse_fieldset(authenticated_teacher_data_and_client: tuple[TestClient, dict]):
+    teacher_client, _ = authenticated_teacher_data_and_client 
+    course = create_sample_course_for_survey_test(teacher_client, f"C_Fields_{uuid.uuid4().hex[:4]}")
+    survey = create_sample_survey_for_test(teacher_client, [course["id"]], "SvyFields", published=False)
+
+    response = teacher_client.get("/api/v1/surveys/", params={"fields": "title,max_overall_survey_score"})
+    assert response.status_code == HTTPStatus.OK
+    row = next(item for item in response.json() if item["id"] == survey["id"])
+    assert row == {"id": survey["id"], "title": "SvyFields", "max_overall_survey_score": 0.0}
+
+    response = teacher_client.get("/api/v1/surveys/", params={"fields": "title,scoring_rules"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "scoring_rules" in response.json()["detail"]
+
 def test_get_unpublished_survey_by_id_fail_student(
     authenticated_teacher_data_and_client: tuple[TestClient, dict],
     authenticated_student_data_and_client: tuple[TestClient, dict]
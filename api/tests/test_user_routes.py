@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient # For type hinting
 from http import HTTPStatus
+from app.users.auth import SESSION_USER_CACHE
 
 # Test user data
 student_data = {
@@ -83,3 +84,38 @@ def test_logout_success(authenticated_student_data_and_client: tuple[TestClient,
     
     me_response_after_logout = client.get("/api/v1/users/me")
     assert me_response_after_logout.status_code == HTTPStatus.UNAUTHORIZED
+
+def test_session_user_is_cached_between_requests(authenticated_student_data_and_client: tuple[TestClient, dict], db_commands):
+    client, student_details = authenticated_student_data_and_client
+    with db_commands.record() as commands:
+        for _ in range(3):
+            assert client.get("/api/v1/users/me").status_code == HTTPStatus.OK
+    assert "find" not in commands, commands
+
+    # Logout drops the entry; login re-primes it from the row it read, minus the password hash
+    client.post("/api/v1/users/logout")
+    assert SESSION_USER_CACHE.get(student_details["id"]) is None
+    client.post("/api/v1/users/login", json={"username": student_details["username"], "password": "testpassword"})
+    cached = SESSION_USER_CACHE.get(student_details["id"])
+    assert cached is not None and not hasattr(cached, "password_hash")
+
+def test_session_claims_authorize_without_user_lookup(authenticated_teacher_data_and_client: tuple[TestClient, dict], db_commands):
+    client, teacher_details = authenticated_teacher_data_and_client
+    with db_commands.record() as commands:
+        me = client.get("/api/v1/users/me")
+        metrics = client.get("/api/v1/metrics/caches")  # teacher-only, no other queries
+    assert me.status_code == HTTPStatus.OK and me.json()["role"] == "teacher"
+    assert metrics.status_code == HTTPStatus.OK
+    assert commands == [], commands
+
+def test_logout_all_revokes_other_sessions(authenticated_student_data_and_client: tuple[TestClient, dict], monkeypatch):
+    client, _ = authenticated_student_data_and_client
+    other_session = client.cookies.get("session")
+
+    assert client.post("/api/v1/users/logout-all").status_code == HTTPStatus.OK
+    assert client.get("/api/v1/users/me").status_code == HTTPStatus.UNAUTHORIZED
+
+    # A session issued before the revocation is rejected as soon as its claims are re-checked
+    client.cookies.set("session", other_session)
+    monkeypatch.setattr("app.users.auth.SESSION_CLAIMS_REVALIDATE_SECONDS", 0)
+    assert client.get("/api/v1/users/me").status_code == HTTPStatus.UNAUTHORIZED